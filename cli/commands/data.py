@@ -1,18 +1,41 @@
 import typer
 import sys
-import json
-from typing import Optional
-from utils.data_handler import DataHandler
+from itertools import islice
+from typing import Any, Optional
+from utils.data_handler import BUFFER_SIZE, DataHandler, dumps, loads
 
 app = typer.Typer()
 
 
 @app.command("read")
-def read(file_name: str, format: str = "str", folder: Optional[str] = None):
-    """Read data from file."""
+def read(
+    file_name: str,
+    format: str = "str",
+    folder: Optional[str] = None,
+    limit: Optional[int] = None,
+):
+    """Read data from file.
+
+    ``str``, ``bytes`` and ``jsonl`` are streamed to stdout without loading
+    the whole file; ``jsonl`` prints one compact record per line. ``--limit``
+    stops after that many lines or records.
+    """
     handler = DataHandler(base_folder=folder)
-    data = handler.load(file_name, format=format)
-    print(data)
+    out = sys.stdout.buffer
+    if format == "str":
+        for line in islice(handler.iter_lines(file_name), limit):
+            out.write(line.encode())
+    elif format == "bytes":
+        for chunk in handler.iter_chunks(file_name):
+            out.write(chunk)
+    elif format == "jsonl":
+        for record in islice(handler.iter_jsonl(file_name), limit):
+            out.write(dumps(record) + b"\n")
+    elif format == "json":
+        out.write(dumps(handler.load(file_name, format="json"), indent=True) + b"\n")
+    else:
+        print(handler.load(file_name, format=format))
+    out.flush()
 
 
 @app.command("write")
@@ -22,10 +45,28 @@ def write(
     format: str = "str",
     folder: Optional[str] = None,
 ):
-    """Write data to file."""
+    """Write data to file.
+
+    Without ``--data``, stdin is copied in chunks (``str``, ``bytes``) or
+    line by line (``jsonl``), so large inputs are not held in memory.
+    ``json`` is a single document and is still parsed whole.
+    """
     handler = DataHandler(base_folder=folder)
-    content = data or sys.stdin.read()
+    content: Any
     if format == "json":
-        content = json.loads(content)
+        content = loads(data if data is not None else sys.stdin.buffer.read())
+    elif format == "jsonl":
+        lines = data.splitlines() if data is not None else sys.stdin.buffer
+        content = (loads(line) for line in lines if line.strip())
+    elif format == "bytes":
+        content = (
+            data.encode()
+            if data is not None
+            else iter(lambda: sys.stdin.buffer.read(BUFFER_SIZE), b"")
+        )
+    else:
+        content = (
+            data if data is not None else iter(lambda: sys.stdin.read(BUFFER_SIZE), "")
+        )
     handler.save(content, file_name, format=format)
     print(f"Saved to {file_name}")
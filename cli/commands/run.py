@@ -0,0 +1,125 @@
+import asyncio
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import IO, Optional
+import typer
+from llm.base import Model
+from llm.bulk import BulkRunner, ProviderLimits
+from llm.registry import resolve_llm
+from llm.results import ResultRecord, ResultStore, checkpoint_run_id
+from utils.data_handler import DataHandler, dumps
+
+
+def read_jsonl_prompts(handler: DataHandler, file_name: str) -> list[str]:
+    """Read the prompts of a JSONL file into a list.
+
+    Lines are decoded one at a time, but every prompt is kept: BulkRunner
+    queues the whole prompt set for each provider before it starts, and
+    bad records are rejected before any request is sent. Each record is
+    either a prompt string or an object whose ``prompt`` field holds one.
+    """
+    prompts = []
+    for number, record in enumerate(handler.iter_jsonl(file_name), 1):
+        prompt = record.get("prompt") if isinstance(record, dict) else record
+        if not isinstance(prompt, str):
+            raise typer.BadParameter(
+                f'record {number} is not a string or an object with a "prompt" '
+                f"string: {dumps(record).decode()[:80]}",
+                param_hint="PROMPTS_FILE",
+            )
+        prompts.append(prompt)
+    return prompts
+
+
+async def stream_results(
+    runner: BulkRunner,
+    prompts: dict | list,
+    out: IO[bytes],
+    store: ResultStore | None = None,
+    run_id: str = "",
+) -> int:
+    """Write each result as a JSON line as soon as it arrives; return failures."""
+    failed = 0
+    async for result in runner.arun(prompts):
+        out.write(dumps(asdict(result)) + b"\n")
+        out.flush()
+        if store is not None:
+            store.add(ResultRecord.from_bulk(result, run_id))
+        if result.error is not None:
+            failed += 1
+    return failed
+
+
+def run(
+    prompts_file: str,
+    provider: list[str] = typer.Option(
+        ..., "--provider", "-p", help='"name" or "name:model"; repeat for several'
+    ),
+    concurrency: int = 4,
+    rate_limit: Optional[float] = typer.Option(
+        None, help="Requests per minute per provider."
+    ),
+    resume: bool = typer.Option(
+        False, help="Skip prompts a previous run with this checkpoint finished."
+    ),
+    output: Optional[str] = typer.Option(
+        None, "--output", "-o", help="JSONL file in the data folder; stdout if unset."
+    ),
+    checkpoint: Optional[str] = None,
+    store: bool = typer.Option(False, help="Also record results in the ResultStore."),
+    folder: Optional[str] = None,
+):
+    """Run a JSON or JSONL prompt file against providers, streaming results.
+
+    JSONL lines are prompt strings or objects with a ``prompt`` field.
+    Results are written as JSON lines in completion order; progress goes to
+    stderr. Exits with status 1 if any request failed.
+    """
+    handler = DataHandler(base_folder=folder)
+    prompts: dict | list
+    if prompts_file.endswith(".jsonl"):
+        prompts = read_jsonl_prompts(handler, prompts_file)
+    else:
+        prompts = handler.load(prompts_file, format="json")
+    clients = []
+    models: dict[str, Model] = {}
+    for spec in provider:
+        client, model = resolve_llm(spec)
+        clients.append(client)
+        if model is not None:
+            models[client.name] = model
+    if checkpoint is None:
+        checkpoint = str(
+            Path("results") / f"{Path(prompts_file).stem}.checkpoint.jsonl"
+        )
+    if not resume:
+        (handler.folder_path / checkpoint).unlink(missing_ok=True)
+    limits = ProviderLimits(concurrency=concurrency, requests_per_minute=rate_limit)
+    runner = BulkRunner(
+        clients,
+        limits={client.name: limits for client in clients},
+        models=models,
+        checkpoint=checkpoint,
+        data_handler=handler,
+    )
+    results_store = ResultStore(data_handler=handler) if store else None
+    # A resumed run keeps the run id of the run it continues.
+    run_id = checkpoint_run_id(handler.folder_path / checkpoint)
+    out: IO[bytes] = sys.stdout.buffer
+    if output is not None:
+        path = handler.folder_path / output
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # A resumed run adds to the results the earlier run already wrote.
+        out = open(path, "ab" if resume else "wb")
+    try:
+        failed = asyncio.run(
+            stream_results(runner, prompts, out, results_store, run_id)
+        )
+    finally:
+        if output is not None:
+            out.close()
+        if results_store is not None:
+            results_store.close()
+    if failed:
+        raise typer.Exit(1)
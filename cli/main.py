@@ -1,8 +1,10 @@
 import typer
 from cli.commands.data import app
+from cli.commands.run import run
 
 cli = typer.Typer()
 cli.add_typer(app, name="data")
+cli.command("run")(run)
 
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,330 @@
+import base64
+import json
+import os
+import re
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+GEMINI_PATH = re.compile(r"^/v1beta/models/(?P<model>[^:]+):(?P<method>\w+)$")
+ELEVENLABS_PATH = re.compile(r"^/v1/text-to-speech/(?P<voice>[^/]+)/stream$")
+
+
+@dataclass
+class FakeConfig:
+    """Shape of every fake response; latency is added before each reply."""
+
+    latency: float = 0.0
+    payload_chars: int = 256
+    embedding_dim: int = 256
+    # Speech is streamed in this many chunks with chunk_interval between them.
+    audio_chunks: int = 4
+    chunk_interval: float = 0.0
+
+
+@dataclass
+class FakeStats:
+    requests: dict[str, int] = field(default_factory=dict)
+
+    def count(self, route: str) -> None:
+        self.requests[route] = self.requests.get(route, 0) + 1
+
+
+def structured_payload(payload_chars: int) -> dict[str, Any]:
+    """JSON object matching BenchmarkAnswer, padded to roughly payload_chars."""
+    point = "a point that needs to be parsed"
+    count = max(1, payload_chars // (len(point) + 4))
+    return {"title": "benchmark", "points": [point] * count, "score": 0.5}
+
+
+def fake_audio(text: str) -> bytes:
+    """The "audio" served for text, so tests can check what was synthesized."""
+    return f"[{text}]".encode()
+
+
+def _tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _vector(index: int, dim: int) -> list[float]:
+    return [((index + i) % 97) / 97 for i in range(dim)]
+
+
+class FakeProviderHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the OpenAI, Anthropic, Gemini, Voyage and
+    ElevenLabs HTTP APIs.
+
+    Only the fields the SDKs need to build their response objects are
+    returned. Structured requests (a JSON schema, a forced tool or a JSON
+    mime type) receive structured_payload; everything else plain text.
+    Speech endpoints stream fake_audio of the input in chunks.
+    """
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, every
+    # reply would wait for a delayed ACK and swamp the client overhead.
+    disable_nagle_algorithm = True
+    config: FakeConfig
+    stats: FakeStats
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, data: dict[str, Any], status: int = 200) -> None:
+        body = json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunks(self, chunks: list[bytes], content_type: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, chunk in enumerate(chunks):
+            if i and self.config.chunk_interval:
+                time.sleep(self.config.chunk_interval)
+            self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _audio_chunks(self, text: str) -> list[bytes]:
+        audio = fake_audio(text)
+        size = -(-len(audio) // max(1, self.config.audio_chunks))
+        return [audio[i : i + size] for i in range(0, len(audio), size)]
+
+    def _text(self) -> str:
+        return ("lorem ipsum " * (self.config.payload_chars // 12 + 1))[
+            : self.config.payload_chars
+        ]
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        path = self.path.split("?")[0]
+        if path == "/v1/responses":
+            self.stats.count("openai.responses")
+            self._send(self._openai_response(body))
+        elif path == "/v1/messages":
+            self.stats.count("anthropic.messages")
+            self._send(self._anthropic_message(body))
+        elif path == "/v1/embeddings":
+            self.stats.count("embeddings")
+            self._send(self._embeddings(body))
+        elif path == "/v1/audio/speech":
+            self.stats.count("openai.speech")
+            self._send_chunks(self._audio_chunks(body["input"]), "audio/mpeg")
+        elif ELEVENLABS_PATH.match(path):
+            self.stats.count("elevenlabs.stream")
+            self._send_chunks(self._audio_chunks(body["text"]), "audio/mpeg")
+        elif match := GEMINI_PATH.match(path):
+            method = match["method"]
+            self.stats.count(f"gemini.{method}")
+            if method == "generateContent":
+                self._send(self._gemini_content(body, match["model"]))
+            elif method == "batchEmbedContents":
+                self._send(self._gemini_embeddings(body))
+            elif method == "streamGenerateContent":
+                self._send_chunks(self._gemini_speech(body), "text/event-stream")
+            else:
+                self._send({"error": {"code": 404, "message": method}}, 404)
+        else:
+            self._send({"error": {"message": f"unknown path {path}"}}, 404)
+
+    def _openai_response(self, body: dict[str, Any]) -> dict[str, Any]:
+        fmt = body.get("text", {}).get("format", {})
+        text = (
+            json.dumps(structured_payload(self.config.payload_chars))
+            if fmt.get("type") == "json_schema"
+            else self._text()
+        )
+        return {
+            "id": "resp_fake",
+            "object": "response",
+            "created_at": 0,
+            "model": body["model"],
+            "status": "completed",
+            "output": [
+                {
+                    "id": "msg_fake",
+                    "type": "message",
+                    "role": "assistant",
+                    "status": "completed",
+                    "content": [
+                        {"type": "output_text", "text": text, "annotations": []}
+                    ],
+                }
+            ],
+            "parallel_tool_calls": True,
+            "tool_choice": "auto",
+            "tools": [],
+            "usage": {
+                "input_tokens": _tokens(json.dumps(body["input"])),
+                "input_tokens_details": {"cached_tokens": 0},
+                "output_tokens": _tokens(text),
+                "output_tokens_details": {"reasoning_tokens": 0},
+                "total_tokens": 0,
+            },
+        }
+
+    def _anthropic_message(self, body: dict[str, Any]) -> dict[str, Any]:
+        tool_choice = body.get("tool_choice")
+        if tool_choice and tool_choice.get("type") == "tool":
+            content = {
+                "type": "tool_use",
+                "id": "toolu_fake",
+                "name": tool_choice["name"],
+                "input": structured_payload(self.config.payload_chars),
+            }
+        else:
+            content = {"type": "text", "text": self._text()}
+        return {
+            "id": "msg_fake",
+            "type": "message",
+            "role": "assistant",
+            "model": body["model"],
+            "content": [content],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": _tokens(json.dumps(body["messages"])),
+                "output_tokens": _tokens(json.dumps(content)),
+                "cache_read_input_tokens": 0,
+                "cache_creation_input_tokens": 0,
+            },
+        }
+
+    def _gemini_content(self, body: dict[str, Any], model: str) -> dict[str, Any]:
+        config = body.get("generationConfig", {})
+        text = (
+            json.dumps(structured_payload(self.config.payload_chars))
+            if config.get("responseMimeType") == "application/json"
+            else self._text()
+        )
+        return {
+            "candidates": [
+                {
+                    "content": {"role": "model", "parts": [{"text": text}]},
+                    "finishReason": "STOP",
+                    "index": 0,
+                }
+            ],
+            "usageMetadata": {
+                "promptTokenCount": _tokens(json.dumps(body["contents"])),
+                "candidatesTokenCount": _tokens(text),
+                "totalTokenCount": 0,
+            },
+            "modelVersion": model,
+            "responseId": "gemini_fake",
+        }
+
+    def _gemini_speech(self, body: dict[str, Any]) -> list[bytes]:
+        text = "".join(part["text"] for part in body["contents"][0]["parts"])
+        events = []
+        for chunk in self._audio_chunks(text):
+            data = {
+                "candidates": [
+                    {
+                        "content": {
+                            "role": "model",
+                            "parts": [
+                                {
+                                    "inlineData": {
+                                        "mimeType": "audio/L16;codec=pcm;rate=24000",
+                                        "data": base64.b64encode(chunk).decode(),
+                                    }
+                                }
+                            ],
+                        },
+                        "index": 0,
+                    }
+                ]
+            }
+            events.append(f"data: {json.dumps(data)}\n\n".encode())
+        return events
+
+    def _embeddings(self, body: dict[str, Any]) -> dict[str, Any]:
+        inputs = body["input"]
+        inputs = [inputs] if isinstance(inputs, str) else inputs
+        dim = self.config.embedding_dim
+        data = []
+        for index in range(len(inputs)):
+            vector = _vector(index, dim)
+            embedding: list[float] | str = vector
+            if body.get("encoding_format") == "base64":
+                embedding = base64.b64encode(struct.pack(f"<{dim}f", *vector)).decode()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        tokens = sum(_tokens(text) for text in inputs)
+        return {
+            "object": "list",
+            "data": data,
+            "model": body["model"],
+            "usage": {"prompt_tokens": tokens, "total_tokens": tokens},
+        }
+
+    def _gemini_embeddings(self, body: dict[str, Any]) -> dict[str, Any]:
+        dim = self.config.embedding_dim
+        return {
+            "embeddings": [
+                {"values": _vector(index, dim)}
+                for index in range(len(body["requests"]))
+            ]
+        }
+
+
+class FakeProviderServer:
+    """Serve FakeProviderHandler on a free local port in a background thread.
+
+    ``environ()`` gives the variables that point every SDK at it; use the
+    server as a context manager so the variables are restored afterwards.
+    """
+
+    def __init__(self, config: FakeConfig | None = None) -> None:
+        self.config = config if config is not None else FakeConfig()
+        self.stats = FakeStats()
+        handler = type(
+            "Handler",
+            (FakeProviderHandler,),
+            {"config": self.config, "stats": self.stats},
+        )
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._saved: dict[str, str | None] = {}
+
+    def environ(self) -> dict[str, str]:
+        return {
+            "OPENAI_BASE_URL": f"{self.url}/v1",
+            "OPENAI_API_KEY": "test",
+            "ANTHROPIC_BASE_URL": self.url,
+            "ANTHROPIC_API_KEY": "test",
+            "GOOGLE_GEMINI_BASE_URL": self.url,
+            "GEMINI_API_KEY": "test",
+            "VOYAGE_BASE_URL": f"{self.url}/v1",
+            "VOYAGE_API_KEY": "test",
+            "XAI_API_KEY": "test",
+            "ELEVENLABS_BASE_URL": self.url,
+            "ELEVENLABS_API_KEY": "test",
+        }
+
+    def __enter__(self) -> "FakeProviderServer":
+        for key, value in self.environ().items():
+            self._saved[key] = os.environ.get(key)
+            os.environ[key] = value
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        for key, value in self._saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
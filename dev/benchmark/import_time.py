@@ -0,0 +1,45 @@
+import argparse
+import statistics
+import subprocess
+import sys
+
+TARGETS = {
+    "registry": "import llm.registry, nl_processor.embedding.registry",
+    "registry + anthropic": ("from llm.registry import get_llm; get_llm('anthropic')"),
+    "all llm clients (eager)": (
+        "import llm.anthropic.client, llm.gemini.client, "
+        "llm.grok.client, llm.openai.client"
+    ),
+    "all embedding clients (eager)": (
+        "import nl_processor.embedding.openai.client, "
+        "nl_processor.embedding.gemini.client, nl_processor.embedding.voyage.client"
+    ),
+    "main": "import main",
+}
+
+
+def measure(code: str, repeat: int) -> list[float]:
+    """Fresh-interpreter wall time for running ``code``, in seconds."""
+    timings = []
+    for _ in range(repeat):
+        script = (
+            "import time; start = time.perf_counter(); "
+            f"{code}; print(time.perf_counter() - start)"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", script], capture_output=True, text=True, check=True
+        )
+        timings.append(float(output.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import/startup time benchmark")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for name, code in TARGETS.items():
+        timings = measure(code, args.repeat)
+        print(
+            f"{name:<32} median={statistics.median(timings) * 1000:7.1f}ms "
+            f"min={min(timings) * 1000:7.1f}ms"
+        )
@@ -0,0 +1,357 @@
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from typing import Any
+from pydantic import BaseModel
+from dev.benchmark.fake_servers import (
+    FakeConfig,
+    FakeProviderServer,
+    structured_payload,
+)
+from llm.base import BaseLLM, Message
+from llm.structured import compile_schema
+from utils.data_handler import DataHandler
+
+HTTP_LLMS = ("openai", "anthropic", "gemini")
+HTTP_EMBEDDINGS = ("openai", "gemini", "voyage")
+TTS_PROVIDERS = ("openai", "elevenlabs", "google")
+
+
+class BenchmarkAnswer(BaseModel):
+    title: str
+    points: list[str]
+    score: float
+
+
+@dataclass
+class SuiteConfig:
+    repeat: int = 30
+    latency: float = 0.0
+    payload_chars: int = 2048
+    conversation_turns: int = 50
+    embedding_texts: int = 2000
+    embedding_dim: int = 256
+    spacy_model: str = "en_core_web_sm"
+    data_records: int = 20_000
+    tts_sentences: int = 12
+
+
+@dataclass
+class Measurement:
+    value: float
+    unit: str
+    higher_is_better: bool = False
+
+
+Results = dict[str, Measurement]
+
+
+def timings(fn: Callable[[], Any], repeat: int, warmup: int = 2) -> list[float]:
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def conversation(turns: int) -> list[Message]:
+    messages = [Message(role="system", content="You are a benchmark assistant.")]
+    for i in range(turns):
+        content = f"turn {i} " + "words " * 40
+        if i % 2 == 0:
+            messages.append(Message(role="user", content=content))
+        else:
+            messages.append(Message(role="assistant", content=content))
+    return messages
+
+
+def llm_client(name: str) -> BaseLLM:
+    # Constructed here rather than through the registry so each run picks up
+    # the fake server's environment instead of a cached instance.
+    if name == "openai":
+        from llm.openai.client import OpenAILLM
+
+        return OpenAILLM()
+    if name == "anthropic":
+        from llm.anthropic.client import AnthropicLLM
+
+        return AnthropicLLM()
+    if name == "gemini":
+        from llm.gemini.client import GeminiLLM
+
+        return GeminiLLM()
+    from llm.grok.client import GrokLLM
+
+    return GrokLLM()
+
+
+def embedding_client(name: str):
+    if name == "openai":
+        from nl_processor.embedding.openai.client import OpenAIEmbedding
+
+        return OpenAIEmbedding()
+    if name == "gemini":
+        from nl_processor.embedding.gemini.client import GeminiEmbedding
+
+        return GeminiEmbedding()
+    from nl_processor.embedding.voyage.client import VoyageEmbedding
+
+    return VoyageEmbedding()
+
+
+def tts_client(name: str):
+    if name == "openai":
+        from tts.openai.client import OpenAITTS
+
+        return OpenAITTS()
+    if name == "elevenlabs":
+        from tts.elevenlabs.client import ElevenLabsTTS
+
+        return ElevenLabsTTS()
+    from tts.google.client import GoogleTTS
+
+    return GoogleTTS()
+
+
+def bench_client(config: SuiteConfig) -> Results:
+    """Per-call time spent in our wrapper and the SDK, fake latency removed."""
+    results: Results = {}
+    messages = conversation(4)
+    for name in HTTP_LLMS:
+        client = llm_client(name)
+        single = timings(lambda: client.single_response(messages), config.repeat)
+        structured = timings(
+            lambda: client.structured_response(messages, BenchmarkAnswer),
+            config.repeat,
+        )
+        overhead = statistics.median(single) - config.latency
+        results[f"client.{name}.single_ms"] = Measurement(overhead * 1000, "ms")
+        overhead = statistics.median(structured) - config.latency
+        results[f"client.{name}.structured_ms"] = Measurement(overhead * 1000, "ms")
+    return results
+
+
+def bench_convert(config: SuiteConfig) -> Results:
+    """Cost of turning a long conversation into each provider's request shape."""
+    results: Results = {}
+    messages = conversation(config.conversation_turns)
+    repeat = config.repeat * 10
+    for name in (*HTTP_LLMS, "grok"):
+        client: Any = llm_client(name)
+        if name == "grok":
+
+            def convert() -> None:
+                chat = client.client.chat.create(model=client.default_model)
+                client._append_messages_to_chat(chat, messages)
+
+        else:
+
+            def convert() -> None:
+                client._convert_messages(messages)
+
+        samples = timings(convert, repeat)
+        results[f"convert.{name}_us"] = Measurement(
+            statistics.median(samples) * 1e6, "us"
+        )
+    return results
+
+
+def bench_parse(config: SuiteConfig) -> Results:
+    """Structured output parsing of a payload_chars-sized JSON response."""
+    text = json.dumps(structured_payload(config.payload_chars))
+    compiled = compile_schema(BenchmarkAnswer)
+    samples = timings(lambda: compiled.parse(text), config.repeat * 10)
+    return {"parse.structured_us": Measurement(statistics.median(samples) * 1e6, "us")}
+
+
+def bench_embedding(config: SuiteConfig) -> Results:
+    results: Results = {}
+    texts = [f"text number {i} " + "token " * 20 for i in range(config.embedding_texts)]
+    for name in HTTP_EMBEDDINGS:
+        client = embedding_client(name)
+        samples = timings(lambda: client.embed(texts), max(3, config.repeat // 10), 1)
+        results[f"embedding.{name}.texts_per_s"] = Measurement(
+            len(texts) / statistics.median(samples), "texts/s", higher_is_better=True
+        )
+    return results
+
+
+def bench_tts(config: SuiteConfig) -> Results:
+    """Time to first audio and total time for a multi-sentence script."""
+    results: Results = {}
+    text = " ".join(
+        f"Sentence {i} of the benchmark script, long enough to be its own segment."
+        for i in range(config.tts_sentences)
+    )
+    repeat = max(3, config.repeat // 5)
+    for name in TTS_PROVIDERS:
+        client = tts_client(name)
+        metrics = []
+        for _ in range(repeat + 1):
+            metrics.append(client.generate_audio(text).metrics)
+        first = [m.time_to_first_audio for m in metrics[1:] if m is not None]
+        total = [m.total_time for m in metrics[1:] if m is not None]
+        results[f"tts.{name}.first_audio_ms"] = Measurement(
+            statistics.median(first) * 1000, "ms"
+        )
+        results[f"tts.{name}.total_ms"] = Measurement(
+            statistics.median(total) * 1000, "ms"
+        )
+    return results
+
+
+def bench_info_density(config: SuiteConfig) -> Results:
+    from nl_processor.analyzer.info_density import InfoDensityAnalyzer
+
+    analyzer = InfoDensityAnalyzer(model_name=config.spacy_model)
+    try:
+        analyzer.nlp
+    except OSError:
+        print(f"skip info_density: spaCy model {config.spacy_model} not installed")
+        return {}
+    texts = [
+        "The quick brown fox that the farmer chased jumps over the lazy dog "
+        "sleeping near the old barn." * 3
+    ] * 200
+    start = time.perf_counter()
+    tokens = sum(len(depths.depths) for depths in analyzer.iter_batch_depths(texts))
+    elapsed = time.perf_counter() - start
+    return {
+        "info_density.tokens_per_s": Measurement(
+            tokens / elapsed, "tokens/s", higher_is_better=True
+        )
+    }
+
+
+def bench_data_handler(config: SuiteConfig) -> Results:
+    records = [
+        {"id": i, "prompt": f"prompt {i}", "response": "answer " * 30}
+        for i in range(config.data_records)
+    ]
+    lines = "".join(json.dumps(record) + "\n" for record in records)
+    repeat = max(3, config.repeat // 5)
+    with tempfile.TemporaryDirectory() as temp_dir:
+        handler = DataHandler(temp_dir)
+        save = timings(lambda: handler.save(records, "bench.json", "json"), repeat)
+        load = timings(lambda: handler.load("bench.json", "json"), repeat)
+        handler.save(lines, "bench.jsonl")
+        scan = timings(
+            lambda: sum(1 for _ in handler.iter_lines("bench.jsonl")), repeat
+        )
+        stream = timings(
+            lambda: sum(1 for _ in handler.iter_jsonl("bench.jsonl")), repeat
+        )
+    megabytes = len(lines.encode()) / 1e6
+    return {
+        "data_handler.save_json_ms": Measurement(statistics.median(save) * 1000, "ms"),
+        "data_handler.load_json_ms": Measurement(statistics.median(load) * 1000, "ms"),
+        "data_handler.iter_lines_mb_per_s": Measurement(
+            megabytes / statistics.median(scan), "MB/s", higher_is_better=True
+        ),
+        "data_handler.iter_jsonl_records_per_s": Measurement(
+            len(records) / statistics.median(stream),
+            "records/s",
+            higher_is_better=True,
+        ),
+    }
+
+
+BENCHMARKS: dict[str, Callable[[SuiteConfig], Results]] = {
+    "client": bench_client,
+    "convert": bench_convert,
+    "parse": bench_parse,
+    "embedding": bench_embedding,
+    "tts": bench_tts,
+    "info_density": bench_info_density,
+    "data_handler": bench_data_handler,
+}
+
+
+def run_suite(config: SuiteConfig, only: list[str] | None = None) -> dict[str, Any]:
+    """Run the selected benchmarks against a local fake provider server."""
+    results: Results = {}
+    fake = FakeConfig(
+        latency=config.latency,
+        payload_chars=config.payload_chars,
+        embedding_dim=config.embedding_dim,
+    )
+    with FakeProviderServer(fake):
+        for name, benchmark in BENCHMARKS.items():
+            if only and name not in only:
+                continue
+            results.update(benchmark(config))
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "created_at": time.time(),
+        },
+        "config": asdict(config),
+        "results": {name: asdict(measurement) for name, measurement in results.items()},
+    }
+
+
+def compare(
+    current: dict[str, Any], baseline: dict[str, Any], tolerance: float
+) -> list[str]:
+    """Describe every result that is worse than the baseline by more than tolerance."""
+    regressions = []
+    for name, base in baseline["results"].items():
+        now = current["results"].get(name)
+        if now is None or base["value"] <= 0:
+            continue
+        change = now["value"] / base["value"] - 1
+        if base["higher_is_better"]:
+            change = -change
+        if change > tolerance:
+            regressions.append(
+                f"{name}: {base['value']:.3f} -> {now['value']:.3f} {now['unit']} "
+                f"({change:+.0%} worse)"
+            )
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline performance suite")
+    parser.add_argument("--only", help=f"comma separated: {', '.join(BENCHMARKS)}")
+    parser.add_argument("--repeat", type=int, default=SuiteConfig.repeat)
+    parser.add_argument("--latency", type=float, default=SuiteConfig.latency)
+    parser.add_argument("--payload-chars", type=int, default=SuiteConfig.payload_chars)
+    parser.add_argument("--output", default="benchmarks/latest.json")
+    parser.add_argument("--baseline", default="benchmarks/baseline.json")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument(
+        "--save-baseline", action="store_true", help="store this run as the baseline"
+    )
+    args = parser.parse_args()
+
+    config = SuiteConfig(
+        repeat=args.repeat, latency=args.latency, payload_chars=args.payload_chars
+    )
+    report = run_suite(config, args.only.split(",") if args.only else None)
+    for name, measurement in report["results"].items():
+        print(f"{name:<40} {measurement['value']:12.3f} {measurement['unit']}")
+
+    data_handler = DataHandler()
+    data_handler.save(report, args.output, format="json")
+    if args.save_baseline:
+        data_handler.save(report, args.baseline, format="json")
+        sys.exit(0)
+    try:
+        baseline = data_handler.load(args.baseline, format="json")
+    except FileNotFoundError:
+        print(f"no baseline at {args.baseline}; run with --save-baseline first")
+        sys.exit(0)
+    regressions = compare(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    sys.exit(1 if regressions else 0)
@@ -0,0 +1,56 @@
+import argparse
+import time
+import numpy as np
+from nl_processor.embedding.index import FlatIndex, IVFIndex, SearchResult
+
+
+def clustered_vectors(
+    n: int, dim: int, n_clusters: int, rng: np.random.Generator
+) -> np.ndarray:
+    """Synthetic embeddings with cluster structure, closer to real data than noise."""
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n)
+    noise = rng.standard_normal((n, dim)).astype(np.float32)
+    return centers[labels] + 0.5 * noise
+
+
+def recall_at_k(approx: SearchResult, exact: SearchResult) -> float:
+    hits = sum(len(np.intersect1d(a, e)) for a, e in zip(approx.indices, exact.indices))
+    return hits / exact.indices.size
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+def main(n: int, dim: int, n_queries: int, k: int, n_lists: int) -> None:
+    rng = np.random.default_rng(0)
+    corpus = clustered_vectors(n, dim, 64, rng)
+    queries = clustered_vectors(n_queries, dim, 64, rng)
+
+    flat = FlatIndex()
+    _, build = timed(lambda: flat.add(corpus))
+    exact, elapsed = timed(lambda: flat.search(queries, k))
+    print(f"flat  build={build:.2f}s qps={n_queries / elapsed:,.0f} recall=1.000")
+
+    ivf = IVFIndex(n_lists=n_lists)
+    _, build = timed(lambda: ivf.add(corpus))
+    for n_probe in (1, 4, 8, 16, 32):
+        approx, elapsed = timed(lambda: ivf.search(queries, k, n_probe=n_probe))
+        print(
+            f"ivf   build={build:.2f}s n_probe={n_probe:<3} "
+            f"qps={n_queries / elapsed:,.0f} recall={recall_at_k(approx, exact):.3f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector index recall/QPS benchmark")
+    parser.add_argument("--n", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=256)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--lists", type=int, default=256)
+    args = parser.parse_args()
+    main(args.n, args.dim, args.queries, args.k, args.lists)
@@ -0,0 +1,45 @@
+from llm.batch import BatchRunner
+from llm.registry import resolve_llm
+from utils.data_handler import DataHandler
+from utils.env import load_env
+import os
+import sys
+
+load_env()
+
+
+data_handler = DataHandler()
+# "name" or "name:model"; batch APIs exist for anthropic, gemini and openai.
+PROVIDER = "anthropic"
+PROMPTS_FOLDER = "prompts"
+PROMPTS_FILE = "lang_explanation.json"
+RESULTS_FOLDER = "results"
+POLL_INTERVAL = 60.0
+
+
+def main() -> None:
+    client, model = resolve_llm(PROVIDER)
+    runner = BatchRunner(client, data_handler=data_handler)
+    # Rerunning with the same job name resumes polling the submitted job.
+    job_name = f"{PROMPTS_FILE.split('.')[0]}_{client.name}"
+    prompts = data_handler.load(
+        os.path.join(PROMPTS_FOLDER, PROMPTS_FILE), format="json"
+    )
+    job = runner.submit(job_name, prompts, model)
+    print(f"Batch {job.job_id} ({len(job.prompts)} prompts): {job.status}")
+    job = runner.wait(job_name, interval=POLL_INTERVAL)
+    if job.status != "completed":
+        sys.exit(f"Batch {job.job_id} ended as {job.status}")
+    results = runner.collect(job_name)
+    for result in results:
+        if result.error is not None:
+            print(f"{result.provider} #{result.prompt_id}: {result.error}")
+    data_handler.save(
+        {result.prompt_id: result.content for result in results},
+        os.path.join(RESULTS_FOLDER, f"{job_name}.json"),
+        format="json",
+    )
+
+
+if __name__ == "__main__":
+    main()
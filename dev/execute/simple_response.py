@@ -1,41 +1,62 @@
-from dotenv import load_dotenv
-import llm.anthropic.client
-import llm.gemini.client
-import llm.grok.client
-import llm.openai.client
-from llm.base import Message
+from llm.base import Model
+from llm.bulk import BulkRunner, ProviderLimits
+from llm.registry import resolve_llm
+from llm.results import ResultRecord, ResultStore, checkpoint_run_id
 from utils.data_handler import DataHandler
-from utils.date import get_current_time_str
+from utils.env import load_env
+import asyncio
 import os
 
-load_dotenv()
+load_env()
 
 
 data_handler = DataHandler()
-llm_clients = [
-    llm.anthropic.client.AnthropicLLM(),
-    llm.gemini.client.GeminiLLM(),
-    llm.grok.client.GrokLLM(),
-    llm.openai.client.OpenAILLM(),
-]
-ACTIVE_LLM_CLIENTS = llm_clients[:1]
+# Provider specs: "name" or "name:model"; only these SDKs are imported.
+ACTIVE_PROVIDERS = ["anthropic"]
 PROMPTS_FOLDER = "prompts"
 PROMPTS_FILE = "lang_explanation.json"
 RESULTS_FOLDER = "results"
+PROVIDER_LIMITS = {
+    "anthropic": ProviderLimits(concurrency=8, requests_per_minute=50),
+    "gemini": ProviderLimits(concurrency=8, requests_per_minute=60),
+    "grok": ProviderLimits(concurrency=8, requests_per_minute=60),
+    "openai": ProviderLimits(concurrency=8, requests_per_minute=60),
+}
+
+
+async def run(prompts: dict) -> None:
+    clients = []
+    models: dict[str, Model] = {}
+    for spec in ACTIVE_PROVIDERS:
+        client, model = resolve_llm(spec)
+        clients.append(client)
+        if model is not None:
+            models[client.name] = model
+    checkpoint = os.path.join(
+        RESULTS_FOLDER, f"{PROMPTS_FILE.split('.')[0]}.checkpoint.jsonl"
+    )
+    runner = BulkRunner(
+        clients,
+        limits=PROVIDER_LIMITS,
+        models=models,
+        checkpoint=checkpoint,
+        data_handler=data_handler,
+    )
+    store = ResultStore(os.path.join(RESULTS_FOLDER, "results.sqlite"), data_handler)
+    # Rerunning continues the checkpoint, so it also continues its run id.
+    run_id = checkpoint_run_id(data_handler.folder_path / checkpoint)
+    print(f"Run {run_id}")
+    try:
+        async for result in runner.arun(prompts):
+            if result.error is not None:
+                print(f"{result.provider} #{result.prompt_id}: {result.error}")
+            store.add(ResultRecord.from_bulk(result, run_id, prompts=PROMPTS_FILE))
+    finally:
+        store.close()
+
 
 if __name__ == "__main__":
     prompts = data_handler.load(
         os.path.join(PROMPTS_FOLDER, PROMPTS_FILE), format="json"
     )
-
-    for client in ACTIVE_LLM_CLIENTS:
-        for prompt in prompts["contents"]:
-            response = client.single_response([Message(role="user", content=prompt)])
-            data_handler.save(
-                response.content,
-                os.path.join(
-                    RESULTS_FOLDER,
-                    f"{PROMPTS_FILE.split('.')[0]}_{client.name}_{get_current_time_str()}.json",
-                ),
-                format="json",
-            )
+    asyncio.run(run(prompts))
@@ -0,0 +1,45 @@
+from collections.abc import Iterator
+from typing import Any
+from llm.anthropic.client import AnthropicLLM
+from llm.base import Message, Model
+from llm.batch import BatchBackend, BatchItem, BatchStatus
+
+
+class AnthropicBatch(BatchBackend):
+    """Message Batches API; requests carry the same params as messages.create."""
+
+    client: AnthropicLLM
+
+    def serialize(
+        self, requests: list[tuple[str, list[Message]]], model: Model | None
+    ) -> list[dict[str, Any]]:
+        return [
+            {
+                "custom_id": custom_id,
+                "params": self.client._single_request(messages, model),
+            }
+            for custom_id, messages in requests
+        ]
+
+    def submit(self, payload: list[dict[str, Any]], model: Model | None) -> str:
+        return self.client.client.messages.batches.create(requests=payload).id  # type: ignore[arg-type]
+
+    def status(self, job_id: str) -> BatchStatus:
+        batch = self.client.client.messages.batches.retrieve(job_id)
+        # Per-request failures and expiries are reported by results().
+        return "completed" if batch.processing_status == "ended" else "running"
+
+    def results(self, job_id: str, custom_ids: list[str]) -> Iterator[BatchItem]:
+        for entry in self.client.client.messages.batches.results(job_id):
+            result = entry.result
+            if result.type == "succeeded":
+                content = "".join(
+                    block.text
+                    for block in result.message.content
+                    if block.type == "text"
+                )
+                yield BatchItem(entry.custom_id, content=content)
+            elif result.type == "errored":
+                yield BatchItem(entry.custom_id, error=result.error.error.message)
+            else:
+                yield BatchItem(entry.custom_id, error=result.type)
@@ -1,62 +1,276 @@
 import anthropic
 import os
-from dotenv import load_dotenv
-from llm.base import BaseLLM, Message, LLMResponse, Model, T
+from collections.abc import AsyncIterator, Iterator
+from typing import Any
+from utils.env import load_env
+from utils.http import get_pool
+from llm.base import (
+    BaseLLM,
+    Message,
+    LLMResponse,
+    Model,
+    StreamTimer,
+    T,
+    TokenUsage,
+    call_timeout,
+    split_system,
+)
+from llm.structured import CompiledSchema, PartialJSONParser, compile_schema
 
-load_dotenv()
+load_env()
+
+
+CACHE_CONTROL = {"type": "ephemeral"}
 
 
 class AnthropicLLM(BaseLLM):
-    def __init__(self):
-        self.client = anthropic.Anthropic(api_key=os.getenv("ANTHROPIC_API_KEY"))
+    def __init__(self, prompt_cache: bool = True):
+        pool = get_pool("anthropic")
+        self.client = anthropic.Anthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"), http_client=pool.client()
+        )
+        self.async_client = anthropic.AsyncAnthropic(
+            api_key=os.getenv("ANTHROPIC_API_KEY"), http_client=pool.async_client()
+        )
         self.default_model = "claude-sonnet-4-5"
         self.name = "anthropic"
+        self.tools = [
+            {"type": "web_search_20250305", "name": "web_search", "max_uses": 5}
+        ]
+        # Mark the system prompt and conversation history as cacheable prefixes.
+        self.prompt_cache = prompt_cache
 
     def _initialize_model(self, model: Model | None) -> str:
         return model.name if model else self.default_model
 
     def _convert_messages(self, messages: list[Message]) -> list[dict]:
-        return [
-            {"role": message.role, "content": message.content} for message in messages
+        """Convert non-system messages; system ones go through _system_blocks."""
+        converted: list[dict] = [
+            {"role": message.role, "content": message.content}
+            for message in messages
+            if message.role != "system"
         ]
+        if self.prompt_cache and len(converted) > 1:
+            # Cache everything before the newest turn so follow-ups reuse it.
+            history = converted[-2]
+            history["content"] = [
+                {
+                    "type": "text",
+                    "text": history["content"],
+                    "cache_control": CACHE_CONTROL,
+                }
+            ]
+        return converted
+
+    def _system_blocks(self, messages: list[Message]) -> list[dict]:
+        system, _ = split_system(messages)
+        blocks: list[dict] = [{"type": "text", "text": text} for text in system]
+        if self.prompt_cache and blocks:
+            # Tools precede the system prompt, so this breakpoint covers both.
+            blocks[-1]["cache_control"] = CACHE_CONTROL
+        return blocks
+
+    def _base_request(
+        self, messages: list[Message], model: Model | None
+    ) -> dict[str, Any]:
+        request: dict[str, Any] = {
+            "model": self._initialize_model(model),
+            "max_tokens": 1024,
+            "messages": self._convert_messages(messages),
+        }
+        if system := self._system_blocks(messages):
+            request["system"] = system
+        if (timeout := call_timeout()) is not None:
+            request["timeout"] = timeout
+        return request
+
+    def _usage(self, usage: Any) -> TokenUsage:
+        # input_tokens excludes cached tokens here; fold them back in.
+        read = usage.cache_read_input_tokens or 0
+        write = usage.cache_creation_input_tokens or 0
+        return TokenUsage(
+            input_tokens=usage.input_tokens + read + write,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=read,
+            cache_write_tokens=write,
+        )
+
+    def _single_request(
+        self, messages: list[Message], model: Model | None
+    ) -> dict[str, Any]:
+        return {**self._base_request(messages, model), "tools": self.tools}
+
+    def _structured_request(
+        self, messages: list[Message], compiled: CompiledSchema, model: Model | None
+    ) -> dict[str, Any]:
+        formatter = compiled.payload(
+            "anthropic",
+            lambda: {
+                "name": "output_formatter",
+                "description": "Format the response according to the schema",
+                "input_schema": compiled.json_schema,
+            },
+        )
+        return {
+            **self._base_request(messages, model),
+            "tools": [formatter, *self.tools],
+            "tool_choice": {"type": "tool", "name": "output_formatter"},
+        }
+
+    def _parse_structured(self, response: Any, compiled: CompiledSchema[T]) -> T:
+        for content in response.content:
+            if content.type == "tool_use" and content.name == "output_formatter":
+                return compiled.validate(content.input)
+        raise ValueError("Tool response not found in Claude response")
+
+    def _structured_result(
+        self, response: Any, compiled: CompiledSchema[T]
+    ) -> tuple[T, LLMResponse]:
+        result = self._parse_structured(response, compiled)
+        return result, LLMResponse(
+            content=result.model_dump_json(),
+            usage=self._usage(response.usage),
+            request_id=response.id,
+        )
+
+    def _formatter_delta(self, event: Any, index: int | None) -> tuple[int | None, str]:
+        """Track the output_formatter block and return its partial JSON, if any."""
+        if event.type == "content_block_start":
+            block = event.content_block
+            if block.type == "tool_use" and block.name == "output_formatter":
+                return event.index, ""
+        elif (
+            event.type == "content_block_delta"
+            and event.index == index
+            and event.delta.type == "input_json_delta"
+        ):
+            return index, event.delta.partial_json
+        return index, ""
 
     def single_response(
         self, messages: list[Message], model: Model | None = None
     ) -> LLMResponse:
-        model_name = self._initialize_model(model)
-        anthropic_messages = self._convert_messages(messages)
-        response = self.client.messages.create(
-            model=model_name,
-            max_tokens=1024,
-            messages=anthropic_messages,
-            tools=[
-                {"type": "web_search_20250305", "name": "web_search", "max_uses": 5}
-            ],
+        response = self.client.messages.create(**self._single_request(messages, model))
+        return LLMResponse(
+            content=response.content[0].text,
+            usage=self._usage(response.usage),
+            request_id=response.id,
         )
-        return LLMResponse(content=response.content[0].text)
 
     def structured_response(
         self, messages: list[Message], schema: type[T], model: Model | None = None
     ) -> T:
-        model_name = self._initialize_model(model)
-        anthropic_messages = self._convert_messages(messages)
-        json_schema = schema.model_json_schema()
-        tools = [
-            {
-                "name": "output_formatter",
-                "description": "Format the response according to the schema",
-                "input_schema": json_schema,
-            },
-            {"type": "web_search_20250305", "name": "web_search", "max_uses": 5},
-        ]
+        return self._structured_call(messages, schema, model)[0]
+
+    def _structured_call(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        compiled = compile_schema(schema)
         response = self.client.messages.create(
-            model=model_name,
-            max_tokens=1024,
-            tools=tools,
-            tool_choice={"type": "tool", "name": "output_formatter"},
-            messages=anthropic_messages,
+            **self._structured_request(messages, compiled, model)
         )
-        for content in response.content:
-            if content.type == "tool_use" and content.name == "output_formatter":
-                return schema(**content.input)
-        raise ValueError("Tool response not found in Claude response")
+        return self._structured_result(response, compiled)
+
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        response = await self.async_client.messages.create(
+            **self._single_request(messages, model)
+        )
+        return LLMResponse(
+            content=response.content[0].text,
+            usage=self._usage(response.usage),
+            request_id=response.id,
+        )
+
+    async def astructured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        return (await self._astructured_call(messages, schema, model))[0]
+
+    async def _astructured_call(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        compiled = compile_schema(schema)
+        response = await self.async_client.messages.create(
+            **self._structured_request(messages, compiled, model)
+        )
+        return self._structured_result(response, compiled)
+
+    def stream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> Iterator[str | LLMResponse]:
+        timer = StreamTimer()
+        deltas = []
+        with self.client.messages.stream(
+            **self._single_request(messages, model)
+        ) as stream:
+            for text in stream.text_stream:
+                timer.mark()
+                deltas.append(text)
+                yield text
+            final = stream.get_final_message()
+        content = "".join(deltas)
+        yield LLMResponse(
+            content=content,
+            metrics=timer.finish(content, final.usage.output_tokens),
+            usage=self._usage(final.usage),
+            request_id=final.id,
+        )
+
+    async def astream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> AsyncIterator[str | LLMResponse]:
+        timer = StreamTimer()
+        deltas = []
+        async with self.async_client.messages.stream(
+            **self._single_request(messages, model)
+        ) as stream:
+            async for text in stream.text_stream:
+                timer.mark()
+                deltas.append(text)
+                yield text
+            final = await stream.get_final_message()
+        content = "".join(deltas)
+        yield LLMResponse(
+            content=content,
+            metrics=timer.finish(content, final.usage.output_tokens),
+            usage=self._usage(final.usage),
+            request_id=final.id,
+        )
+
+    def _stream_structured(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> Iterator[dict[str, Any] | T | LLMResponse]:
+        compiled = compile_schema(schema)
+        parser = PartialJSONParser()
+        index = None
+        with self.client.messages.stream(
+            **self._structured_request(messages, compiled, model)
+        ) as stream:
+            for event in stream:
+                index, delta = self._formatter_delta(event, index)
+                if delta and (partial := parser.feed(delta)) is not None:
+                    yield partial
+            final = stream.get_final_message()
+        result, response = self._structured_result(final, compiled)
+        yield response
+        yield result
+
+    async def _astream_structured(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> AsyncIterator[dict[str, Any] | T | LLMResponse]:
+        compiled = compile_schema(schema)
+        parser = PartialJSONParser()
+        index = None
+        async with self.async_client.messages.stream(
+            **self._structured_request(messages, compiled, model)
+        ) as stream:
+            async for event in stream:
+                index, delta = self._formatter_delta(event, index)
+                if delta and (partial := parser.feed(delta)) is not None:
+                    yield partial
+            final = await stream.get_final_message()
+        result, response = self._structured_result(final, compiled)
+        yield response
+        yield result
@@ -1,7 +1,15 @@
+import asyncio
+import hashlib
+import json
+import time
 from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
 from dataclasses import dataclass
-from typing import Literal, TypeVar, Type
+from typing import Any, Literal, TypeVar, Type
 from pydantic import BaseModel
+from utils.tokens import TokenUsage, estimate_tokens
 
 T = TypeVar("T", bound=BaseModel)
 
@@ -17,13 +25,88 @@ class Model:
     name: str
 
 
+@dataclass
+class StreamMetrics:
+    time_to_first_token: float
+    total_time: float
+    output_tokens: int
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Generation rate after the first token arrived."""
+        generation_time = self.total_time - self.time_to_first_token
+        return self.output_tokens / generation_time if generation_time > 0 else 0.0
+
+
 @dataclass
 class LLMResponse:
     content: str
+    metrics: StreamMetrics | None = None
+    usage: TokenUsage | None = None
+    # Provider-side response id, for matching calls against provider logs.
+    request_id: str | None = None
+
+
+def split_system(messages: list[Message]) -> tuple[list[str], list[Message]]:
+    """Separate system messages (the shared prompt prefix) from the conversation."""
+    system = [message.content for message in messages if message.role == "system"]
+    return system, [message for message in messages if message.role != "system"]
+
+
+def prefix_key(system: list[str], model_name: str = "") -> str:
+    """Stable id for a system prefix, used to route or look up cached prefixes."""
+    encoded = json.dumps([model_name, system], ensure_ascii=False).encode()
+    return hashlib.sha256(encoded).hexdigest()[:32]
+
+
+_call_timeout: ContextVar[float | None] = ContextVar("call_timeout", default=None)
+
+
+def call_timeout() -> float | None:
+    """Seconds the current call may take, if a caller set a limit.
+
+    Providers pass it to their SDK as the request timeout, so a call the
+    caller has given up on does not keep running in the background.
+    """
+    return _call_timeout.get()
+
+
+@contextmanager
+def timeout_scope(seconds: float | None) -> Iterator[None]:
+    """Limit SDK requests started in this context to ``seconds``."""
+    token = _call_timeout.set(seconds)
+    try:
+        yield
+    finally:
+        _call_timeout.reset(token)
+
+
+class StreamTimer:
+    """Collect time-to-first-token and throughput for one streamed response."""
+
+    def __init__(self) -> None:
+        self.start = time.perf_counter()
+        self.first_token: float | None = None
+
+    def mark(self) -> None:
+        if self.first_token is None:
+            self.first_token = time.perf_counter()
+
+    def finish(self, content: str, output_tokens: int | None = None) -> StreamMetrics:
+        end = time.perf_counter()
+        first_token = self.first_token if self.first_token is not None else end
+        return StreamMetrics(
+            time_to_first_token=first_token - self.start,
+            total_time=end - self.start,
+            output_tokens=output_tokens or estimate_tokens(content),
+        )
 
 
 class BaseLLM(ABC):
     name: str
+    default_model: str
+    # Provider-side tools attached to every request; part of the cache key.
+    tools: list[dict]
 
     @abstractmethod
     def single_response(
@@ -36,3 +119,102 @@ class BaseLLM(ABC):
         self, messages: list[Message], schema: Type[T], model: Model | None = None
     ) -> T:
         pass
+
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        """Async counterpart of single_response.
+
+        Falls back to running the blocking call in a worker thread; providers
+        with an async SDK override this with a native implementation.
+        """
+        return await asyncio.to_thread(self.single_response, messages, model)
+
+    async def astructured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        """Async counterpart of structured_response."""
+        return (await self._astructured_call(messages, schema, model))[0]
+
+    def stream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> Iterator[str | LLMResponse]:
+        """Yield text deltas as they arrive, then the final LLMResponse.
+
+        The final response carries StreamMetrics. Providers without native
+        streaming fall back to one delta holding the whole completion.
+        """
+        timer = StreamTimer()
+        response = self.single_response(messages, model)
+        timer.mark()
+        yield response.content
+        yield LLMResponse(
+            content=response.content,
+            metrics=timer.finish(response.content),
+            usage=response.usage,
+            request_id=response.request_id,
+        )
+
+    async def astream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> AsyncIterator[str | LLMResponse]:
+        """Async counterpart of stream_response."""
+        timer = StreamTimer()
+        response = await self.asingle_response(messages, model)
+        timer.mark()
+        yield response.content
+        yield LLMResponse(
+            content=response.content,
+            metrics=timer.finish(response.content),
+            usage=response.usage,
+            request_id=response.request_id,
+        )
+
+    def stream_structured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> Iterator[dict[str, Any] | T]:
+        """Yield partial objects (plain dicts) as JSON arrives, then the parsed T.
+
+        Providers without native streaming yield only the final object.
+        """
+        for item in self._stream_structured(messages, schema, model):
+            if not isinstance(item, LLMResponse):
+                yield item
+
+    async def astream_structured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> AsyncIterator[dict[str, Any] | T]:
+        """Async counterpart of stream_structured_response."""
+        async for item in self._astream_structured(messages, schema, model):
+            if not isinstance(item, LLMResponse):
+                yield item
+
+    # Structured calls with their metadata: the LLMResponse holds the raw JSON,
+    # usage and request id. Providers implement these and wrappers forward
+    # them, so usage reaches telemetry; the defaults have none to report.
+
+    def _structured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        result = self.structured_response(messages, schema, model)
+        return result, LLMResponse(content=result.model_dump_json())
+
+    async def _astructured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        return await asyncio.to_thread(self._structured_call, messages, schema, model)
+
+    def _stream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> Iterator[dict[str, Any] | T | LLMResponse]:
+        """stream_structured_response with the LLMResponse just before the T."""
+        result, response = self._structured_call(messages, schema, model)
+        yield response
+        yield result
+
+    async def _astream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> AsyncIterator[dict[str, Any] | T | LLMResponse]:
+        result, response = await self._astructured_call(messages, schema, model)
+        yield response
+        yield result
@@ -0,0 +1,183 @@
+import importlib
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from typing import Any, Literal
+from llm.base import BaseLLM, Message, Model
+from llm.bulk import BulkResult, load_prompts
+from utils.data_handler import DataHandler
+
+BatchStatus = Literal["running", "completed", "failed", "cancelled", "expired"]
+TERMINAL_STATUSES = ("completed", "failed", "cancelled", "expired")
+
+# Loaded on demand so only the SDK of the provider in use is imported.
+BATCH_BACKENDS = {
+    "anthropic": "llm.anthropic.batch:AnthropicBatch",
+    "gemini": "llm.gemini.batch:GeminiBatch",
+    "openai": "llm.openai.batch:OpenAIBatch",
+}
+
+
+@dataclass
+class BatchItem:
+    custom_id: str
+    content: str | None = None
+    error: str | None = None
+
+
+class BatchBackend(ABC):
+    """Provider batch API: serialize, submit, poll and fetch results."""
+
+    def __init__(self, client: BaseLLM) -> None:
+        self.client = client
+
+    @abstractmethod
+    def serialize(
+        self, requests: list[tuple[str, list[Message]]], model: Model | None
+    ) -> list[dict[str, Any]]:
+        """Turn (custom_id, messages) pairs into provider request payloads."""
+
+    @abstractmethod
+    def submit(self, payload: list[dict[str, Any]], model: Model | None) -> str:
+        """Create the batch job and return its provider-side id."""
+
+    @abstractmethod
+    def status(self, job_id: str) -> BatchStatus:
+        pass
+
+    @abstractmethod
+    def results(self, job_id: str, custom_ids: list[str]) -> Iterator[BatchItem]:
+        """Yield one item per request; ``custom_ids`` is in submission order."""
+
+
+def get_batch_backend(client: BaseLLM) -> BatchBackend:
+    if client.name not in BATCH_BACKENDS:
+        raise ValueError(f"No batch API support for provider: {client.name}")
+    module_name, _, class_name = BATCH_BACKENDS[client.name].partition(":")
+    return getattr(importlib.import_module(module_name), class_name)(client)
+
+
+@dataclass
+class BatchJob:
+    name: str
+    provider: str
+    job_id: str
+    model: str | None
+    prompts: dict[str, str]
+    status: BatchStatus = "running"
+    submitted_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def done(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+
+class BatchRunner:
+    """Run a prompt set through a provider's batch API.
+
+    Job state is saved under ``<folder>/<name>.json`` after every step, so a
+    job submitted by one process can be polled and collected by another,
+    and submitting an existing name resumes the saved job.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLM,
+        data_handler: DataHandler | None = None,
+        folder: str = "batches",
+        backend: BatchBackend | None = None,
+    ) -> None:
+        self.client = client
+        self.backend = backend if backend is not None else get_batch_backend(client)
+        self.data_handler = data_handler or DataHandler()
+        self.folder = folder
+
+    def _state_file(self, name: str) -> str:
+        return f"{self.folder}/{name}.json"
+
+    def _save(self, job: BatchJob) -> None:
+        job.updated_at = time.time()
+        self.data_handler.save(asdict(job), self._state_file(job.name), "json")
+
+    def exists(self, name: str) -> bool:
+        return (self.data_handler.folder_path / self._state_file(name)).exists()
+
+    def load(self, name: str) -> BatchJob:
+        return BatchJob(**self.data_handler.load(self._state_file(name), "json"))
+
+    def submit(
+        self, name: str, prompts: dict | list, model: Model | None = None
+    ) -> BatchJob:
+        if self.exists(name):
+            return self.load(name)
+        pairs = load_prompts(prompts)
+        requests = [
+            (prompt_id, [Message(role="user", content=prompt)])
+            for prompt_id, prompt in pairs
+        ]
+        job_id = self.backend.submit(self.backend.serialize(requests, model), model)
+        job = BatchJob(
+            name=name,
+            provider=self.client.name,
+            job_id=job_id,
+            model=model.name if model else None,
+            prompts=dict(pairs),
+        )
+        self._save(job)
+        return job
+
+    def poll(self, name: str) -> BatchJob:
+        job = self.load(name)
+        if not job.done:
+            job.status = self.backend.status(job.job_id)
+            self._save(job)
+        return job
+
+    def wait(
+        self, name: str, interval: float = 60.0, timeout: float | None = None
+    ) -> BatchJob:
+        start = time.monotonic()
+        while not (job := self.poll(name)).done:
+            if timeout is not None and time.monotonic() - start >= timeout:
+                raise TimeoutError(f"Batch {name} still {job.status} after {timeout}s")
+            time.sleep(interval)
+        return job
+
+    def collect(self, name: str) -> list[BulkResult]:
+        """Map provider results back to prompt ids, in prompt order."""
+        job = self.load(name)
+        if job.status != "completed":
+            raise ValueError(f"Batch {name} is {job.status}, not completed")
+        items = {
+            item.custom_id: item
+            for item in self.backend.results(job.job_id, list(job.prompts))
+        }
+        results = []
+        for prompt_id, prompt in job.prompts.items():
+            item = items.get(prompt_id, BatchItem(prompt_id, error="missing result"))
+            results.append(
+                BulkResult(
+                    prompt_id=prompt_id,
+                    provider=job.provider,
+                    model=job.model,
+                    prompt=prompt,
+                    content=item.content,
+                    error=item.error,
+                    latency=job.updated_at - job.submitted_at,
+                )
+            )
+        return results
+
+    def run(
+        self,
+        name: str,
+        prompts: dict | list,
+        model: Model | None = None,
+        interval: float = 60.0,
+        timeout: float | None = None,
+    ) -> list[BulkResult]:
+        self.submit(name, prompts, model)
+        self.wait(name, interval, timeout)
+        return self.collect(name)
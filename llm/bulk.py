@@ -0,0 +1,267 @@
+import asyncio
+import json
+import sys
+import time
+from collections.abc import AsyncIterator, Callable, Sequence
+from dataclasses import asdict, dataclass, field
+from typing import Any
+from llm.base import BaseLLM, Message, Model
+from utils.data_handler import DataHandler
+from utils.tokens import estimate_tokens
+
+
+def load_prompts(data: dict | list) -> list[tuple[str, str]]:
+    """Return (prompt_id, prompt) pairs from the prompt JSON format.
+
+    Accepts the ``{"contents": [...]}`` object that
+    ``DataHandler.load(..., format="json")`` returns for files under
+    ``documents/prompts``, or the bare list. Prompt ids are list indices.
+    """
+    contents = data["contents"] if isinstance(data, dict) else data
+    return [(str(idx), prompt) for idx, prompt in enumerate(contents)]
+
+
+class TokenBucket:
+    """Async token bucket refilled continuously at ``rate_per_minute``."""
+
+    def __init__(self, rate_per_minute: float, capacity: float | None = None):
+        self.rate = rate_per_minute / 60
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def debit(self, amount: float) -> None:
+        """Charge usage known only after the call; may drive the bucket negative."""
+        self._refill()
+        self.tokens -= amount
+
+
+@dataclass
+class ProviderLimits:
+    concurrency: int = 4
+    requests_per_minute: float | None = None
+    tokens_per_minute: float | None = None
+
+
+@dataclass
+class BulkResult:
+    prompt_id: str
+    provider: str
+    model: str | None
+    prompt: str
+    content: str | None = None
+    error: str | None = None
+    latency: float = 0.0
+
+
+@dataclass
+class BulkProgress:
+    total: int
+    completed: int = 0
+    failed: int = 0
+    skipped: int = 0
+    started: float = field(default_factory=time.monotonic)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started
+
+    @property
+    def throughput(self) -> float:
+        """Completed requests per second in this run."""
+        return self.completed / self.elapsed if self.elapsed > 0 else 0.0
+
+    def __str__(self) -> str:
+        done = self.completed + self.failed + self.skipped
+        return (
+            f"{done}/{self.total} done ({self.completed} ok, {self.failed} failed, "
+            f"{self.skipped} resumed) in {self.elapsed:.1f}s, "
+            f"{self.throughput:.2f} req/s"
+        )
+
+
+def print_progress(progress: BulkProgress) -> None:
+    print(progress, file=sys.stderr)
+
+
+class _ProviderLane:
+    def __init__(self, client: BaseLLM, limits: ProviderLimits):
+        self.client = client
+        self.limits = limits
+        self.requests = (
+            TokenBucket(limits.requests_per_minute)
+            if limits.requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(limits.tokens_per_minute) if limits.tokens_per_minute else None
+        )
+
+    async def throttle(self, prompt: str) -> None:
+        if self.requests is not None:
+            await self.requests.acquire()
+        if self.tokens is not None:
+            await self.tokens.acquire(estimate_tokens(prompt))
+
+    def record(self, content: str) -> None:
+        if self.tokens is not None:
+            self.tokens.debit(estimate_tokens(content))
+
+
+class BulkRunner:
+    """Run a prompt set against several providers with bounded concurrency.
+
+    Each provider gets its own worker pool and optional request/token rate
+    limits. Successful results are appended to a JSONL checkpoint as they
+    arrive, so rerunning with the same checkpoint skips finished work.
+    """
+
+    def __init__(
+        self,
+        clients: Sequence[BaseLLM],
+        limits: dict[str, ProviderLimits] | None = None,
+        models: dict[str, Model] | None = None,
+        checkpoint: str | None = None,
+        data_handler: DataHandler | None = None,
+        on_progress: Callable[[BulkProgress], None] | None = print_progress,
+        progress_interval: float = 5.0,
+    ):
+        limits = limits or {}
+        self.lanes = [
+            _ProviderLane(client, limits.get(client.name, ProviderLimits()))
+            for client in clients
+        ]
+        self.models = models or {}
+        self.checkpoint = checkpoint
+        self.data_handler = data_handler or DataHandler()
+        self.on_progress = on_progress
+        self.progress_interval = progress_interval
+
+    def _load_checkpoint(self) -> set[tuple[str, str]]:
+        if self.checkpoint is None:
+            return set()
+        path = self.data_handler.folder_path / self.checkpoint
+        if not path.exists():
+            return set()
+        done = set()
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a truncated last line.
+                    continue
+                done.add((record["provider"], record["prompt_id"]))
+        return done
+
+    def _write_checkpoint(self, f: Any, result: BulkResult) -> None:
+        f.write(json.dumps(asdict(result), ensure_ascii=False) + "\n")
+        f.flush()
+
+    async def _call(
+        self, lane: _ProviderLane, prompt_id: str, prompt: str
+    ) -> BulkResult:
+        model = self.models.get(lane.client.name)
+        result = BulkResult(
+            prompt_id=prompt_id,
+            provider=lane.client.name,
+            model=model.name if model else lane.client.default_model,
+            prompt=prompt,
+        )
+        await lane.throttle(prompt)
+        start = time.monotonic()
+        try:
+            response = await lane.client.asingle_response(
+                [Message(role="user", content=prompt)], model
+            )
+            result.content = response.content
+            lane.record(response.content)
+        except Exception as e:
+            result.error = f"{type(e).__name__}: {e}"
+        result.latency = time.monotonic() - start
+        return result
+
+    async def arun(self, prompts: dict | list) -> AsyncIterator[BulkResult]:
+        """Yield results in completion order."""
+        pairs = load_prompts(prompts)
+        done = self._load_checkpoint()
+        progress = BulkProgress(total=len(pairs) * len(self.lanes))
+        results: asyncio.Queue[BulkResult | None] = asyncio.Queue()
+
+        async def worker(lane: _ProviderLane, queue: asyncio.Queue) -> None:
+            while True:
+                try:
+                    prompt_id, prompt = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await results.put(await self._call(lane, prompt_id, prompt))
+
+        workers = []
+        for lane in self.lanes:
+            queue: asyncio.Queue[tuple[str, str]] = asyncio.Queue()
+            for prompt_id, prompt in pairs:
+                if (lane.client.name, prompt_id) in done:
+                    progress.skipped += 1
+                else:
+                    queue.put_nowait((prompt_id, prompt))
+            workers += [
+                asyncio.create_task(worker(lane, queue))
+                for _ in range(max(1, lane.limits.concurrency))
+            ]
+
+        async def close() -> None:
+            await asyncio.gather(*workers)
+            await results.put(None)
+
+        closer = asyncio.create_task(close())
+        checkpoint_file = None
+        if self.checkpoint is not None:
+            path = self.data_handler.folder_path / self.checkpoint
+            path.parent.mkdir(parents=True, exist_ok=True)
+            checkpoint_file = open(path, "a")
+        last_report = time.monotonic()
+        try:
+            while (result := await results.get()) is not None:
+                if result.error is None:
+                    progress.completed += 1
+                    if checkpoint_file is not None:
+                        self._write_checkpoint(checkpoint_file, result)
+                else:
+                    progress.failed += 1
+                if (
+                    self.on_progress is not None
+                    and time.monotonic() - last_report >= self.progress_interval
+                ):
+                    self.on_progress(progress)
+                    last_report = time.monotonic()
+                yield result
+        finally:
+            for task in workers:
+                task.cancel()
+            closer.cancel()
+            if checkpoint_file is not None:
+                checkpoint_file.close()
+        if self.on_progress is not None:
+            self.on_progress(progress)
+
+    def run(self, prompts: dict | list) -> list[BulkResult]:
+        async def collect() -> list[BulkResult]:
+            return [result async for result in self.arun(prompts)]
+
+        return asyncio.run(collect())
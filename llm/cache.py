@@ -0,0 +1,284 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Literal, Type
+from llm.base import BaseLLM, Message, LLMResponse, Model, T
+from llm.structured import compile_schema
+from utils.data_handler import DataHandler
+
+CacheMode = Literal["read_through", "write_through", "bypass"]
+
+# Hits whose access times are held in memory before they are written.
+TOUCH_BATCH = 256
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+def cache_key(
+    provider: str,
+    model_name: str,
+    messages: list[Message],
+    tools: list[dict],
+    schema: Type[T] | None = None,
+) -> str:
+    """Stable content hash of everything that determines a response."""
+    payload = {
+        "provider": provider,
+        "model": model_name,
+        "messages": [asdict(message) for message in messages],
+        "tools": tools,
+        "schema": compile_schema(schema).json_schema if schema is not None else None,
+    }
+    encoded = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResponseStore:
+    """SQLite-backed key/value store with size- and age-based LRU eviction.
+
+    Hits do not commit: their access times are kept in memory and written
+    in the transaction of the next ``put``, every ``TOUCH_BATCH`` hits, and
+    on ``close``. WAL mode with ``synchronous=NORMAL`` keeps the remaining
+    commits off the disk-sync path, and the indexes on ``accessed`` and
+    ``created`` keep eviction from scanning the table.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        max_bytes: int = 512 * 1024 * 1024,
+        max_age: float | None = None,
+    ):
+        if path is None:
+            path = DataHandler().folder_path / "cache" / "llm_responses.sqlite"
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, not corruption.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        for column in ("accessed", "created"):
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS entries_{column} ON entries ({column})"
+            )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, created = row
+            if self.max_age is not None and now - created > self.max_age:
+                self._delete(key)
+                self._conn.commit()
+                return None
+            self._touched[key] = now
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+            return value
+
+    def put(self, key: str, value: str) -> int:
+        """Store value and return the number of entries evicted to make room."""
+        now = time.time()
+        size = len(value.encode())
+        with self._lock:
+            # Eviction below must see the latest access times.
+            self._flush_touched()
+            self._delete(key)
+            self._conn.execute(
+                "INSERT INTO entries (key, value, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, value, size, now, now),
+            )
+            self._total_bytes += size
+            evicted = self._evict(now)
+            self._conn.commit()
+            return evicted
+
+    def _flush_touched(self) -> None:
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE entries SET accessed = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._touched.items()],
+            )
+            self._touched.clear()
+
+    def _delete(self, key: str) -> None:
+        self._touched.pop(key, None)
+        row = self._conn.execute(
+            "SELECT size FROM entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._total_bytes -= row[0]
+
+    def _evict(self, now: float) -> int:
+        evicted = 0
+        if self.max_age is not None:
+            expired = self._conn.execute(
+                "DELETE FROM entries WHERE created < ?", (now - self.max_age,)
+            ).rowcount
+            if expired:
+                evicted += expired
+                self._total_bytes = self._conn.execute(
+                    "SELECT COALESCE(SUM(size), 0) FROM entries"
+                ).fetchone()[0]
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                if self._total_bytes <= self.max_bytes:
+                    break
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._total_bytes -= size
+                evicted += 1
+        return evicted
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+class CachedLLM(BaseLLM):
+    """Wrap any BaseLLM with a persistent, content-addressed response cache.
+
+    ``read_through`` serves hits from the store and fills it on misses,
+    ``write_through`` always calls the provider and refreshes the stored entry,
+    and ``bypass`` leaves the store untouched.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLM,
+        store: ResponseStore | None = None,
+        mode: CacheMode = "read_through",
+    ):
+        self.client = client
+        self.store = store if store is not None else ResponseStore()
+        self.mode = mode
+        self.stats = CacheStats()
+        # The async methods update stats from worker threads.
+        self._lock = threading.Lock()
+        self.name = client.name
+        self.default_model = getattr(client, "default_model", "")
+        self.tools = getattr(client, "tools", [])
+
+    def _key(
+        self, messages: list[Message], model: Model | None, schema: Type[T] | None
+    ) -> str:
+        model_name = model.name if model else self.default_model
+        return cache_key(self.name, model_name, messages, self.tools, schema)
+
+    def _lookup(self, key: str) -> str | None:
+        if self.mode != "read_through":
+            return None
+        value = self.store.get(key)
+        self._count("misses" if value is None else "hits")
+        return value
+
+    def _save(self, key: str, value: str) -> None:
+        if self.mode == "bypass":
+            return
+        self._count("evictions", self.store.put(key, value))
+        self._count("writes")
+
+    def _count(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + amount)
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        key = self._key(messages, model, None)
+        if (cached := self._lookup(key)) is not None:
+            return LLMResponse(content=json.loads(cached)["content"])
+        response = self.client.single_response(messages, model)
+        self._save(key, json.dumps({"content": response.content}, ensure_ascii=False))
+        return response
+
+    def structured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return self._structured_call(messages, schema, model)[0]
+
+    def _structured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        key = self._key(messages, model, schema)
+        if (cached := self._lookup(key)) is not None:
+            return schema.model_validate_json(cached), LLMResponse(content=cached)
+        result, response = self.client._structured_call(messages, schema, model)
+        self._save(key, result.model_dump_json())
+        return result, response
+
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        key = self._key(messages, model, None)
+        # SQLite calls block, so they run off the event loop.
+        if (cached := await asyncio.to_thread(self._lookup, key)) is not None:
+            return LLMResponse(content=json.loads(cached)["content"])
+        response = await self.client.asingle_response(messages, model)
+        await asyncio.to_thread(
+            self._save,
+            key,
+            json.dumps({"content": response.content}, ensure_ascii=False),
+        )
+        return response
+
+    async def astructured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return (await self._astructured_call(messages, schema, model))[0]
+
+    async def _astructured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        key = self._key(messages, model, schema)
+        if (cached := await asyncio.to_thread(self._lookup, key)) is not None:
+            return schema.model_validate_json(cached), LLMResponse(content=cached)
+        result, response = await self.client._astructured_call(messages, schema, model)
+        await asyncio.to_thread(self._save, key, result.model_dump_json())
+        return result, response
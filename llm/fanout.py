@@ -0,0 +1,60 @@
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from dataclasses import dataclass
+from typing import Generic, Type, TypeVar
+from llm.base import BaseLLM, Message, LLMResponse, Model, T
+
+R = TypeVar("R")
+
+
+@dataclass
+class FanOutResult(Generic[R]):
+    name: str
+    response: R | None = None
+    error: Exception | None = None
+
+
+async def fan_out(
+    clients: Sequence[BaseLLM],
+    messages: list[Message],
+    models: dict[str, Model] | None = None,
+) -> AsyncIterator[FanOutResult[LLMResponse]]:
+    """Send the same messages to every client concurrently.
+
+    Results are yielded in completion order, so total latency is bounded by
+    the slowest provider rather than the sum of all of them. A failing
+    provider is reported through ``error`` instead of cancelling the others.
+    """
+    models = models or {}
+
+    async def call(client: BaseLLM) -> FanOutResult[LLMResponse]:
+        try:
+            response = await client.asingle_response(messages, models.get(client.name))
+            return FanOutResult(name=client.name, response=response)
+        except Exception as e:
+            return FanOutResult(name=client.name, error=e)
+
+    for future in asyncio.as_completed([call(client) for client in clients]):
+        yield await future
+
+
+async def fan_out_structured(
+    clients: Sequence[BaseLLM],
+    messages: list[Message],
+    schema: Type[T],
+    models: dict[str, Model] | None = None,
+) -> AsyncIterator[FanOutResult[T]]:
+    """Structured-output variant of fan_out."""
+    models = models or {}
+
+    async def call(client: BaseLLM) -> FanOutResult[T]:
+        try:
+            response = await client.astructured_response(
+                messages, schema, models.get(client.name)
+            )
+            return FanOutResult(name=client.name, response=response)
+        except Exception as e:
+            return FanOutResult(name=client.name, error=e)
+
+    for future in asyncio.as_completed([call(client) for client in clients]):
+        yield await future
@@ -0,0 +1,59 @@
+from collections.abc import Iterator
+from typing import Any
+from google import genai
+from llm.base import Message, Model, split_system
+from llm.batch import BatchBackend, BatchItem, BatchStatus
+from llm.gemini.client import GeminiLLM
+
+STATUSES: dict[str, BatchStatus] = {
+    "JOB_STATE_PENDING": "running",
+    "JOB_STATE_QUEUED": "running",
+    "JOB_STATE_RUNNING": "running",
+    "JOB_STATE_CANCELLING": "running",
+    "JOB_STATE_SUCCEEDED": "completed",
+    "JOB_STATE_PARTIALLY_SUCCEEDED": "completed",
+    "JOB_STATE_FAILED": "failed",
+    "JOB_STATE_CANCELLED": "cancelled",
+    "JOB_STATE_EXPIRED": "expired",
+}
+
+
+class GeminiBatch(BatchBackend):
+    """Batch mode with inlined requests; responses come back in request order."""
+
+    client: GeminiLLM
+
+    def serialize(
+        self, requests: list[tuple[str, list[Message]]], model: Model | None
+    ) -> list[dict[str, Any]]:
+        return [self._request(messages) for _, messages in requests]
+
+    def _request(self, messages: list[Message]) -> dict[str, Any]:
+        # _convert_messages drops system messages; online calls send them as
+        # system_instruction through GeminiLLM._config, so batches do too.
+        request: dict[str, Any] = {"contents": self.client._convert_messages(messages)}
+        system, _ = split_system(messages)
+        if system:
+            request["config"] = {"system_instruction": "\n\n".join(system)}
+        return request
+
+    def submit(self, payload: list[dict[str, Any]], model: Model | None) -> str:
+        src: list[genai.types.InlinedRequestDict] = [*payload]  # type: ignore[list-item]
+        job = self.client.client.batches.create(
+            model=self.client._initialize_model(model), src=src
+        )
+        assert job.name is not None
+        return job.name
+
+    def status(self, job_id: str) -> BatchStatus:
+        state = self.client.client.batches.get(name=job_id).state
+        return STATUSES[state.name if state else "JOB_STATE_PENDING"]
+
+    def results(self, job_id: str, custom_ids: list[str]) -> Iterator[BatchItem]:
+        job = self.client.client.batches.get(name=job_id)
+        responses = (job.dest.inlined_responses if job.dest else None) or []
+        for custom_id, item in zip(custom_ids, responses):
+            if item.error is not None or item.response is None:
+                yield BatchItem(custom_id, error=str(item.error))
+            else:
+                yield BatchItem(custom_id, content=item.response.text or "")
@@ -1,31 +1,169 @@
 from google import genai
-from dotenv import load_dotenv
+from utils.env import load_env
+from utils.http import get_pool
+from utils.tokens import estimate_tokens
 import os
-import json
-from llm.base import BaseLLM, Message, LLMResponse, Model, T
-from typing import Type
+import time
+from collections.abc import AsyncIterator, Iterator
+from llm.base import (
+    BaseLLM,
+    Message,
+    LLMResponse,
+    Model,
+    StreamTimer,
+    T,
+    TokenUsage,
+    call_timeout,
+    prefix_key,
+    split_system,
+)
+from llm.structured import CompiledSchema, PartialJSONParser, compile_schema
+from typing import Any, Type
 
-load_dotenv()
+load_env()
+
+# Explicit context caches are rejected below a per-model minimum prompt size.
+CONTEXT_CACHE_MIN_TOKENS = 4096
 
 
 class GeminiLLM(BaseLLM):
-    def __init__(self):
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+    def __init__(
+        self,
+        context_cache_ttl: int | None = 3600,
+        context_cache_min_tokens: int = CONTEXT_CACHE_MIN_TOKENS,
+    ):
+        pool = get_pool("gemini")
+        self.client = genai.Client(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            http_options=genai.types.HttpOptions(
+                httpx_client=pool.client(), httpx_async_client=pool.async_client()
+            ),
+        )
         self.default_model = "gemini-2.5-flash-lite"
         self.name = "gemini"
+        self.tools = []
+        # Long system prompts are stored as cached content for this many
+        # seconds; None leaves caching to Gemini's implicit prefix cache.
+        self.context_cache_ttl = context_cache_ttl
+        self.context_cache_min_tokens = context_cache_min_tokens
+        # prefix key -> (cached content name or "" if creation failed, expiry)
+        self._context_caches: dict[str, tuple[str, float]] = {}
 
     def _initialize_model(self, model: Model | None) -> str:
         return model.name if model else self.default_model
 
-    def _convert_messages(self, messages: list[Message]) -> list[dict]:
+    def _convert_messages(
+        self, messages: list[Message]
+    ) -> list[genai.types.ContentUnionDict]:
+        """Convert non-system messages; system ones become system_instruction."""
         return [
             {
                 "role": "model" if message.role == "assistant" else message.role,
                 "parts": [{"text": message.content}],
             }
             for message in messages
+            if message.role != "system"
         ]
 
+    def _cache_slot(
+        self, messages: list[Message], model_name: str
+    ) -> tuple[str, str, str | None]:
+        """Return (prefix key, system text, known cache name or None)."""
+        system, _ = split_system(messages)
+        if (
+            self.context_cache_ttl is None
+            or not system
+            or estimate_tokens("".join(system)) < self.context_cache_min_tokens
+        ):
+            return "", "", ""
+        key = prefix_key(system, model_name)
+        name, expires = self._context_caches.get(key, ("", 0.0))
+        return key, "\n\n".join(system), name if time.time() < expires else None
+
+    def _cache_config(self, system: str) -> genai.types.CreateCachedContentConfig:
+        return genai.types.CreateCachedContentConfig(
+            system_instruction=system, ttl=f"{self.context_cache_ttl}s"
+        )
+
+    def _remember_cache(self, key: str, name: str | None) -> str | None:
+        assert self.context_cache_ttl is not None
+        # Renew a little before the server-side expiry.
+        expires = time.time() + self.context_cache_ttl * 0.9
+        self._context_caches[key] = (name or "", expires)
+        return name or None
+
+    def _context_cache(self, messages: list[Message], model_name: str) -> str | None:
+        key, system, name = self._cache_slot(messages, model_name)
+        if name is not None:
+            return name or None
+        try:
+            cache = self.client.caches.create(
+                model=model_name, config=self._cache_config(system)
+            )
+        except genai.errors.APIError:
+            # Prefix below this model's minimum, or caching unsupported.
+            return self._remember_cache(key, None)
+        return self._remember_cache(key, cache.name)
+
+    async def _acontext_cache(
+        self, messages: list[Message], model_name: str
+    ) -> str | None:
+        key, system, name = self._cache_slot(messages, model_name)
+        if name is not None:
+            return name or None
+        try:
+            cache = await self.client.aio.caches.create(
+                model=model_name, config=self._cache_config(system)
+            )
+        except genai.errors.APIError:
+            return self._remember_cache(key, None)
+        return self._remember_cache(key, cache.name)
+
+    def _config(
+        self,
+        messages: list[Message],
+        cached_content: str | None,
+        compiled: CompiledSchema | None = None,
+    ) -> genai.types.GenerateContentConfig:
+        system, _ = split_system(messages)
+        config = genai.types.GenerateContentConfig()
+        if (timeout := call_timeout()) is not None:
+            # Merged into the client's options; milliseconds, and 0 means none.
+            config.http_options = genai.types.HttpOptions(
+                timeout=max(1, int(timeout * 1000))
+            )
+        if cached_content is not None:
+            config.cached_content = cached_content
+        elif system:
+            config.system_instruction = "\n\n".join(system)
+        if compiled is not None:
+            config.response_mime_type = "application/json"
+            # Sent as-is; response_schema would be converted on every call.
+            config.response_json_schema = compiled.json_schema
+        return config
+
+    def _parse_structured(self, response: Any, compiled: CompiledSchema[T]) -> T:
+        # The SDK already json.loads JSON-schema responses into ``parsed``.
+        if isinstance(response.parsed, dict):
+            return compiled.validate(response.parsed)
+        return compiled.parse(response.text or "")
+
+    def _usage(self, metadata: Any) -> TokenUsage | None:
+        if metadata is None:
+            return None
+        return TokenUsage(
+            input_tokens=metadata.prompt_token_count or 0,
+            output_tokens=metadata.candidates_token_count or 0,
+            cache_read_tokens=metadata.cached_content_token_count or 0,
+        )
+
+    def _response(self, response: Any) -> LLMResponse:
+        return LLMResponse(
+            content=response.text or "",
+            usage=self._usage(response.usage_metadata),
+            request_id=response.response_id,
+        )
+
     def single_response(
         self, messages: list[Message], model: Model | None = None
     ) -> LLMResponse:
@@ -34,22 +172,168 @@ class GeminiLLM(BaseLLM):
         response = self.client.models.generate_content(
             model=model_name,
             contents=gemini_messages,
+            config=self._config(messages, self._context_cache(messages, model_name)),
         )
-        return LLMResponse(content=response.text)
+        return self._response(response)
 
     def structured_response(
         self, messages: list[Message], schema: Type[T], model: Model | None = None
     ) -> T:
+        return self._structured_call(messages, schema, model)[0]
+
+    def _structured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
         model_name = self._initialize_model(model)
         gemini_messages = self._convert_messages(messages)
-        json_schema = schema.model_json_schema()
+        compiled = compile_schema(schema)
         response = self.client.models.generate_content(
             model=model_name,
             contents=gemini_messages,
-            config=genai.types.GenerateContentConfig(
-                response_mime_type="application/json",
-                response_schema=json_schema,
+            config=self._config(
+                messages, self._context_cache(messages, model_name), compiled
+            ),
+        )
+        return self._parse_structured(response, compiled), self._response(response)
+
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        model_name = self._initialize_model(model)
+        gemini_messages = self._convert_messages(messages)
+        response = await self.client.aio.models.generate_content(
+            model=model_name,
+            contents=gemini_messages,
+            config=self._config(
+                messages, await self._acontext_cache(messages, model_name)
+            ),
+        )
+        return self._response(response)
+
+    async def astructured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return (await self._astructured_call(messages, schema, model))[0]
+
+    async def _astructured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        model_name = self._initialize_model(model)
+        gemini_messages = self._convert_messages(messages)
+        compiled = compile_schema(schema)
+        response = await self.client.aio.models.generate_content(
+            model=model_name,
+            contents=gemini_messages,
+            config=self._config(
+                messages, await self._acontext_cache(messages, model_name), compiled
             ),
         )
-        response_json = json.loads(response.text)
-        return schema(**response_json)
+        return self._parse_structured(response, compiled), self._response(response)
+
+    def stream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> Iterator[str | LLMResponse]:
+        model_name = self._initialize_model(model)
+        gemini_messages = self._convert_messages(messages)
+        timer = StreamTimer()
+        deltas = []
+        usage = None
+        request_id = None
+        for chunk in self.client.models.generate_content_stream(
+            model=model_name,
+            contents=gemini_messages,
+            config=self._config(messages, self._context_cache(messages, model_name)),
+        ):
+            if chunk.text:
+                timer.mark()
+                deltas.append(chunk.text)
+                yield chunk.text
+            if chunk.usage_metadata:
+                usage = self._usage(chunk.usage_metadata)
+            request_id = chunk.response_id or request_id
+        content = "".join(deltas)
+        yield LLMResponse(
+            content=content,
+            metrics=timer.finish(content, usage.output_tokens if usage else None),
+            usage=usage,
+            request_id=request_id,
+        )
+
+    async def astream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> AsyncIterator[str | LLMResponse]:
+        model_name = self._initialize_model(model)
+        gemini_messages = self._convert_messages(messages)
+        timer = StreamTimer()
+        deltas = []
+        usage = None
+        request_id = None
+        async for chunk in await self.client.aio.models.generate_content_stream(
+            model=model_name,
+            contents=gemini_messages,
+            config=self._config(
+                messages, await self._acontext_cache(messages, model_name)
+            ),
+        ):
+            if chunk.text:
+                timer.mark()
+                deltas.append(chunk.text)
+                yield chunk.text
+            if chunk.usage_metadata:
+                usage = self._usage(chunk.usage_metadata)
+            request_id = chunk.response_id or request_id
+        content = "".join(deltas)
+        yield LLMResponse(
+            content=content,
+            metrics=timer.finish(content, usage.output_tokens if usage else None),
+            usage=usage,
+            request_id=request_id,
+        )
+
+    def _stream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> Iterator[dict[str, Any] | T | LLMResponse]:
+        model_name = self._initialize_model(model)
+        gemini_messages = self._convert_messages(messages)
+        compiled = compile_schema(schema)
+        parser = PartialJSONParser()
+        usage = None
+        request_id = None
+        for chunk in self.client.models.generate_content_stream(
+            model=model_name,
+            contents=gemini_messages,
+            config=self._config(
+                messages, self._context_cache(messages, model_name), compiled
+            ),
+        ):
+            if chunk.text and (partial := parser.feed(chunk.text)) is not None:
+                yield partial
+            if chunk.usage_metadata:
+                usage = self._usage(chunk.usage_metadata)
+            request_id = chunk.response_id or request_id
+        yield LLMResponse(content=parser.text, usage=usage, request_id=request_id)
+        yield compiled.parse(parser.text)
+
+    async def _astream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> AsyncIterator[dict[str, Any] | T | LLMResponse]:
+        model_name = self._initialize_model(model)
+        gemini_messages = self._convert_messages(messages)
+        compiled = compile_schema(schema)
+        parser = PartialJSONParser()
+        usage = None
+        request_id = None
+        async for chunk in await self.client.aio.models.generate_content_stream(
+            model=model_name,
+            contents=gemini_messages,
+            config=self._config(
+                messages, await self._acontext_cache(messages, model_name), compiled
+            ),
+        ):
+            if chunk.text and (partial := parser.feed(chunk.text)) is not None:
+                yield partial
+            if chunk.usage_metadata:
+                usage = self._usage(chunk.usage_metadata)
+            request_id = chunk.response_id or request_id
+        yield LLMResponse(content=parser.text, usage=usage, request_id=request_id)
+        yield compiled.parse(parser.text)
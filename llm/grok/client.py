@@ -1,26 +1,87 @@
+import asyncio
+import json
 import os
-from xai_sdk import Client
+import threading
+from xai_sdk import AsyncClient, Client
 from xai_sdk.chat import user, system, assistant
-from dotenv import load_dotenv
-from llm.base import BaseLLM, Message, LLMResponse, Model, T
-from typing import Type
+from xai_sdk.proto import chat_pb2
+from utils.env import load_env
+from collections.abc import AsyncIterator, Iterator
+from llm.base import BaseLLM, Message, LLMResponse, Model, StreamTimer, T, TokenUsage
+from llm.structured import CompiledSchema, PartialJSONParser, compile_schema
+from typing import Any, Type
 from xai_sdk.tools import web_search, x_search
 
-load_dotenv()
+load_env()
+
+TOOL_FACTORIES = {"web_search": web_search, "x_search": x_search}
 
 
 class GrokLLM(BaseLLM):
-    def __init__(self):
+    def __init__(self, timeout: float = 120):
+        # The gRPC client applies this to every request and overrides any
+        # per-call timeout, so call_timeout() cannot shorten it. The default
+        # matches RetryPolicy.deadline; ResilientLLM rejects a longer one.
         self.client = Client(
             api_key=os.getenv("XAI_API_KEY"),
-            timeout=3600,
+            timeout=timeout,
         )
+        self.timeout = timeout
+        self._async_clients: dict[asyncio.AbstractEventLoop, AsyncClient] = {}
+        self._lock = threading.Lock()
         self.default_model = "grok-4-fast-reasoning"
         self.name = "grok"
+        self.tools = [{"type": "web_search"}, {"type": "x_search"}]
+
+    @property
+    def async_client(self) -> AsyncClient:
+        """The async client for the running event loop.
+
+        grpc.aio channels are bound to the loop they were created on, so each
+        loop gets its own; one built outside any loop works in none.
+        """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._async_clients.get(loop)
+            if client is None:
+                for closed in [key for key in self._async_clients if key.is_closed()]:
+                    del self._async_clients[closed]
+                client = self._async_clients[loop] = AsyncClient(
+                    api_key=os.getenv("XAI_API_KEY"), timeout=self.timeout
+                )
+            return client
 
     def _initialize_model(self, model: Model | None) -> str:
         return model.name if model else self.default_model
 
+    def _build_tools(self) -> list:
+        return [TOOL_FACTORIES[tool["type"]]() for tool in self.tools]
+
+    def _usage(self, response) -> TokenUsage:
+        # xAI caches repeated prompt prefixes automatically.
+        return TokenUsage(
+            input_tokens=response.usage.prompt_tokens,
+            output_tokens=response.usage.completion_tokens,
+            cache_read_tokens=response.usage.cached_prompt_text_tokens,
+        )
+
+    def _response(self, response) -> LLMResponse:
+        return LLMResponse(
+            content=response.content,
+            usage=self._usage(response),
+            request_id=response.id,
+        )
+
+    def _response_format(self, compiled: CompiledSchema) -> Any:
+        # chat.parse would serialize model_json_schema() on every call.
+        return compiled.payload(
+            "grok",
+            lambda: chat_pb2.ResponseFormat(
+                format_type=chat_pb2.FormatType.FORMAT_TYPE_JSON_SCHEMA,
+                schema=json.dumps(compiled.json_schema),
+            ),
+        )
+
     def _append_messages_to_chat(self, chat, messages: list[Message]) -> None:
         """Append messages to chat with appropriate roles."""
         for message in messages:
@@ -35,18 +96,134 @@ class GrokLLM(BaseLLM):
         self, messages: list[Message], model: Model | None = None
     ) -> LLMResponse:
         model_name = self._initialize_model(model)
+        chat = self.client.chat.create(model=model_name, tools=self._build_tools())
+        self._append_messages_to_chat(chat, messages)
+        response = chat.sample()
+        return self._response(response)
+
+    def structured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return self._structured_call(messages, schema, model)[0]
+
+    def _structured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        model_name = self._initialize_model(model)
+        compiled = compile_schema(schema)
         chat = self.client.chat.create(
-            model=model_name, tools=[web_search(), x_search()]
+            model=model_name, response_format=self._response_format(compiled)
         )
         self._append_messages_to_chat(chat, messages)
         response = chat.sample()
-        return LLMResponse(content=response.content)
+        return compiled.parse(response.content), self._response(response)
 
-    def structured_response(
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        model_name = self._initialize_model(model)
+        chat = self.async_client.chat.create(
+            model=model_name, tools=self._build_tools()
+        )
+        self._append_messages_to_chat(chat, messages)
+        response = await chat.sample()
+        return self._response(response)
+
+    async def astructured_response(
         self, messages: list[Message], schema: Type[T], model: Model | None = None
     ) -> T:
+        return (await self._astructured_call(messages, schema, model))[0]
+
+    async def _astructured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        model_name = self._initialize_model(model)
+        compiled = compile_schema(schema)
+        chat = self.async_client.chat.create(
+            model=model_name, response_format=self._response_format(compiled)
+        )
+        self._append_messages_to_chat(chat, messages)
+        response = await chat.sample()
+        return compiled.parse(response.content), self._response(response)
+
+    def stream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> Iterator[str | LLMResponse]:
+        model_name = self._initialize_model(model)
+        chat = self.client.chat.create(model=model_name, tools=self._build_tools())
+        self._append_messages_to_chat(chat, messages)
+        timer = StreamTimer()
+        response = None
+        for response, chunk in chat.stream():
+            if chunk.content:
+                timer.mark()
+                yield chunk.content
+        content = response.content if response else ""
+        output_tokens = response.usage.completion_tokens if response else None
+        yield LLMResponse(
+            content=content,
+            metrics=timer.finish(content, output_tokens),
+            usage=self._usage(response) if response else None,
+            request_id=response.id if response else None,
+        )
+
+    async def astream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> AsyncIterator[str | LLMResponse]:
+        model_name = self._initialize_model(model)
+        chat = self.async_client.chat.create(
+            model=model_name, tools=self._build_tools()
+        )
+        self._append_messages_to_chat(chat, messages)
+        timer = StreamTimer()
+        response = None
+        async for response, chunk in chat.stream():
+            if chunk.content:
+                timer.mark()
+                yield chunk.content
+        content = response.content if response else ""
+        output_tokens = response.usage.completion_tokens if response else None
+        yield LLMResponse(
+            content=content,
+            metrics=timer.finish(content, output_tokens),
+            usage=self._usage(response) if response else None,
+            request_id=response.id if response else None,
+        )
+
+    def _stream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> Iterator[dict[str, Any] | T | LLMResponse]:
         model_name = self._initialize_model(model)
-        chat = self.client.chat.create(model=model_name)
+        compiled = compile_schema(schema)
+        chat = self.client.chat.create(
+            model=model_name, response_format=self._response_format(compiled)
+        )
         self._append_messages_to_chat(chat, messages)
-        _, parsed_object = chat.parse(schema)
-        return parsed_object
+        parser = PartialJSONParser()
+        response = None
+        for response, chunk in chat.stream():
+            if chunk.content and (partial := parser.feed(chunk.content)) is not None:
+                yield partial
+        yield (
+            self._response(response) if response else LLMResponse(content=parser.text)
+        )
+        yield compiled.parse(parser.text)
+
+    async def _astream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> AsyncIterator[dict[str, Any] | T | LLMResponse]:
+        model_name = self._initialize_model(model)
+        compiled = compile_schema(schema)
+        chat = self.async_client.chat.create(
+            model=model_name, response_format=self._response_format(compiled)
+        )
+        self._append_messages_to_chat(chat, messages)
+        parser = PartialJSONParser()
+        response = None
+        async for response, chunk in chat.stream():
+            if chunk.content and (partial := parser.feed(chunk.content)) is not None:
+                yield partial
+        yield (
+            self._response(response) if response else LLMResponse(content=parser.text)
+        )
+        yield compiled.parse(parser.text)
@@ -0,0 +1,90 @@
+import json
+from collections.abc import Iterator
+from typing import Any
+from llm.base import Message, Model
+from llm.batch import BatchBackend, BatchItem, BatchStatus
+from llm.openai.client import OpenAILLM
+
+STATUSES: dict[str, BatchStatus] = {
+    "validating": "running",
+    "in_progress": "running",
+    "finalizing": "running",
+    "cancelling": "running",
+    "completed": "completed",
+    "failed": "failed",
+    "expired": "expired",
+    "cancelled": "cancelled",
+}
+
+
+def _output_text(body: dict[str, Any]) -> str:
+    return "".join(
+        part.get("text", "")
+        for item in body.get("output", [])
+        if item.get("type") == "message"
+        for part in item.get("content", [])
+        if part.get("type") == "output_text"
+    )
+
+
+class OpenAIBatch(BatchBackend):
+    """Batch API over the Responses endpoint; input and output are JSONL files."""
+
+    client: OpenAILLM
+
+    def serialize(
+        self, requests: list[tuple[str, list[Message]]], model: Model | None
+    ) -> list[dict[str, Any]]:
+        model_name = self.client._initialize_model(model)
+        payload = []
+        for custom_id, messages in requests:
+            body = {
+                "model": model_name,
+                "tools": self.client.tools,
+                "input": self.client._convert_messages(messages),
+            }
+            cache_key = self.client._prompt_cache_key(messages, model_name)
+            if isinstance(cache_key, str):
+                body["prompt_cache_key"] = cache_key
+            payload.append(
+                {
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/responses",
+                    "body": body,
+                }
+            )
+        return payload
+
+    def submit(self, payload: list[dict[str, Any]], model: Model | None) -> str:
+        lines = "".join(json.dumps(line, ensure_ascii=False) + "\n" for line in payload)
+        input_file = self.client.client.files.create(
+            file=("batch.jsonl", lines.encode()), purpose="batch"
+        )
+        batch = self.client.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint="/v1/responses",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def status(self, job_id: str) -> BatchStatus:
+        return STATUSES[self.client.client.batches.retrieve(job_id).status]
+
+    def results(self, job_id: str, custom_ids: list[str]) -> Iterator[BatchItem]:
+        batch = self.client.client.batches.retrieve(job_id)
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    error = record.get("error") or response.get("body")
+                    yield BatchItem(record["custom_id"], error=json.dumps(error))
+                else:
+                    yield BatchItem(
+                        record["custom_id"], content=_output_text(response["body"])
+                    )
@@ -1,19 +1,45 @@
-from openai import OpenAI
-from dotenv import load_dotenv
+from openai import AsyncOpenAI, NotGiven, OpenAI, Omit, not_given, omit
+from utils.env import load_env
+from utils.http import get_pool
 import os
-from typing import Type
-from llm.base import BaseLLM, Message, LLMResponse, Model, T
+from collections.abc import AsyncIterator, Iterator
+from typing import Any, Type
+from llm.base import (
+    BaseLLM,
+    Message,
+    LLMResponse,
+    Model,
+    StreamTimer,
+    T,
+    TokenUsage,
+    call_timeout,
+    prefix_key,
+    split_system,
+)
+from llm.structured import (
+    CompiledSchema,
+    PartialJSONParser,
+    compile_schema,
+    strict_json_schema,
+)
 
-load_dotenv()
+load_env()
 
 
 class OpenAILLM(BaseLLM):
     def __init__(
         self,
     ):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        pool = get_pool("openai")
+        self.client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"), http_client=pool.client()
+        )
+        self.async_client = AsyncOpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"), http_client=pool.async_client()
+        )
         self.default_model = "gpt-5"
         self.name = "openai"
+        self.tools = [{"type": "web_search"}]
 
     def _initialize_model(self, model: Model | None) -> str:
         return model.name if model else self.default_model
@@ -23,6 +49,51 @@ class OpenAILLM(BaseLLM):
             {"role": message.role, "content": message.content} for message in messages
         ]
 
+    def _prompt_cache_key(self, messages: list[Message], model_name: str) -> str | Omit:
+        """Route requests sharing a system prefix to the same prompt cache.
+
+        OpenAI caches prefixes automatically; the key raises the hit rate when
+        many different prompts share one long system prompt.
+        """
+        system, _ = split_system(messages)
+        return prefix_key(system, model_name) if system else omit
+
+    def _timeout(self) -> float | NotGiven:
+        # None would disable the client's own timeout rather than keep it.
+        timeout = call_timeout()
+        return not_given if timeout is None else timeout
+
+    def _text_format(self, compiled: CompiledSchema) -> Any:
+        # The SDK's responses.parse rebuilds this strict schema on every call.
+        return {
+            "format": compiled.payload(
+                "openai",
+                lambda: {
+                    "type": "json_schema",
+                    "strict": True,
+                    "name": compiled.schema.__name__,
+                    "schema": strict_json_schema(compiled.json_schema),
+                },
+            )
+        }
+
+    def _usage(self, usage: Any) -> TokenUsage | None:
+        if usage is None:
+            return None
+        details = usage.input_tokens_details
+        return TokenUsage(
+            input_tokens=usage.input_tokens,
+            output_tokens=usage.output_tokens,
+            cache_read_tokens=details.cached_tokens if details else 0,
+        )
+
+    def _response(self, response: Any) -> LLMResponse:
+        return LLMResponse(
+            content=response.output_text,
+            usage=self._usage(response.usage),
+            request_id=response.id,
+        )
+
     def single_response(
         self, messages: list[Message], model: Model | None = None
     ) -> LLMResponse:
@@ -30,20 +101,191 @@ class OpenAILLM(BaseLLM):
         openai_messages = self._convert_messages(messages)
         response = self.client.responses.create(
             model=model_name,
-            tools=[{"type": "web_search"}],
+            tools=self.tools,
             input=openai_messages,
+            prompt_cache_key=self._prompt_cache_key(messages, model_name),
+            timeout=self._timeout(),
         )
-        return LLMResponse(content=response.output_text)
+        return self._response(response)
 
     def structured_response(
         self, messages: list[Message], schema: Type[T], model: Model | None = None
     ) -> T:
+        return self._structured_call(messages, schema, model)[0]
+
+    def _structured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        model_name = self._initialize_model(model)
+        openai_messages = self._convert_messages(messages)
+        compiled = compile_schema(schema)
+        response = self.client.responses.create(
+            model=model_name,
+            tools=self.tools,
+            input=openai_messages,
+            prompt_cache_key=self._prompt_cache_key(messages, model_name),
+            timeout=self._timeout(),
+            text=self._text_format(compiled),
+        )
+        return compiled.parse(response.output_text), self._response(response)
+
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        model_name = self._initialize_model(model)
+        openai_messages = self._convert_messages(messages)
+        response = await self.async_client.responses.create(
+            model=model_name,
+            tools=self.tools,
+            input=openai_messages,
+            prompt_cache_key=self._prompt_cache_key(messages, model_name),
+            timeout=self._timeout(),
+        )
+        return self._response(response)
+
+    async def astructured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return (await self._astructured_call(messages, schema, model))[0]
+
+    async def _astructured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
         model_name = self._initialize_model(model)
         openai_messages = self._convert_messages(messages)
-        response = self.client.responses.parse(
+        compiled = compile_schema(schema)
+        response = await self.async_client.responses.create(
             model=model_name,
-            tools=[{"type": "web_search"}],
+            tools=self.tools,
             input=openai_messages,
-            text_format=schema,
+            prompt_cache_key=self._prompt_cache_key(messages, model_name),
+            timeout=self._timeout(),
+            text=self._text_format(compiled),
+        )
+        return compiled.parse(response.output_text), self._response(response)
+
+    def stream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> Iterator[str | LLMResponse]:
+        model_name = self._initialize_model(model)
+        openai_messages = self._convert_messages(messages)
+        timer = StreamTimer()
+        deltas = []
+        usage = None
+        request_id = None
+        stream = self.client.responses.create(
+            model=model_name,
+            tools=self.tools,
+            input=openai_messages,
+            prompt_cache_key=self._prompt_cache_key(messages, model_name),
+            timeout=self._timeout(),
+            stream=True,
+        )
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                timer.mark()
+                deltas.append(event.delta)
+                yield event.delta
+            elif event.type == "response.completed":
+                usage = self._usage(event.response.usage)
+                request_id = event.response.id
+        content = "".join(deltas)
+        yield LLMResponse(
+            content=content,
+            metrics=timer.finish(content, usage.output_tokens if usage else None),
+            usage=usage,
+            request_id=request_id,
+        )
+
+    async def astream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> AsyncIterator[str | LLMResponse]:
+        model_name = self._initialize_model(model)
+        openai_messages = self._convert_messages(messages)
+        timer = StreamTimer()
+        deltas = []
+        usage = None
+        request_id = None
+        stream = await self.async_client.responses.create(
+            model=model_name,
+            tools=self.tools,
+            input=openai_messages,
+            prompt_cache_key=self._prompt_cache_key(messages, model_name),
+            timeout=self._timeout(),
+            stream=True,
+        )
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                timer.mark()
+                deltas.append(event.delta)
+                yield event.delta
+            elif event.type == "response.completed":
+                usage = self._usage(event.response.usage)
+                request_id = event.response.id
+        content = "".join(deltas)
+        yield LLMResponse(
+            content=content,
+            metrics=timer.finish(content, usage.output_tokens if usage else None),
+            usage=usage,
+            request_id=request_id,
+        )
+
+    def _stream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> Iterator[dict[str, Any] | T | LLMResponse]:
+        model_name = self._initialize_model(model)
+        openai_messages = self._convert_messages(messages)
+        compiled = compile_schema(schema)
+        parser = PartialJSONParser()
+        stream = self.client.responses.create(
+            model=model_name,
+            tools=self.tools,
+            input=openai_messages,
+            prompt_cache_key=self._prompt_cache_key(messages, model_name),
+            timeout=self._timeout(),
+            text=self._text_format(compiled),
+            stream=True,
+        )
+        completed = None
+        for event in stream:
+            if event.type == "response.output_text.delta":
+                if (partial := parser.feed(event.delta)) is not None:
+                    yield partial
+            elif event.type == "response.completed":
+                completed = event.response
+        yield LLMResponse(
+            content=parser.text,
+            usage=self._usage(completed.usage) if completed else None,
+            request_id=completed.id if completed else None,
+        )
+        yield compiled.parse(parser.text)
+
+    async def _astream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> AsyncIterator[dict[str, Any] | T | LLMResponse]:
+        model_name = self._initialize_model(model)
+        openai_messages = self._convert_messages(messages)
+        compiled = compile_schema(schema)
+        parser = PartialJSONParser()
+        stream = await self.async_client.responses.create(
+            model=model_name,
+            tools=self.tools,
+            input=openai_messages,
+            prompt_cache_key=self._prompt_cache_key(messages, model_name),
+            timeout=self._timeout(),
+            text=self._text_format(compiled),
+            stream=True,
+        )
+        completed = None
+        async for event in stream:
+            if event.type == "response.output_text.delta":
+                if (partial := parser.feed(event.delta)) is not None:
+                    yield partial
+            elif event.type == "response.completed":
+                completed = event.response
+        yield LLMResponse(
+            content=parser.text,
+            usage=self._usage(completed.usage) if completed else None,
+            request_id=completed.id if completed else None,
         )
-        return response.output_parsed
+        yield compiled.parse(parser.text)
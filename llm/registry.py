@@ -0,0 +1,21 @@
+from llm.base import BaseLLM, Model
+from utils.registry import LazyRegistry
+
+llm_registry: LazyRegistry[BaseLLM] = LazyRegistry(
+    {
+        "anthropic": "llm.anthropic.client:AnthropicLLM",
+        "gemini": "llm.gemini.client:GeminiLLM",
+        "grok": "llm.grok.client:GrokLLM",
+        "openai": "llm.openai.client:OpenAILLM",
+    }
+)
+
+
+def get_llm(name: str) -> BaseLLM:
+    return llm_registry.get(name)
+
+
+def resolve_llm(spec: str) -> tuple[BaseLLM, Model | None]:
+    """Resolve ``"anthropic"`` or ``"openai:gpt-5"`` to a client and model."""
+    client, model_name = llm_registry.resolve(spec)
+    return client, Model(name=model_name) if model_name else None
@@ -0,0 +1,513 @@
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Literal, Type, TypeVar
+from llm.base import BaseLLM, LLMResponse, Message, Model, T, timeout_scope
+from utils.telemetry import note_retry
+
+R = TypeVar("R")
+
+CircuitState = Literal["closed", "open", "half_open"]
+Target = tuple[BaseLLM, Model | None]
+
+
+class CircuitOpenError(Exception):
+    """Raised when every candidate provider has an open circuit."""
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Retry timeouts, throttling and server errors; not other 4xx responses.
+
+    SDK errors expose the HTTP status as ``status_code`` (OpenAI, Anthropic)
+    or ``code`` (google-genai); errors without one are treated as transient.
+    """
+    if isinstance(error, CircuitOpenError):
+        return False
+    status = getattr(error, "status_code", getattr(error, "code", None))
+    if not isinstance(status, int):
+        return True
+    return status in (408, 409, 429) or status >= 500
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 8.0
+    # Overall budget for a call including retries; each attempt is capped
+    # to the time left.
+    deadline: float | None = 120.0
+    retryable: Callable[[BaseException], bool] = is_retryable
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number ``attempt + 1``."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+
+
+@dataclass
+class HedgePolicy:
+    percentile: float = 0.95
+    min_samples: int = 20
+    # Delay used until enough latency samples have been collected.
+    initial_delay: float = 5.0
+    min_delay: float = 0.05
+
+
+@dataclass
+class ResilienceStats:
+    requests: int = 0
+    retries: int = 0
+    hedged: int = 0
+    hedge_wins: int = 0
+    failovers: int = 0
+    rejected: int = 0
+
+    @property
+    def hedge_rate(self) -> float:
+        return self.hedged / self.requests if self.requests else 0.0
+
+    @property
+    def hedge_win_rate(self) -> float:
+        """Share of hedged requests answered first by the backup."""
+        return self.hedge_wins / self.hedged if self.hedged else 0.0
+
+
+class LatencyTracker:
+    """Sliding window of recent latencies for percentile estimates."""
+
+    def __init__(self, window: int = 200) -> None:
+        self.samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.samples)
+
+    def add(self, latency: float) -> None:
+        with self._lock:
+            self.samples.append(latency)
+
+    def percentile(self, q: float) -> float:
+        with self._lock:
+            ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class CircuitBreaker:
+    """Trip on a high error rate or slow-call rate over a sliding window.
+
+    An open breaker rejects calls for ``reset_timeout`` seconds, then goes
+    half open and lets a single probe call through; its outcome closes or
+    reopens the breaker. Other calls are rejected while the probe is out,
+    unless it has gone unrecorded for another ``reset_timeout``.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 5,
+        error_rate: float = 0.5,
+        slow_call_latency: float | None = None,
+        slow_call_rate: float = 0.5,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        self.min_calls = min_calls
+        self.error_rate = error_rate
+        self.slow_call_latency = slow_call_latency
+        self.slow_call_rate = slow_call_rate
+        self.reset_timeout = reset_timeout
+        self.calls: deque[tuple[bool, bool]] = deque(maxlen=window)
+        self._state: CircuitState = "closed"
+        self._opened_at = 0.0
+        self._probe_started: float | None = None
+        self._lock = threading.Lock()
+
+    def _current(self) -> CircuitState:
+        if (
+            self._state == "open"
+            and time.monotonic() - self._opened_at >= self.reset_timeout
+        ):
+            self._state = "half_open"
+        return self._state
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current()
+
+    def allow(self) -> bool:
+        """Claim permission for one call; only call it right before sending.
+
+        In the half-open state this takes the single probe slot.
+        """
+        with self._lock:
+            state = self._current()
+            if state != "half_open":
+                return state == "closed"
+            now = time.monotonic()
+            if (
+                self._probe_started is not None
+                and now - self._probe_started < self.reset_timeout
+            ):
+                return False
+            self._probe_started = now
+            return True
+
+    def _open(self) -> None:
+        self._state = "open"
+        self._opened_at = time.monotonic()
+        self._probe_started = None
+        self.calls.clear()
+
+    def record(self, success: bool, latency: float) -> None:
+        slow = self.slow_call_latency is not None and latency > self.slow_call_latency
+        with self._lock:
+            if self._state == "half_open":
+                if success and not slow:
+                    self._state = "closed"
+                    self._probe_started = None
+                else:
+                    self._open()
+                return
+            self.calls.append((success, slow))
+            if len(self.calls) < self.min_calls:
+                return
+            errors = sum(not ok for ok, _ in self.calls) / len(self.calls)
+            slow_calls = sum(is_slow for _, is_slow in self.calls) / len(self.calls)
+            if errors >= self.error_rate or slow_calls >= self.slow_call_rate:
+                self._open()
+
+
+@dataclass
+class _Attempt:
+    """One call to one target, whose outcome is recorded exactly once."""
+
+    client: BaseLLM
+    model: Model | None
+    # Time left before the deadline when the attempt started.
+    timeout: float | None
+    backup: bool = False
+    start: float = field(default_factory=time.monotonic)
+    _settled: threading.Lock = field(default_factory=threading.Lock)
+
+    def settle(self) -> bool:
+        """True only for the first outcome; later ones are ignored."""
+        return self._settled.acquire(blocking=False)
+
+
+class ResilientLLM(BaseLLM):
+    """Wrap a BaseLLM with deadline-aware retries, circuit breaking and hedging.
+
+    When the primary has not answered within the hedge delay (a percentile
+    of its recent latencies), the same request is sent to ``backup`` (another
+    provider, or the primary with ``backup_model``) and whichever answers
+    first wins. An open primary circuit fails over straight to the backup.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLM,
+        backup: BaseLLM | None = None,
+        backup_model: Model | None = None,
+        retry: RetryPolicy | None = None,
+        hedge: HedgePolicy | None = None,
+        breakers: dict[str, CircuitBreaker] | None = None,
+        max_workers: int = 8,
+    ) -> None:
+        self.client = client
+        if backup is None and backup_model is not None:
+            backup = client
+        self.backup = backup
+        self.backup_model = backup_model
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.hedge = hedge if hedge is not None else HedgePolicy()
+        self.breakers = breakers if breakers is not None else {}
+        for candidate in (client, self.backup):
+            if candidate is not None:
+                self.breakers.setdefault(candidate.name, CircuitBreaker())
+                self._check_timeout(candidate)
+        self.latency = LatencyTracker()
+        self.stats = ResilienceStats()
+        self.name = client.name
+        self.default_model = client.default_model
+        self.tools = client.tools
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _check_timeout(self, candidate: BaseLLM) -> None:
+        # Clients with a fixed request timeout (Grok's gRPC channel) ignore
+        # call_timeout(), so a hung call would outlive a shorter deadline.
+        timeout = getattr(candidate, "timeout", None)
+        deadline = self.retry.deadline
+        if isinstance(timeout, (int, float)) and deadline is not None:
+            if timeout > deadline:
+                raise ValueError(
+                    f"{candidate.name} requests time out after {timeout}s, longer "
+                    f"than the {deadline}s retry deadline; build the client "
+                    "with a lower timeout"
+                )
+
+    def hedge_delay(self) -> float:
+        if len(self.latency) < self.hedge.min_samples:
+            return self.hedge.initial_delay
+        return max(self.hedge.min_delay, self.latency.percentile(self.hedge.percentile))
+
+    def _candidates(self, model: Model | None) -> tuple[Target | None, Target | None]:
+        """Return the (primary, backup) targets whose circuits allow a call.
+
+        The first target sent has already claimed its breaker. A backup that
+        may only be sent as a hedge claims it when the hedge goes out.
+        """
+        primary = (self.client, model) if self.breakers[self.name].allow() else None
+        backup = None
+        if self.backup is not None:
+            breaker = self.breakers[self.backup.name]
+            if breaker.allow() if primary is None else breaker.state != "open":
+                backup = (self.backup, self.backup_model or model)
+        if primary is None and backup is None:
+            self.stats.rejected += 1
+            raise CircuitOpenError(f"All circuits open for {self.name}")
+        if primary is None:
+            self.stats.failovers += 1
+        return primary, backup
+
+    def _record(self, attempt: _Attempt, success: bool) -> None:
+        if not attempt.settle():
+            return
+        latency = time.monotonic() - attempt.start
+        self.breakers[attempt.client.name].record(success, latency)
+        if success and attempt.client is self.client:
+            self.latency.add(latency)
+
+    def _remaining(self, deadline: float | None) -> float | None:
+        return None if deadline is None else deadline - time.monotonic()
+
+    def _new_attempt(
+        self, target: Target, deadline: float | None, backup: bool
+    ) -> _Attempt:
+        remaining = self._remaining(deadline)
+        timeout = None if remaining is None else max(0.0, remaining)
+        return _Attempt(target[0], target[1], timeout, backup)
+
+    # Sync path: attempts run on a thread pool so a hedge can start while the
+    # primary is still blocked. A losing call is abandoned, not interrupted;
+    # its SDK request is capped to the deadline so the thread is freed then.
+    # Attempts still running at the deadline are recorded as failures.
+
+    def _attempt(
+        self, call: Callable[[BaseLLM, Model | None], R], attempt: _Attempt
+    ) -> R:
+        try:
+            with timeout_scope(attempt.timeout):
+                result = call(attempt.client, attempt.model)
+        except Exception:
+            self._record(attempt, False)
+            raise
+        self._record(attempt, True)
+        return result
+
+    def _hedged(
+        self,
+        call: Callable[[BaseLLM, Model | None], R],
+        model: Model | None,
+        timeout: float | None,
+    ) -> R:
+        primary, backup = self._candidates(model)
+        first = primary or backup
+        assert first is not None
+        end = None if timeout is None else time.monotonic() + timeout
+        attempt = self._new_attempt(first, end, primary is None)
+        futures: dict[Future, _Attempt] = {
+            self._executor.submit(self._attempt, call, attempt): attempt
+        }
+        if primary is not None and backup is not None:
+            delay = self.hedge_delay()
+            remaining = self._remaining(end)
+            if remaining is None or delay < remaining:
+                done, _ = wait(futures, timeout=delay)
+                if not done and self.breakers[backup[0].name].allow():
+                    self.stats.hedged += 1
+                    attempt = self._new_attempt(backup, end, True)
+                    futures[self._executor.submit(self._attempt, call, attempt)] = (
+                        attempt
+                    )
+        error: BaseException | None = None
+        pending = set(futures)
+        while pending:
+            done, pending = wait(
+                pending, timeout=self._remaining(end), return_when=FIRST_COMPLETED
+            )
+            if not done:
+                for future in pending:
+                    self._record(futures[future], False)
+                raise TimeoutError(f"{self.name} did not answer before the deadline")
+            for future in done:
+                if future.exception() is None:
+                    if futures[future].backup and len(futures) > 1:
+                        self.stats.hedge_wins += 1
+                    return future.result()
+                error = future.exception()
+        assert error is not None
+        raise error
+
+    def _call(
+        self, call: Callable[[BaseLLM, Model | None], R], model: Model | None
+    ) -> R:
+        self.stats.requests += 1
+        deadline = (
+            None
+            if self.retry.deadline is None
+            else time.monotonic() + self.retry.deadline
+        )
+        for attempt in range(self.retry.max_attempts):
+            try:
+                return self._hedged(call, model, self._remaining(deadline))
+            except Exception as e:
+                delay = self.retry.backoff(attempt)
+                remaining = self._remaining(deadline)
+                if (
+                    attempt + 1 >= self.retry.max_attempts
+                    or not self.retry.retryable(e)
+                    or (remaining is not None and remaining <= delay)
+                ):
+                    raise
+            self.stats.retries += 1
+            note_retry()
+            time.sleep(delay)
+        raise AssertionError("unreachable")
+
+    # Async path: the same policy with tasks, so losing calls are cancelled.
+
+    async def _aattempt(
+        self, call: Callable[[BaseLLM, Model | None], Awaitable[R]], attempt: _Attempt
+    ) -> R:
+        try:
+            with timeout_scope(attempt.timeout):
+                result = await call(attempt.client, attempt.model)
+        except Exception:
+            self._record(attempt, False)
+            raise
+        self._record(attempt, True)
+        return result
+
+    async def _ahedged(
+        self,
+        call: Callable[[BaseLLM, Model | None], Awaitable[R]],
+        model: Model | None,
+        timeout: float | None,
+    ) -> R:
+        primary, backup = self._candidates(model)
+        first = primary or backup
+        assert first is not None
+        end = None if timeout is None else time.monotonic() + timeout
+        attempt = self._new_attempt(first, end, primary is None)
+        tasks: dict[asyncio.Task, _Attempt] = {
+            asyncio.ensure_future(self._aattempt(call, attempt)): attempt
+        }
+        try:
+            if primary is not None and backup is not None:
+                delay = self.hedge_delay()
+                remaining = self._remaining(end)
+                if remaining is None or delay < remaining:
+                    done, _ = await asyncio.wait(tasks, timeout=delay)
+                    if not done and self.breakers[backup[0].name].allow():
+                        self.stats.hedged += 1
+                        attempt = self._new_attempt(backup, end, True)
+                        tasks[asyncio.ensure_future(self._aattempt(call, attempt))] = (
+                            attempt
+                        )
+            error: BaseException | None = None
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending,
+                    timeout=self._remaining(end),
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    # Cancelled attempts never reach their own failure record.
+                    for task in pending:
+                        self._record(tasks[task], False)
+                    raise TimeoutError(
+                        f"{self.name} did not answer before the deadline"
+                    )
+                for task in done:
+                    if task.exception() is None:
+                        if tasks[task].backup and len(tasks) > 1:
+                            self.stats.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _acall(
+        self,
+        call: Callable[[BaseLLM, Model | None], Awaitable[R]],
+        model: Model | None,
+    ) -> R:
+        self.stats.requests += 1
+        deadline = (
+            None
+            if self.retry.deadline is None
+            else time.monotonic() + self.retry.deadline
+        )
+        for attempt in range(self.retry.max_attempts):
+            try:
+                return await self._ahedged(call, model, self._remaining(deadline))
+            except Exception as e:
+                delay = self.retry.backoff(attempt)
+                remaining = self._remaining(deadline)
+                if (
+                    attempt + 1 >= self.retry.max_attempts
+                    or not self.retry.retryable(e)
+                    or (remaining is not None and remaining <= delay)
+                ):
+                    raise
+            self.stats.retries += 1
+            note_retry()
+            await asyncio.sleep(delay)
+        raise AssertionError("unreachable")
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        return self._call(lambda client, m: client.single_response(messages, m), model)
+
+    def structured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return self._structured_call(messages, schema, model)[0]
+
+    def _structured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        return self._call(
+            lambda client, m: client._structured_call(messages, schema, m), model
+        )
+
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        return await self._acall(
+            lambda client, m: client.asingle_response(messages, m), model
+        )
+
+    async def astructured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return (await self._astructured_call(messages, schema, model))[0]
+
+    async def _astructured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        return await self._acall(
+            lambda client, m: client._astructured_call(messages, schema, m), model
+        )
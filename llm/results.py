@@ -0,0 +1,280 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+from llm.bulk import BulkResult
+from utils.data_handler import DataHandler
+
+_COLUMNS = (
+    "run_id, prompt_id, provider, model, prompt, content, error, latency, "
+    "created, metadata"
+)
+_FILTERS = ("run_id", "prompt_id", "provider", "model")
+
+
+def new_run_id() -> str:
+    """Sortable run id that stays unique across concurrent runs in one second."""
+    return f"{datetime.now():%Y%m%d-%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+
+def checkpoint_run_id(checkpoint: str | Path) -> str:
+    """Run id of the bulk run that owns ``checkpoint``.
+
+    The id is kept in a ``.run_id`` file next to the checkpoint. While the
+    checkpoint exists, a resumed run gets the same id back, so its records
+    land in the same run and ``ResultStore.compact`` can collapse retried
+    prompts. Without a checkpoint a new run starts with a fresh id.
+    """
+    checkpoint = Path(checkpoint)
+    path = checkpoint.with_suffix(".run_id")
+    if checkpoint.exists() and path.exists():
+        return path.read_text().strip()
+    run_id = new_run_id()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(run_id + "\n")
+    return run_id
+
+
+@dataclass
+class ResultRecord:
+    run_id: str
+    prompt_id: str
+    provider: str
+    model: str | None = None
+    prompt: str | None = None
+    content: str | None = None
+    error: str | None = None
+    latency: float = 0.0
+    created: float = field(default_factory=time.time)
+    metadata: dict[str, Any] = field(default_factory=dict)
+    id: int | None = None
+
+    @classmethod
+    def from_bulk(
+        cls, result: BulkResult, run_id: str, **metadata: Any
+    ) -> "ResultRecord":
+        return cls(
+            run_id=run_id,
+            prompt_id=result.prompt_id,
+            provider=result.provider,
+            model=result.model,
+            prompt=result.prompt,
+            content=result.content,
+            error=result.error,
+            latency=result.latency,
+            metadata=metadata,
+        )
+
+    def _row(self) -> tuple:
+        return (
+            self.run_id,
+            self.prompt_id,
+            self.provider,
+            self.model,
+            self.prompt,
+            self.content,
+            self.error,
+            self.latency,
+            self.created,
+            json.dumps(self.metadata, ensure_ascii=False) if self.metadata else None,
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "run_id": self.run_id,
+            "prompt_id": self.prompt_id,
+            "provider": self.provider,
+            "model": self.model,
+            "prompt": self.prompt,
+            "content": self.content,
+            "error": self.error,
+            "latency": self.latency,
+            "created": self.created,
+            "metadata": self.metadata,
+        }
+
+
+class ResultStore:
+    """Append-only log of experiment results in one SQLite file.
+
+    Records are only ever inserted, so a write costs one indexed append no
+    matter how much history exists. Lookups by provider, model, prompt id
+    and run id go through indexes instead of scanning files. Several
+    processes may write to the same store; WAL mode lets readers continue
+    while one of them appends.
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        data_handler: DataHandler | None = None,
+    ):
+        self.data_handler = data_handler if data_handler is not None else DataHandler()
+        if path is None:
+            path = Path("results") / "results.sqlite"
+        self.path = self.data_handler.folder_path / path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # With WAL, NORMAL only risks the last commits on power loss, not corruption.
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, run_id TEXT NOT NULL, "
+            "prompt_id TEXT NOT NULL, provider TEXT NOT NULL, model TEXT, "
+            "prompt TEXT, content TEXT, error TEXT, latency REAL NOT NULL, "
+            "created REAL NOT NULL, metadata TEXT)"
+        )
+        for column in _FILTERS:
+            self._conn.execute(
+                f"CREATE INDEX IF NOT EXISTS results_{column} ON results ({column})"
+            )
+        self._conn.commit()
+
+    def add(self, record: ResultRecord) -> int:
+        """Append one record and return its id."""
+        with self._lock:
+            cursor = self._conn.execute(
+                f"INSERT INTO results ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                record._row(),
+            )
+            self._conn.commit()
+        record.id = cursor.lastrowid
+        return record.id or 0
+
+    def add_many(self, records: Iterable[ResultRecord]) -> int:
+        """Append records in a single transaction and return how many were added."""
+        with self._lock:
+            cursor = self._conn.executemany(
+                f"INSERT INTO results ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (record._row() for record in records),
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+    def _where(
+        self,
+        filters: dict[str, str | None],
+        failed: bool | None,
+        since: float | None,
+    ) -> tuple[str, list[Any]]:
+        clauses = []
+        params: list[Any] = []
+        for column, value in filters.items():
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if failed is not None:
+            clauses.append("error IS NOT NULL" if failed else "error IS NULL")
+        if since is not None:
+            clauses.append("created >= ?")
+            params.append(since)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+    def query(
+        self,
+        run_id: str | None = None,
+        prompt_id: str | None = None,
+        provider: str | None = None,
+        model: str | None = None,
+        failed: bool | None = None,
+        since: float | None = None,
+        limit: int | None = None,
+    ) -> list[ResultRecord]:
+        """Records matching every given filter, oldest first.
+
+        ``failed`` selects only errors (True) or only successes (False).
+        """
+        where, params = self._where(
+            {
+                "run_id": run_id,
+                "prompt_id": prompt_id,
+                "provider": provider,
+                "model": model,
+            },
+            failed,
+            since,
+        )
+        sql = f"SELECT id, {_COLUMNS} FROM results{where} ORDER BY id"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        return [
+            ResultRecord(
+                id=row[0],
+                run_id=row[1],
+                prompt_id=row[2],
+                provider=row[3],
+                model=row[4],
+                prompt=row[5],
+                content=row[6],
+                error=row[7],
+                latency=row[8],
+                created=row[9],
+                metadata=json.loads(row[10]) if row[10] else {},
+            )
+            for row in rows
+        ]
+
+    def runs(self) -> list[str]:
+        """Run ids in the order they were first written."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT run_id FROM results GROUP BY run_id ORDER BY MIN(id)"
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def compact(self, drop_failed: bool = False, before: float | None = None) -> int:
+        """Drop superseded records and reclaim their space; return how many went.
+
+        A record is superseded when the same run wrote another one for the
+        same prompt, provider and model, as happens when a run is resumed
+        or retried. The latest success is kept, or the latest failure if
+        none succeeded. ``drop_failed`` removes the remaining failures and
+        ``before`` removes everything created earlier than that timestamp.
+        """
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM results WHERE id NOT IN ("
+                "SELECT COALESCE(MAX(CASE WHEN error IS NULL THEN id END), MAX(id)) "
+                "FROM results GROUP BY run_id, prompt_id, provider, model)"
+            ).rowcount
+            if drop_failed:
+                removed += self._conn.execute(
+                    "DELETE FROM results WHERE error IS NOT NULL"
+                ).rowcount
+            if before is not None:
+                removed += self._conn.execute(
+                    "DELETE FROM results WHERE created < ?", (before,)
+                ).rowcount
+            self._conn.commit()
+            if removed:
+                self._conn.execute("VACUUM")
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        return removed
+
+    def export_jsonl(self, file_name: str, **filters: Any) -> int:
+        """Write the records matching ``filters`` (see ``query``) as JSONL
+        through the data handler and return how many were written."""
+        records = self.query(**filters)
+        self.data_handler.save(
+            (record.to_dict() for record in records), file_name, format="jsonl"
+        )
+        return len(records)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self) -> None:
+        self._conn.close()
@@ -0,0 +1,395 @@
+import json
+import random
+import threading
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator, Sequence
+from dataclasses import dataclass, field
+from typing import Any, Literal, Type, TypeVar
+from llm.base import BaseLLM, LLMResponse, Message, Model, T
+from llm.registry import resolve_llm
+from llm.resilience import CircuitBreaker, CircuitOpenError, CircuitState
+from utils.pricing import estimate_cost
+from utils.tokens import TokenUsage, estimate_tokens
+
+R = TypeVar("R")
+
+RoutingStrategy = Literal["fastest", "cheapest", "weighted"]
+
+
+@dataclass
+class RoutingPolicy:
+    """How the router ranks candidates.
+
+    ``fastest`` picks the lowest latency; ``cheapest`` the lowest cost among
+    candidates meeting the SLO (``max_latency`` and ``max_error_rate``),
+    falling back to the fastest when none does; ``weighted`` the lowest sum
+    of latency and cost relative to the best candidate plus the error rate,
+    each multiplied by its weight. Candidates above ``max_error_rate`` are
+    only used when every candidate is.
+    """
+
+    strategy: RoutingStrategy = "fastest"
+    # Weight of the newest sample in the moving averages.
+    alpha: float = 0.2
+    # Calls each candidate gets before it is ranked on its averages.
+    min_samples: int = 2
+    # Share of requests sent to a random candidate so a provider that
+    # recovered can win its traffic back.
+    explore: float = 0.05
+    max_latency: float | None = None
+    max_error_rate: float = 0.25
+    latency_weight: float = 1.0
+    cost_weight: float = 1.0
+    error_weight: float = 4.0
+    failover: bool = True
+
+
+@dataclass
+class RouteState:
+    name: str
+    provider: str
+    model: str
+    calls: int = 0
+    errors: int = 0
+    # Exponentially weighted moving averages.
+    latency: float = 0.0
+    error_rate: float = 0.0
+    cost: float | None = None
+    circuit: CircuitState = "closed"
+    score: float | None = None
+
+
+@dataclass
+class RouterStats:
+    requests: int = 0
+    failovers: int = 0
+    explored: int = 0
+    rejected: int = 0
+
+
+@dataclass
+class _Route:
+    client: BaseLLM
+    model: Model | None
+    state: RouteState
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+
+
+def _call_cost(model_name: str, messages: list[Message], response: Any) -> float | None:
+    """Cost from reported usage, or from token estimates when there is none."""
+    if isinstance(response, tuple):
+        # (T, LLMResponse) from _structured_call
+        response = response[1]
+    if not isinstance(response, LLMResponse):
+        return None
+    usage = response.usage
+    if usage is None:
+        usage = TokenUsage(
+            input_tokens=sum(estimate_tokens(message.content) for message in messages),
+            output_tokens=estimate_tokens(response.content),
+        )
+    return estimate_cost(model_name, usage)
+
+
+class AdaptiveRouter(BaseLLM):
+    """A BaseLLM that sends each request to the best of several provider/models.
+
+    Every candidate keeps moving averages of latency, error rate and cost,
+    updated after each call, and a circuit breaker. Requests go to the
+    candidate ranked first by ``policy``; when it fails, the next one is
+    tried. Passing a ``model`` restricts routing to candidates serving that
+    model. ``state()`` shows the live numbers and ranking.
+    """
+
+    def __init__(
+        self,
+        candidates: Sequence[tuple[BaseLLM, Model | None]],
+        policy: RoutingPolicy | None = None,
+        rng: random.Random | None = None,
+    ) -> None:
+        if not candidates:
+            raise ValueError("AdaptiveRouter needs at least one candidate")
+        self.policy = policy if policy is not None else RoutingPolicy()
+        self.routes: list[_Route] = []
+        for client, model in candidates:
+            model_name = model.name if model else client.default_model
+            self.routes.append(
+                _Route(
+                    client,
+                    model,
+                    RouteState(f"{client.name}:{model_name}", client.name, model_name),
+                )
+            )
+        self.stats = RouterStats()
+        self.name = "router"
+        self.default_model = self.routes[0].state.model
+        self.tools = []
+        self._rng = rng if rng is not None else random.Random()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_specs(
+        cls, specs: Sequence[str], policy: RoutingPolicy | None = None
+    ) -> "AdaptiveRouter":
+        """Build from registry specs such as ``["anthropic", "openai:gpt-5-mini"]``."""
+        return cls([resolve_llm(spec) for spec in specs], policy)
+
+    # Ranking
+
+    def _score(self, route: _Route, best_latency: float, best_cost: float) -> float:
+        policy = self.policy
+        state = route.state
+        if policy.strategy == "fastest":
+            return state.latency
+        if policy.strategy == "cheapest":
+            return state.cost if state.cost is not None else float("inf")
+        cost = state.cost / best_cost if state.cost is not None and best_cost else 1.0
+        return (
+            policy.latency_weight * state.latency / (best_latency or 1.0)
+            + policy.cost_weight * cost
+            + policy.error_weight * state.error_rate
+        )
+
+    def _ranked(self, routes: list[_Route]) -> list[_Route]:
+        """Order routes best first; must be called with the lock held."""
+        policy = self.policy
+        warming = [r for r in routes if r.state.calls < policy.min_samples]
+        ready = [r for r in routes if r.state.calls >= policy.min_samples]
+        best_latency = min((r.state.latency for r in ready), default=0.0)
+        costs = [r.state.cost for r in ready if r.state.cost]
+        best_cost = min(costs, default=0.0)
+        for route in ready:
+            route.state.score = self._score(route, best_latency, best_cost)
+
+        def meets_slo(route: _Route) -> bool:
+            return route.state.error_rate <= policy.max_error_rate and (
+                policy.max_latency is None or route.state.latency <= policy.max_latency
+            )
+
+        healthy = [r for r in ready if meets_slo(r)]
+        degraded = [r for r in ready if not meets_slo(r)]
+        if policy.strategy == "cheapest":
+            # Outside the SLO, the fastest of the rest is the safest fallback.
+            degraded.sort(key=lambda r: r.state.latency)
+        else:
+            degraded.sort(key=lambda r: r.state.score or 0.0)
+        healthy.sort(key=lambda r: r.state.score or 0.0)
+        # Candidates without enough samples go first, least used first.
+        warming.sort(key=lambda r: r.state.calls)
+        return warming + healthy + degraded
+
+    def _plan(self, model: Model | None) -> list[_Route]:
+        """Routes to try for one request, in order."""
+        routes = self.routes
+        if model is not None:
+            routes = [r for r in routes if r.state.model == model.name]
+            if not routes:
+                raise ValueError(f"No route serves model {model.name}")
+        with self._lock:
+            self.stats.requests += 1
+            allowed = [r for r in routes if r.breaker.state != "open"]
+            if not allowed:
+                self.stats.rejected += 1
+                raise CircuitOpenError("All routes have open circuits")
+            ranked = self._ranked(allowed)
+            if len(ranked) > 1 and self._rng.random() < self.policy.explore:
+                self.stats.explored += 1
+                ranked.insert(0, ranked.pop(self._rng.randrange(1, len(ranked))))
+        return ranked if self.policy.failover else ranked[:1]
+
+    def _routes(self, model: Model | None) -> Iterator[_Route]:
+        """Yield the planned routes, claiming each breaker just before use.
+
+        A half-open breaker admits one probe, so routes that are never
+        reached must not take it.
+        """
+        sent = 0
+        for route in self._plan(model):
+            if not route.breaker.allow():
+                continue
+            if sent:
+                self.stats.failovers += 1
+            sent += 1
+            yield route
+        if not sent:
+            self.stats.rejected += 1
+            raise CircuitOpenError("All routes have open circuits")
+
+    def _record(
+        self, route: _Route, start: float, cost: float | None, success: bool
+    ) -> None:
+        latency = time.monotonic() - start
+        alpha = self.policy.alpha
+        route.breaker.record(success, latency)
+        with self._lock:
+            state = route.state
+            first = state.calls == 0
+            state.calls += 1
+            state.errors += not success
+            state.error_rate = (1 - alpha) * state.error_rate + alpha * (not success)
+            # Fast failures must not make a route look fast; slow ones count.
+            if success or latency > state.latency:
+                state.latency = (
+                    latency if first else (1 - alpha) * state.latency + alpha * latency
+                )
+            if cost is not None:
+                state.cost = (
+                    cost
+                    if state.cost is None
+                    else (1 - alpha) * state.cost + alpha * cost
+                )
+
+    def state(self) -> list[RouteState]:
+        """Snapshot of every route, best first, as the next request would see it."""
+        with self._lock:
+            ranked = self._ranked(list(self.routes))
+            return [
+                RouteState(**{**vars(r.state), "circuit": r.breaker.state})
+                for r in ranked
+            ]
+
+    def state_json(self) -> str:
+        return json.dumps([vars(state) for state in self.state()], indent=2)
+
+    # Dispatch
+
+    def _call(
+        self,
+        messages: list[Message],
+        model: Model | None,
+        call: Callable[[BaseLLM, Model | None], R],
+    ) -> R:
+        error: Exception | None = None
+        for route in self._routes(model):
+            start = time.monotonic()
+            try:
+                result = call(route.client, route.model)
+            except Exception as e:
+                self._record(route, start, None, False)
+                error = e
+                continue
+            self._record(
+                route, start, _call_cost(route.state.model, messages, result), True
+            )
+            return result
+        assert error is not None
+        raise error
+
+    async def _acall(
+        self,
+        messages: list[Message],
+        model: Model | None,
+        call: Callable[[BaseLLM, Model | None], Awaitable[R]],
+    ) -> R:
+        error: Exception | None = None
+        for route in self._routes(model):
+            start = time.monotonic()
+            try:
+                result = await call(route.client, route.model)
+            except Exception as e:
+                self._record(route, start, None, False)
+                error = e
+                continue
+            self._record(
+                route, start, _call_cost(route.state.model, messages, result), True
+            )
+            return result
+        assert error is not None
+        raise error
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        return self._call(
+            messages, model, lambda client, m: client.single_response(messages, m)
+        )
+
+    def structured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return self._structured_call(messages, schema, model)[0]
+
+    def _structured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        return self._call(
+            messages,
+            model,
+            lambda client, m: client._structured_call(messages, schema, m),
+        )
+
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        return await self._acall(
+            messages, model, lambda client, m: client.asingle_response(messages, m)
+        )
+
+    async def astructured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return (await self._astructured_call(messages, schema, model))[0]
+
+    async def _astructured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        return await self._acall(
+            messages,
+            model,
+            lambda client, m: client._astructured_call(messages, schema, m),
+        )
+
+    def stream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> Iterator[str | LLMResponse]:
+        """Stream from the best route; fails over only before the first delta."""
+        error: Exception | None = None
+        for route in self._routes(model):
+            start = time.monotonic()
+            started = False
+            try:
+                for item in route.client.stream_response(messages, route.model):
+                    started = True
+                    if isinstance(item, LLMResponse):
+                        self._record(
+                            route,
+                            start,
+                            _call_cost(route.state.model, messages, item),
+                            True,
+                        )
+                    yield item
+                return
+            except Exception as e:
+                self._record(route, start, None, False)
+                if started:
+                    raise
+                error = e
+        assert error is not None
+        raise error
+
+    async def astream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> AsyncIterator[str | LLMResponse]:
+        error: Exception | None = None
+        for route in self._routes(model):
+            start = time.monotonic()
+            started = False
+            try:
+                async for item in route.client.astream_response(messages, route.model):
+                    started = True
+                    if isinstance(item, LLMResponse):
+                        self._record(
+                            route,
+                            start,
+                            _call_cost(route.state.model, messages, item),
+                            True,
+                        )
+                    yield item
+                return
+            except Exception as e:
+                self._record(route, start, None, False)
+                if started:
+                    raise
+                error = e
+        assert error is not None
+        raise error
@@ -0,0 +1,191 @@
+import copy
+import json
+import re
+import threading
+import weakref
+from collections.abc import Callable
+from typing import Any, Generic, cast
+from llm.base import T
+
+# An unfinished \uXXXX escape cannot be closed yet.
+_PARTIAL_UNICODE = re.compile(r"\\u[0-9a-fA-F]{0,3}$")
+
+
+class CompiledSchema(Generic[T]):
+    """A response schema whose JSON schema and request payloads are built once.
+
+    Provider clients store their own request fragments (tool definitions,
+    response formats) with ``payload`` so repeated structured calls skip
+    schema generation entirely. Payloads are shared and must not be mutated.
+    """
+
+    def __init__(self, schema: type[T]) -> None:
+        # Weak so the cache entry does not keep its own key alive.
+        self._schema = weakref.ref(schema)
+        self.json_schema: dict[str, Any] = schema.model_json_schema()
+        self._payloads: dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def schema(self) -> type[T]:
+        schema = self._schema()
+        if schema is None:
+            raise ReferenceError("schema class has been garbage collected")
+        return schema
+
+    def payload(self, key: str, build: Callable[[], Any]) -> Any:
+        payload = self._payloads.get(key)
+        if payload is None:
+            with self._lock:
+                payload = self._payloads.setdefault(key, build())
+        return payload
+
+    def parse(self, data: str | bytes) -> T:
+        """Validate raw JSON text straight into the schema, without json.loads."""
+        return self.schema.model_validate_json(data)
+
+    def validate(self, data: Any) -> T:
+        return self.schema.model_validate(data)
+
+
+# Weak keys so schemas created on the fly are not kept alive by the cache.
+_compiled: weakref.WeakKeyDictionary[type, CompiledSchema] = weakref.WeakKeyDictionary()
+_compiled_lock = threading.Lock()
+
+
+def compile_schema(schema: type[T]) -> CompiledSchema[T]:
+    compiled = _compiled.get(schema)
+    if compiled is None:
+        with _compiled_lock:
+            compiled = _compiled.get(schema)
+            if compiled is None:
+                compiled = CompiledSchema(schema)
+                _compiled[schema] = compiled
+    return cast(CompiledSchema[T], compiled)
+
+
+def strict_json_schema(json_schema: dict[str, Any]) -> dict[str, Any]:
+    """Copy of ``json_schema`` in the strict form OpenAI structured outputs need.
+
+    Every object forbids extra keys and lists all of its properties as
+    required, ``None`` defaults are dropped (the field stays nullable), and
+    a ``$ref`` with sibling keys such as a description is inlined.
+    """
+    root = copy.deepcopy(json_schema)
+    return _strict(root, root)
+
+
+def _strict(node: dict[str, Any], root: dict[str, Any]) -> dict[str, Any]:
+    for key in ("$defs", "definitions"):
+        for definition in node.get(key, {}).values():
+            _strict(definition, root)
+    if node.get("type") == "object":
+        node.setdefault("additionalProperties", False)
+    if isinstance(properties := node.get("properties"), dict):
+        node["required"] = list(properties)
+        for prop in properties.values():
+            _strict(prop, root)
+    if isinstance(items := node.get("items"), dict):
+        _strict(items, root)
+    for variant in node.get("anyOf", []):
+        _strict(variant, root)
+    all_of = node.get("allOf", [])
+    for entry in all_of:
+        _strict(entry, root)
+    if len(all_of) == 1:
+        node.update(node.pop("allOf")[0])
+    if "default" in node and node["default"] is None:
+        del node["default"]
+    ref = node.get("$ref")
+    if ref and len(node) > 1:
+        resolved: Any = root
+        for part in ref.removeprefix("#/").split("/"):
+            resolved = resolved[part]
+        # Keys next to the $ref win over the referenced definition.
+        merged = {**copy.deepcopy(resolved), **node}
+        del merged["$ref"]
+        node.clear()
+        node.update(merged)
+        return _strict(node, root)
+    return node
+
+
+class PartialJSONParser:
+    """Turn a JSON document that is still streaming in into partial objects.
+
+    ``feed`` scans only the new characters, tracking open containers and
+    strings, and returns the most complete parseable prefix whenever it
+    changes: finished members, plus a string value that is still being
+    written. Unfinished numbers, literals and keys are left out until
+    they complete.
+    """
+
+    def __init__(self) -> None:
+        self.text = ""
+        self._closers: list[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_is_key = False
+        self._expect_key = False
+        # (end of the last complete prefix, closers needed at that point)
+        self._checkpoint: tuple[int, str] | None = None
+        self._last = ""
+
+    def _closing(self) -> str:
+        return "".join(reversed(self._closers))
+
+    def _scan(self, start: int) -> None:
+        text = self.text
+        for i in range(start, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if not self._string_is_key:
+                        self._checkpoint = (i + 1, self._closing())
+            elif char == '"':
+                self._in_string = True
+                self._string_is_key = self._expect_key
+            elif char in "{[":
+                self._closers.append("}" if char == "{" else "]")
+                self._expect_key = char == "{"
+                self._checkpoint = (i + 1, self._closing())
+            elif char in "}]":
+                if self._closers:
+                    self._closers.pop()
+                self._expect_key = False
+                self._checkpoint = (i + 1, self._closing())
+            elif char == ",":
+                # Whatever precedes a comma is a complete value.
+                self._checkpoint = (i, self._closing())
+                self._expect_key = bool(self._closers) and self._closers[-1] == "}"
+            elif char == ":":
+                self._expect_key = False
+
+    def _completion(self) -> str | None:
+        if self._in_string and not self._string_is_key and self._closers:
+            text = self.text[:-1] if self._escape else self.text
+            return _PARTIAL_UNICODE.sub("", text) + '"' + self._closing()
+        if self._checkpoint is None:
+            return None
+        end, closing = self._checkpoint
+        return self.text[:end] + closing
+
+    def feed(self, delta: str) -> Any | None:
+        """Add streamed text; return the partial value if it grew, else None."""
+        start = len(self.text)
+        self.text += delta
+        self._scan(start)
+        completion = self._completion()
+        if completion is None or completion == self._last:
+            return None
+        try:
+            value = json.loads(completion)
+        except json.JSONDecodeError:
+            return None
+        self._last = completion
+        return value
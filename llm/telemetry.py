@@ -0,0 +1,159 @@
+import time
+from collections.abc import AsyncIterator, Iterator, Sequence
+from typing import Any, Type
+from llm.base import BaseLLM, LLMResponse, Message, Model, T
+from utils.telemetry import CallRecord, Instrument, track
+
+
+def _fill(record: CallRecord, response: LLMResponse) -> None:
+    record.add_usage(response.usage)
+    record.request_id = response.request_id
+    if response.metrics is not None:
+        record.time_to_first_byte = response.metrics.time_to_first_token
+
+
+class InstrumentedLLM(BaseLLM):
+    """Wrap any BaseLLM and report every call to a set of instruments.
+
+    Each call yields one CallRecord with wall time, time to first byte
+    (streams), token usage, retries counted by inner layers such as
+    ResilientLLM, estimated cost and the provider request id.
+    """
+
+    def __init__(self, client: BaseLLM, instruments: Sequence[Instrument]) -> None:
+        self.client = client
+        self.instruments = list(instruments)
+        self.name = client.name
+        self.default_model = client.default_model
+        self.tools = client.tools
+
+    def _model_name(self, model: Model | None) -> str:
+        return model.name if model else self.default_model
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        with track(
+            self.instruments, "llm", self.name, self._model_name(model), "single"
+        ) as record:
+            response = self.client.single_response(messages, model)
+            _fill(record, response)
+            return response
+
+    def structured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return self._structured_call(messages, schema, model)[0]
+
+    def _structured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        with track(
+            self.instruments, "llm", self.name, self._model_name(model), "structured"
+        ) as record:
+            result, response = self.client._structured_call(messages, schema, model)
+            _fill(record, response)
+            return result, response
+
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        with track(
+            self.instruments, "llm", self.name, self._model_name(model), "single"
+        ) as record:
+            response = await self.client.asingle_response(messages, model)
+            _fill(record, response)
+            return response
+
+    async def astructured_response(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> T:
+        return (await self._astructured_call(messages, schema, model))[0]
+
+    async def _astructured_call(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        with track(
+            self.instruments, "llm", self.name, self._model_name(model), "structured"
+        ) as record:
+            result, response = await self.client._astructured_call(
+                messages, schema, model
+            )
+            _fill(record, response)
+            return result, response
+
+    def stream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> Iterator[str | LLMResponse]:
+        with track(
+            self.instruments,
+            "llm",
+            self.name,
+            self._model_name(model),
+            "stream",
+            bind=False,
+        ) as record:
+            start = time.perf_counter()
+            for item in self.client.stream_response(messages, model):
+                if isinstance(item, LLMResponse):
+                    _fill(record, item)
+                elif record.time_to_first_byte is None:
+                    record.time_to_first_byte = time.perf_counter() - start
+                yield item
+
+    async def astream_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> AsyncIterator[str | LLMResponse]:
+        with track(
+            self.instruments,
+            "llm",
+            self.name,
+            self._model_name(model),
+            "stream",
+            bind=False,
+        ) as record:
+            start = time.perf_counter()
+            async for item in self.client.astream_response(messages, model):
+                if isinstance(item, LLMResponse):
+                    _fill(record, item)
+                elif record.time_to_first_byte is None:
+                    record.time_to_first_byte = time.perf_counter() - start
+                yield item
+
+    def _stream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> Iterator[dict[str, Any] | T | LLMResponse]:
+        with track(
+            self.instruments,
+            "llm",
+            self.name,
+            self._model_name(model),
+            "stream_structured",
+            bind=False,
+        ) as record:
+            start = time.perf_counter()
+            for item in self.client._stream_structured(messages, schema, model):
+                if isinstance(item, LLMResponse):
+                    _fill(record, item)
+                elif record.time_to_first_byte is None:
+                    record.time_to_first_byte = time.perf_counter() - start
+                yield item
+
+    async def _astream_structured(
+        self, messages: list[Message], schema: Type[T], model: Model | None = None
+    ) -> AsyncIterator[dict[str, Any] | T | LLMResponse]:
+        with track(
+            self.instruments,
+            "llm",
+            self.name,
+            self._model_name(model),
+            "stream_structured",
+            bind=False,
+        ) as record:
+            start = time.perf_counter()
+            async for item in self.client._astream_structured(messages, schema, model):
+                if isinstance(item, LLMResponse):
+                    _fill(record, item)
+                elif record.time_to_first_byte is None:
+                    record.time_to_first_byte = time.perf_counter() - start
+                yield item
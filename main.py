@@ -1,17 +1,13 @@
-from dotenv import load_dotenv
+import asyncio
 import os
-import llm.anthropic.client
-import llm.gemini.client
-import llm.grok.client
-import llm.openai.client
-from llm.base import Message
+from llm.base import BaseLLM, LLMResponse, Message
+from llm.fanout import fan_out, fan_out_structured
+from llm.registry import get_llm, llm_registry
 from pydantic import BaseModel
-import nl_processor.embedding.openai.client
-import nl_processor.embedding.gemini.client
-import nl_processor.embedding.voyage.client
-from nl_processor.embedding.base import BaseEmbedding
+from nl_processor.embedding.registry import embedding_registry, get_embedding
+from utils.env import load_env
 
-load_dotenv()
+load_env()
 
 
 class TestBool(BaseModel):
@@ -22,11 +18,54 @@ def print_divider(text: str):
     print("\n" + "-" * 20 + "\n" + text + "\n" + "-" * 20 + "\n")
 
 
+async def print_responses(clients: list[BaseLLM], prompt: str) -> None:
+    async for result in fan_out(clients, [Message(role="user", content=prompt)]):
+        if result.error is not None:
+            print(f"{result.name}: error: {result.error}")
+        elif result.response is not None:
+            print(f"{result.name}: {result.response.content}")
+
+
+async def print_structured_responses(clients: list[BaseLLM], prompt: str) -> None:
+    async for result in fan_out_structured(
+        clients, [Message(role="user", content=prompt)], schema=TestBool
+    ):
+        if result.error is not None:
+            print(f"{result.name}: error: {result.error}")
+        elif result.response is not None:
+            print(f"{result.name}: {result.response.bool}")
+
+
+async def print_async_checks(
+    clients: list[BaseLLM], call: bool, structured: bool
+) -> None:
+    # Connections are pooled per event loop, so checks run in one loop share
+    # them instead of reconnecting for each asyncio.run.
+    if call:
+        print_divider("LLM Clients")
+        await print_responses(clients, "Say just Success")
+
+    if structured:
+        print_divider("Structured Response")
+        await print_structured_responses(clients, "Say just True")
+
+
+def print_stream_metrics(clients: list[BaseLLM], prompt: str) -> None:
+    for client in clients:
+        for item in client.stream_response([Message(role="user", content=prompt)]):
+            if isinstance(item, LLMResponse) and item.metrics is not None:
+                print(
+                    f"{client.name}: ttft={item.metrics.time_to_first_token:.2f}s "
+                    f"{item.metrics.tokens_per_second:.1f} tok/s"
+                )
+
+
 def main(
     api_key: bool = False,
     call: bool = False,
     structured: bool = False,
     embedding: bool = False,
+    stream: bool = False,
 ):
     print("Hello from agents dev!")
     if api_key:
@@ -37,41 +76,24 @@ def main(
                 f"{key} API Key: {'✓ Set' if os.getenv(f'{key}_API_KEY') else '✗ Not set'}"
             )
 
-    prompt = "Say just Success"
-    structured_prompt = "Say just True"
-    llm_clients = {
-        "anthropic": llm.anthropic.client.AnthropicLLM(),
-        "gemini": llm.gemini.client.GeminiLLM(),
-        "grok": llm.grok.client.GrokLLM(),
-        "openai": llm.openai.client.OpenAILLM(),
-    }
-    if call:
-        print_divider("LLM Clients")
-        for name, client in llm_clients.items():
-            llm_response = client.single_response(
-                [Message(role="user", content=prompt)]
-            )
-            print(f"{name}: {llm_response.content}")
+    llm_clients: list[BaseLLM] = (
+        [get_llm(name) for name in llm_registry.names()]
+        if call or structured or stream
+        else []
+    )
+    if call or structured:
+        asyncio.run(print_async_checks(llm_clients, call, structured))
 
-    if structured:
-        print_divider("Structured Response")
-        for name, client in llm_clients.items():
-            structured_response: TestBool = client.structured_response(
-                [Message(role="user", content=structured_prompt)], schema=TestBool
-            )
-            print(f"{name}: {structured_response.bool}")
+    if stream:
+        print_divider("Streaming")
+        print_stream_metrics(llm_clients, "Say just Success")
 
     if embedding:
         print_divider("Embedding")
-        embedding_clients: dict[str, BaseEmbedding] = {
-            "openai": nl_processor.embedding.openai.client.OpenAIEmbedding(),
-            "gemini": nl_processor.embedding.gemini.client.GeminiEmbedding(),
-            "voyage": nl_processor.embedding.voyage.client.VoyageEmbedding(),
-        }
-        for name, embedding_client in embedding_clients.items():
-            embedding_response = embedding_client.embed(text="Hello, world!")
+        for name in embedding_registry.names():
+            embedding_response = get_embedding(name).embed(text="Hello, world!")
             print(f"{name}: {len(embedding_response.vectors[0])}")
 
 
 if __name__ == "__main__":
-    main(api_key=True, call=True, structured=True, embedding=True)
+    main(api_key=True, call=True, structured=True, embedding=True, stream=True)
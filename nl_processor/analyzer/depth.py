@@ -0,0 +1,109 @@
+from collections.abc import Iterator
+from dataclasses import dataclass
+import numpy as np
+from spacy.tokens import Doc
+
+
+@dataclass
+class TokenDepthInfo:
+    text: str
+    depth: float
+
+
+@dataclass
+class DocDepths:
+    """Per-document dependency depths stored as flat arrays.
+
+    ``offsets``/``lengths`` locate each token in ``text``; ``depths`` are raw
+    distances to the sentence root and ``normalized`` divides them by the
+    document maximum. ``start`` is the character offset of ``text`` within
+    its source when it is a slice of a larger input.
+    """
+
+    text: str
+    offsets: np.ndarray
+    lengths: np.ndarray
+    depths: np.ndarray
+    normalized: np.ndarray
+    start: int = 0
+
+    def __len__(self) -> int:
+        return len(self.depths)
+
+    def token_texts(self) -> list[str]:
+        return [
+            self.text[offset : offset + length]
+            for offset, length in zip(self.offsets.tolist(), self.lengths.tolist())
+        ]
+
+    def token_infos(self) -> list[TokenDepthInfo]:
+        """Per-token view; builds one object per token, so only use when needed."""
+        return [
+            TokenDepthInfo(text=text, depth=depth)
+            for text, depth in zip(self.token_texts(), self.normalized.tolist())
+        ]
+
+
+def compute_depths(heads: np.ndarray) -> np.ndarray:
+    """Depth of every node given absolute head indices (roots point to themselves).
+
+    Uses pointer jumping: each round doubles how far every pointer reaches, so
+    a tree of depth d resolves in O(log d) vectorized steps with no recursion.
+    """
+    parent = heads.astype(np.int64, copy=True)
+    depth = (parent != np.arange(len(parent))).astype(np.int32)
+    # A well-formed tree converges in ceil(log2(n)) rounds; the bound also
+    # stops malformed (cyclic) input from looping forever.
+    for _ in range(max(1, int(len(parent)).bit_length())):
+        grandparent = parent[parent]
+        if np.array_equal(grandparent, parent):
+            break
+        depth += depth[parent]
+        parent = grandparent
+    return depth
+
+
+def _doc_arrays(doc: Doc) -> tuple[np.ndarray, np.ndarray]:
+    """Token (offset, length) pairs and depths, reading the doc only once."""
+    attrs = doc.to_array(["IDX", "LENGTH", "HEAD"]).view(np.int64).reshape(-1, 3)
+    heads = attrs[:, 2] + np.arange(len(attrs))
+    return attrs[:, :2].astype(np.int32), compute_depths(heads)
+
+
+def _normalized(depths: np.ndarray, normalize: bool) -> np.ndarray:
+    max_depth = int(depths.max(initial=0)) if normalize else 1
+    return depths.astype(np.float32) / (max_depth or 1)
+
+
+def doc_depths(doc: Doc, normalize: bool = True) -> DocDepths:
+    """Read token offsets and heads from ``doc`` once and compute depths."""
+    spans, depths = _doc_arrays(doc)
+    return DocDepths(
+        text=doc.text,
+        offsets=spans[:, 0],
+        lengths=spans[:, 1],
+        depths=depths,
+        normalized=_normalized(depths, normalize),
+    )
+
+
+def sentence_depths(
+    doc: Doc, start: int = 0, normalize: bool = True
+) -> Iterator[DocDepths]:
+    """Split one parsed chunk into per-sentence results normalized per sentence.
+
+    ``start`` is the chunk's character offset in its source, so each result's
+    ``start`` points into the original input.
+    """
+    spans, depths = _doc_arrays(doc)
+    for sent in doc.sents:
+        sentence = slice(sent.start, sent.end)
+        sentence_depth = depths[sentence]
+        yield DocDepths(
+            text=sent.text,
+            offsets=spans[sentence, 0] - sent.start_char,
+            lengths=spans[sentence, 1],
+            depths=sentence_depth,
+            normalized=_normalized(sentence_depth, normalize),
+            start=start + sent.start_char,
+        )
@@ -1,66 +1,124 @@
+import numpy as np
 import spacy
-from typing import Optional
-from dataclasses import dataclass
+from collections.abc import Iterable, Iterator
+from typing import Literal, Optional
+from nl_processor.analyzer.depth import (
+    DocDepths,
+    TokenDepthInfo,
+    doc_depths,
+    sentence_depths,
+)
+from nl_processor.analyzer.text_chunks import iter_text_chunks
 from utils.data_handler import DataHandler
 
-
-@dataclass
-class TokenDepthInfo:
-    text: str
-    depth: float
+# Components the dependency parse never needs; excluded so they are neither
+# loaded nor run. Unknown names are ignored by spacy.load.
+UNUSED_PIPES = ["tagger", "attribute_ruler", "lemmatizer", "ner", "senter"]
 
 
 class InfoDensityAnalyzer:
-    def __init__(self, model_name: str = "en_core_web_sm", normalize: bool = True):
+    def __init__(
+        self,
+        model_name: str = "en_core_web_sm",
+        normalize: bool = True,
+        trim_pipeline: bool = True,
+    ):
         self.model_name = model_name
         self.normalize = normalize
+        self.trim_pipeline = trim_pipeline
         self._nlp: Optional[spacy.language.Language] = None
 
     @property
     def nlp(self) -> spacy.language.Language:
         if self._nlp is None:
-            self._nlp = spacy.load(self.model_name)
+            exclude = UNUSED_PIPES if self.trim_pipeline else []
+            self._nlp = spacy.load(self.model_name, exclude=exclude)
         return self._nlp
 
-    def _calculate_depth(
-        self, idx: int, token: spacy.tokens.Token, cache: dict[int, int]
-    ) -> int:
-        if idx in cache:
-            return cache[idx]
+    def analyze_depths(self, text: str) -> DocDepths:
+        return doc_depths(self.nlp(text), self.normalize)
+
+    def analyze(self, text: str) -> list[TokenDepthInfo]:
+        return self.analyze_depths(text).token_infos()
 
-        if token.dep_ == "ROOT" or token.head == token:
-            cache[idx] = 0
-            return 0
+    def iter_batch_depths(
+        self, texts: Iterable[str], batch_size: int = 256, n_process: int = 1
+    ) -> Iterator[DocDepths]:
+        """Lazily analyze texts streamed through nlp.pipe into depth arrays.
 
-        depth = 1 + self._calculate_depth(token.head.i, token.head, cache)
-        cache[idx] = depth
-        return depth
+        ``n_process`` > 1 parses batches in worker processes; results keep
+        the input order.
+        """
+        for doc in self.nlp.pipe(texts, batch_size=batch_size, n_process=n_process):
+            yield doc_depths(doc, self.normalize)
 
-    def analyze(self, text: str) -> list[TokenDepthInfo]:
-        doc = self.nlp(text)
+    def iter_batch(
+        self, texts: Iterable[str], batch_size: int = 256, n_process: int = 1
+    ) -> Iterator[list[TokenDepthInfo]]:
+        for depths in self.iter_batch_depths(texts, batch_size, n_process):
+            yield depths.token_infos()
+
+    def iter_sentence_depths(
+        self,
+        lines: Iterable[str],
+        max_chars: int = 100_000,
+        batch_size: int = 16,
+        n_process: int = 1,
+    ) -> Iterator[DocDepths]:
+        """Stream per-sentence depths for text of any length.
+
+        Lines are grouped into paragraph/sentence-safe chunks well under
+        ``nlp.max_length`` and parsed lazily, so memory stays bounded by the
+        chunk size. Depths are normalized per sentence.
+        """
+        chunks = iter_text_chunks(lines, max_chars)
+        for doc, start in self.nlp.pipe(
+            chunks, as_tuples=True, batch_size=batch_size, n_process=n_process
+        ):
+            yield from sentence_depths(doc, start, self.normalize)
+
+    def iter_file(
+        self,
+        file_name: str,
+        data_handler: Optional[DataHandler] = None,
+        normalize_scope: Literal["sentence", "document"] = "sentence",
+        max_chars: int = 100_000,
+        batch_size: int = 16,
+        n_process: int = 1,
+    ) -> Iterator[DocDepths]:
+        """Stream per-sentence depths from a file read incrementally.
+
+        ``normalize_scope="document"`` normalizes by the maximum depth over the
+        whole file. That needs the maximum before the first result, so the file
+        is parsed twice: once to find it and once to yield results.
+        """
+        data_handler = data_handler or DataHandler()
 
-        if not doc:
-            return []
+        def sentences() -> Iterator[DocDepths]:
+            return self.iter_sentence_depths(
+                data_handler.iter_lines(file_name), max_chars, batch_size, n_process
+            )
 
-        depth_cache: dict[int, int] = {}
-        depths = [
-            self._calculate_depth(idx, token, depth_cache)
-            for idx, token in enumerate(doc)
-        ]
-        max_depth = max(depths, default=1) if self.normalize else 1
+        if normalize_scope == "sentence" or not self.normalize:
+            yield from sentences()
+            return
 
-        return [
-            TokenDepthInfo(text=token.text, depth=depth / max_depth)
-            for token, depth in zip(doc, depths)
-        ]
+        max_depth = max(
+            (int(sentence.depths.max(initial=0)) for sentence in sentences()),
+            default=0,
+        )
+        for sentence in sentences():
+            sentence.normalized = sentence.depths.astype(np.float32) / (max_depth or 1)
+            yield sentence
 
-    def analyze_batch(self, texts: list[str]) -> list[list[TokenDepthInfo]]:
-        return [self.analyze(text) for text in texts]
+    def analyze_batch(
+        self, texts: Iterable[str], batch_size: int = 256, n_process: int = 1
+    ) -> list[list[TokenDepthInfo]]:
+        return list(self.iter_batch(texts, batch_size=batch_size, n_process=n_process))
 
 
 if __name__ == "__main__":
     data_handler = DataHandler(base_folder="documents/sample")
-    text = data_handler.load("info_density_sample.txt")
     analyzer = InfoDensityAnalyzer("en_core_web_sm")
-    results = analyzer.analyze(text)
-    print(results)
+    for sentence in analyzer.iter_file("info_density_sample.txt", data_handler):
+        print(sentence.token_infos())
@@ -0,0 +1,50 @@
+import re
+from collections.abc import Iterable, Iterator
+
+# English sentence ends need trailing whitespace (so "3.14" is not a boundary);
+# Japanese full-width punctuation does not.
+SENTENCE_END = re.compile(r"[.!?]\s+|[。！？]\s*")
+
+
+def _cut_point(text: str, max_chars: int) -> int:
+    """Last sentence boundary within max_chars, else last whitespace, else hard cut."""
+    window = text[:max_chars]
+    ends = [match.end() for match in SENTENCE_END.finditer(window)]
+    if ends and ends[-1] > 0:
+        return ends[-1]
+    space = max(window.rfind(" "), window.rfind("\n"))
+    return space + 1 if space > 0 else max_chars
+
+
+def iter_text_chunks(
+    lines: Iterable[str], max_chars: int = 100_000
+) -> Iterator[tuple[str, int]]:
+    """Group lines into paragraph chunks of at most ``max_chars`` characters.
+
+    Yields ``(chunk, offset)`` where offset is the chunk's character position in
+    the concatenated input. Paragraphs end at blank lines; longer paragraphs
+    are cut at the last sentence boundary that fits, so only one chunk is held
+    in memory at a time.
+    """
+    parts: list[str] = []
+    size = 0
+    offset = 0
+    for line in lines:
+        if not line.strip():
+            if parts:
+                yield "".join(parts), offset
+                offset += size
+                parts, size = [], 0
+            offset += len(line)
+            continue
+        parts.append(line)
+        size += len(line)
+        while size > max_chars:
+            buffer = "".join(parts)
+            cut = _cut_point(buffer, max_chars)
+            yield buffer[:cut], offset
+            offset += cut
+            parts = [buffer[cut:]]
+            size = len(parts[0])
+    if parts:
+        yield "".join(parts), offset
@@ -1,5 +1,10 @@
 from abc import ABC, abstractmethod
+from collections.abc import Iterator
 from dataclasses import dataclass
+import numpy as np
+from numpy.typing import ArrayLike
+from utils.data_handler import DataHandler
+from utils.tokens import TokenUsage
 
 
 @dataclass
@@ -7,13 +12,77 @@ class EmbeddingModel:
     name: str
 
 
-@dataclass
+@dataclass(eq=False)
 class Vectors:
-    vectors: list[list[float]]
+    """Embedding matrix of shape (n, dim) stored as contiguous float32.
+
+    Lists of lists are accepted and converted on construction, and indexing,
+    ``len`` and iteration behave like the former ``list[list[float]]``.
+    """
+
+    vectors: np.ndarray
     model: str
+    usage: TokenUsage | None = None
+
+    def __post_init__(self) -> None:
+        # No copy when given a contiguous float32 array (including np.memmap).
+        vectors = np.ascontiguousarray(self.vectors, dtype=np.float32)
+        if vectors.ndim == 1:
+            vectors = vectors.reshape(1, -1) if vectors.size else vectors.reshape(0, 0)
+        self.vectors = vectors
+
+    @classmethod
+    def from_list(cls, vectors: ArrayLike, model: str) -> "Vectors":
+        return cls(vectors=np.asarray(vectors, dtype=np.float32), model=model)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def __getitem__(self, index):
+        return self.vectors[index]
+
+    def __iter__(self) -> Iterator[np.ndarray]:
+        return iter(self.vectors)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Vectors):
+            return NotImplemented
+        return self.model == other.model and np.array_equal(self.vectors, other.vectors)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1] if self.vectors.ndim == 2 else 0
+
+    def tolist(self) -> list[list[float]]:
+        return self.vectors.tolist()
+
+    def save(self, file_name: str, data_handler: DataHandler | None = None) -> None:
+        """Save as ``<file_name>.npy`` plus a ``<file_name>.json`` metadata file."""
+        data_handler = data_handler or DataHandler()
+        data_handler.save(self.vectors, f"{file_name}.npy", format="npy")
+        data_handler.save(
+            {"model": self.model, "shape": list(self.vectors.shape)},
+            f"{file_name}.json",
+            format="json",
+        )
+
+    @classmethod
+    def load(
+        cls, file_name: str, data_handler: DataHandler | None = None, mmap: bool = True
+    ) -> "Vectors":
+        """Load vectors saved with save; memory-mapped (read-only) by default."""
+        data_handler = data_handler or DataHandler()
+        meta = data_handler.load(f"{file_name}.json", format="json")
+        vectors = data_handler.load(
+            f"{file_name}.npy", format="npy_mmap" if mmap else "npy"
+        )
+        return cls(vectors=vectors, model=meta["model"])
 
 
 class BaseEmbedding(ABC):
+    name: str
+    default_model: str
+
     @abstractmethod
     def embed(
         self, text: str | list[str], model: EmbeddingModel | None = None
@@ -0,0 +1,165 @@
+import hashlib
+import json
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
+from nl_processor.embedding.base import BaseEmbedding, EmbeddingModel, Vectors
+from utils.data_handler import DataHandler
+
+DIGEST_SIZE = 16
+
+
+def text_digest(text: str) -> bytes:
+    return hashlib.blake2b(text.encode(), digest_size=DIGEST_SIZE).digest()
+
+
+@dataclass
+class EmbeddingCacheStats:
+    hits: int = 0
+    misses: int = 0
+    deduplicated: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class _ModelShard:
+    """Append-only vector file for one model plus its digest index.
+
+    ``<slug>.f32`` holds rows of raw float32 values and ``<slug>.idx`` holds
+    the matching 16-byte text digests in the same order. Vectors are written
+    before digests, so a crash can only leave unindexed trailing rows, which
+    are ignored on the next open.
+    """
+
+    def __init__(self, folder: Path, model_name: str):
+        slug = re.sub(r"[^A-Za-z0-9._-]", "_", model_name)
+        self.vectors_path = folder / f"{slug}.f32"
+        self.index_path = folder / f"{slug}.idx"
+        self.meta_path = folder / f"{slug}.json"
+        self.dim: int | None = None
+        self.rows: dict[bytes, int] = {}
+        self._map: np.memmap | None = None
+        if self.meta_path.exists():
+            self.dim = json.loads(self.meta_path.read_text())["dim"]
+        if self.index_path.exists() and self.dim is not None:
+            index = self.index_path.read_bytes()
+            stored_rows = self.vectors_path.stat().st_size // (4 * self.dim)
+            count = min(len(index) // DIGEST_SIZE, stored_rows)
+            for row in range(count):
+                digest = index[row * DIGEST_SIZE : (row + 1) * DIGEST_SIZE]
+                self.rows[digest] = row
+
+    def _vectors(self) -> np.memmap:
+        if self._map is None or self._map.shape[0] < len(self.rows):
+            assert self.dim is not None
+            self._map = np.memmap(
+                self.vectors_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(len(self.rows), self.dim),
+            )
+        return self._map
+
+    def get(self, digests: list[bytes]) -> np.ndarray:
+        return self._vectors()[[self.rows[digest] for digest in digests]]
+
+    def append(self, digests: list[bytes], vectors: np.ndarray) -> None:
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            self.meta_path.write_text(json.dumps({"dim": self.dim}))
+        start = len(self.rows)
+        # Truncate rows that were written without an index entry.
+        with open(self.vectors_path, "ab") as f:
+            f.truncate(start * 4 * self.dim)
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        with open(self.index_path, "ab") as f:
+            f.truncate(start * DIGEST_SIZE)
+            f.write(b"".join(digests))
+        for offset, digest in enumerate(digests):
+            self.rows[digest] = start + offset
+
+
+class EmbeddingStore:
+    """Persistent vector store keyed by (model name, text digest)."""
+
+    def __init__(self, folder: str | Path | None = None):
+        if folder is None:
+            folder = DataHandler().folder_path / "cache" / "embeddings"
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._shards: dict[str, _ModelShard] = {}
+        self._lock = threading.Lock()
+
+    def _shard(self, model_name: str) -> _ModelShard:
+        if model_name not in self._shards:
+            self._shards[model_name] = _ModelShard(self.folder, model_name)
+        return self._shards[model_name]
+
+    def contains(self, model_name: str, digest: bytes) -> bool:
+        with self._lock:
+            return digest in self._shard(model_name).rows
+
+    def get(self, model_name: str, digests: list[bytes]) -> np.ndarray:
+        with self._lock:
+            return np.array(self._shard(model_name).get(digests))
+
+    def put(self, model_name: str, digests: list[bytes], vectors: np.ndarray) -> None:
+        with self._lock:
+            shard = self._shard(model_name)
+            new = [i for i, digest in enumerate(digests) if digest not in shard.rows]
+            if new:
+                shard.append([digests[i] for i in new], vectors[new])
+
+
+class CachedEmbedding(BaseEmbedding):
+    """Wrap any BaseEmbedding with a persistent, deduplicating vector cache.
+
+    Identical texts within a batch are embedded once, only texts missing from
+    the store are sent upstream, and the result keeps the input order.
+    """
+
+    def __init__(self, client: BaseEmbedding, store: EmbeddingStore | None = None):
+        self.client = client
+        self.store = store if store is not None else EmbeddingStore()
+        self.name = client.name
+        self.default_model = client.default_model
+        self.stats = EmbeddingCacheStats()
+
+    def embed(
+        self, text: str | list[str], model: EmbeddingModel | None = None
+    ) -> Vectors:
+        model_name = model.name if model else self.default_model
+        texts = [text] if isinstance(text, str) else text
+        digests = [text_digest(item) for item in texts]
+
+        unique: dict[bytes, str] = {}
+        for digest, item in zip(digests, texts):
+            unique.setdefault(digest, item)
+        self.stats.deduplicated += len(texts) - len(unique)
+
+        missing = [
+            digest for digest in unique if not self.store.contains(model_name, digest)
+        ]
+        self.stats.hits += len(unique) - len(missing)
+        self.stats.misses += len(missing)
+        usage = None
+        if missing:
+            response = self.client.embed(
+                [unique[digest] for digest in missing], model=EmbeddingModel(model_name)
+            )
+            self.store.put(
+                model_name, missing, np.asarray(response.vectors, dtype=np.float32)
+            )
+            usage = response.usage
+
+        vectors = (
+            self.store.get(model_name, digests)
+            if digests
+            else np.empty((0, 0), dtype=np.float32)
+        )
+        return Vectors(vectors=vectors, model=model_name, usage=usage)
@@ -0,0 +1,145 @@
+import contextvars
+import random
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import numpy as np
+from llm.resilience import is_retryable
+from utils.telemetry import note_retry
+from utils.tokens import TokenUsage, estimate_tokens
+
+# A chunk function returns the chunk's vectors, optionally paired with the
+# token count the provider reported for it.
+ChunkResult = list[list[float]] | tuple[list[list[float]], int | None]
+
+
+@dataclass
+class ChunkConfig:
+    max_items: int = 256
+    max_tokens: int = 100_000
+    concurrency: int = 4
+    max_retries: int = 3
+    backoff: float = 0.5
+    # Auth and validation errors fail at once instead of being retried.
+    retryable: Callable[[BaseException], bool] = is_retryable
+
+
+@dataclass
+class ChunkStats:
+    index: int
+    items: int
+    tokens: int
+    latency: float = 0.0
+    attempts: int = 0
+    # Tokens billed by the provider, when it reports them.
+    usage_tokens: int | None = None
+
+
+class ChunkedDispatcher:
+    """Split embedding inputs into request-sized chunks and run them in parallel.
+
+    Chunks are bounded by both item count and estimated tokens, dispatched over
+    a thread pool of ``config.concurrency`` workers, retried with jittered
+    exponential backoff, and merged back in input order. Per-chunk timings of
+    the most recent call are kept in ``last_stats``.
+    """
+
+    def __init__(self, config: ChunkConfig):
+        self.config = config
+        self.last_stats: list[ChunkStats] = []
+
+    def split(self, texts: list[str]) -> Iterator[list[str]]:
+        chunk: list[str] = []
+        tokens = 0
+        for text in texts:
+            text_tokens = estimate_tokens(text)
+            if chunk and (
+                len(chunk) >= self.config.max_items
+                or tokens + text_tokens > self.config.max_tokens
+            ):
+                yield chunk
+                chunk, tokens = [], 0
+            chunk.append(text)
+            tokens += text_tokens
+        if chunk:
+            yield chunk
+
+    def _run_chunk(
+        self,
+        embed_chunk: Callable[[list[str]], ChunkResult],
+        chunk: list[str],
+        stats: ChunkStats,
+    ) -> np.ndarray:
+        start = time.perf_counter()
+        while True:
+            stats.attempts += 1
+            try:
+                result = embed_chunk(chunk)
+                if isinstance(result, tuple):
+                    result, stats.usage_tokens = result
+                # Convert per chunk so boxed floats never pile up for the whole batch.
+                vectors = np.asarray(result, dtype=np.float32)
+                stats.latency = time.perf_counter() - start
+                return vectors
+            except Exception as e:
+                if (
+                    stats.attempts > self.config.max_retries
+                    or not self.config.retryable(e)
+                ):
+                    raise
+                note_retry()
+                delay = self.config.backoff * 2 ** (stats.attempts - 1)
+                time.sleep(delay * (0.5 + random.random() / 2))
+
+    def run(
+        self,
+        texts: list[str],
+        embed_chunk: Callable[[list[str]], ChunkResult],
+    ) -> np.ndarray:
+        return self.run_with_usage(texts, embed_chunk)[0]
+
+    def run_with_usage(
+        self,
+        texts: list[str],
+        embed_chunk: Callable[[list[str]], ChunkResult],
+    ) -> tuple[np.ndarray, TokenUsage | None]:
+        """Like run, also summing provider-reported tokens when every chunk has them."""
+        chunks = list(self.split(texts))
+        stats = self.last_stats = [
+            ChunkStats(
+                index=i,
+                items=len(chunk),
+                tokens=sum(estimate_tokens(text) for text in chunk),
+            )
+            for i, chunk in enumerate(chunks)
+        ]
+        if len(chunks) <= 1 or self.config.concurrency <= 1:
+            results = [
+                self._run_chunk(embed_chunk, chunk, chunk_stats)
+                for chunk, chunk_stats in zip(chunks, stats)
+            ]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.config.concurrency, len(chunks))
+            ) as executor:
+                # Run each chunk in a copy of the caller's context so retries
+                # are counted against the caller's tracked call.
+                contexts = [contextvars.copy_context() for _ in chunks]
+                results = list(
+                    executor.map(
+                        lambda args: args[0].run(
+                            self._run_chunk, embed_chunk, *args[1:]
+                        ),
+                        zip(contexts, chunks, stats),
+                    )
+                )
+        reported = [chunk_stats.usage_tokens for chunk_stats in stats]
+        usage = (
+            TokenUsage(input_tokens=sum(token or 0 for token in reported))
+            if reported and None not in reported
+            else None
+        )
+        if not results:
+            return np.empty((0, 0), dtype=np.float32), usage
+        return np.concatenate(results), usage
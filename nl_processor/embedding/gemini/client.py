@@ -1,22 +1,41 @@
 from google import genai
-from dotenv import load_dotenv
+from utils.env import load_env
+from utils.http import get_pool
 import os
 from nl_processor.embedding.base import BaseEmbedding, EmbeddingModel, Vectors
+from nl_processor.embedding.chunking import ChunkConfig, ChunkedDispatcher
 
-load_dotenv()
+load_env()
+
+# batchEmbedContents accepts at most 100 requests per call.
+DEFAULT_CHUNKING = ChunkConfig(max_items=100, max_tokens=20_000)
 
 
 class GeminiEmbedding(BaseEmbedding):
-    def __init__(self):
-        self.client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))
+    def __init__(self, chunking: ChunkConfig | None = None):
+        pool = get_pool("gemini")
+        self.client = genai.Client(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            http_options=genai.types.HttpOptions(
+                httpx_client=pool.client(), httpx_async_client=pool.async_client()
+            ),
+        )
+        self.name = "gemini"
         self.default_model = "gemini-embedding-001"
+        self.dispatcher = ChunkedDispatcher(chunking or DEFAULT_CHUNKING)
+
+    def _embed_chunk(self, texts: list[str], model_name: str) -> list[list[float]]:
+        contents: list[genai.types.ContentUnion] = [*texts]
+        response = self.client.models.embed_content(model=model_name, contents=contents)
+        return [item.values or [] for item in response.embeddings or []]
 
     def embed(
         self, text: str | list[str], model: EmbeddingModel | None = None
     ) -> Vectors:
         model_name = model.name if model else self.default_model
         texts = [text] if isinstance(text, str) else text
-        response = self.client.models.embed_content(model=model_name, contents=texts)
-        vectors = [item.values for item in response.embeddings]
+        vectors, usage = self.dispatcher.run_with_usage(
+            texts, lambda chunk: self._embed_chunk(chunk, model_name)
+        )
 
-        return Vectors(vectors=vectors, model=model_name)
+        return Vectors(vectors=vectors, model=model_name, usage=usage)
@@ -0,0 +1,297 @@
+from dataclasses import dataclass
+from typing import Literal
+import numpy as np
+from numpy.typing import ArrayLike
+from nl_processor.embedding.base import Vectors
+from utils.data_handler import DataHandler
+
+Metric = Literal["cosine", "dot"]
+
+# Upper bound on the (queries x corpus) score block computed at once.
+MAX_SCORE_BLOCK = 1 << 26
+
+
+@dataclass
+class SearchResult:
+    """Top-k neighbours per query, best first; both arrays are (n_queries, k)."""
+
+    indices: np.ndarray
+    scores: np.ndarray
+
+
+def as_matrix(data: Vectors | ArrayLike) -> np.ndarray:
+    matrix = data.vectors if isinstance(data, Vectors) else data
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    return matrix.reshape(1, -1) if matrix.ndim == 1 else matrix
+
+
+def normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+def top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """Row-wise top-k of a score matrix using argpartition, sorted descending."""
+    k = min(k, scores.shape[1])
+    if k == 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+    part = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    part_scores = np.take_along_axis(scores, part, axis=1)
+    order = np.argsort(-part_scores, axis=1)
+    return (
+        np.take_along_axis(part, order, axis=1),
+        np.take_along_axis(part_scores, order, axis=1),
+    )
+
+
+class FlatIndex:
+    """Exact nearest-neighbour search with batched matrix multiplication."""
+
+    def __init__(self, metric: Metric = "cosine", batch_size: int = 1024):
+        self.metric = metric
+        self.batch_size = batch_size
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _prepare(self, data: Vectors | ArrayLike) -> np.ndarray:
+        matrix = as_matrix(data)
+        return normalize(matrix) if self.metric == "cosine" else matrix
+
+    def add(self, data: Vectors | ArrayLike) -> None:
+        matrix = self._prepare(data)
+        self.vectors = matrix if len(self) == 0 else np.vstack([self.vectors, matrix])
+
+    def search(self, queries: Vectors | ArrayLike, k: int = 10) -> SearchResult:
+        matrix = self._prepare(queries)
+        if len(self) == 0:
+            return SearchResult(
+                indices=np.empty((len(matrix), 0), np.int64),
+                scores=np.empty((len(matrix), 0), np.float32),
+            )
+        batch = max(1, min(self.batch_size, MAX_SCORE_BLOCK // max(1, len(self))))
+        indices, scores = [], []
+        for start in range(0, len(matrix), batch):
+            block_indices, block_scores = top_k(
+                matrix[start : start + batch] @ self.vectors.T, k
+            )
+            indices.append(block_indices)
+            scores.append(block_scores)
+        return SearchResult(
+            indices=np.vstack(indices) if indices else np.empty((0, 0), np.int64),
+            scores=np.vstack(scores) if scores else np.empty((0, 0), np.float32),
+        )
+
+    def save(self, name: str, data_handler: DataHandler | None = None) -> None:
+        data_handler = data_handler or DataHandler()
+        data_handler.save(self.vectors, f"{name}/vectors.npy", format="npy")
+        data_handler.save(
+            {"type": "flat", "metric": self.metric, "batch_size": self.batch_size},
+            f"{name}/meta.json",
+            format="json",
+        )
+
+    @classmethod
+    def load(
+        cls, name: str, data_handler: DataHandler | None = None, mmap: bool = True
+    ) -> "FlatIndex":
+        data_handler = data_handler or DataHandler()
+        meta = data_handler.load(f"{name}/meta.json", format="json")
+        index = cls(metric=meta["metric"], batch_size=meta["batch_size"])
+        index.vectors = data_handler.load(
+            f"{name}/vectors.npy", format="npy_mmap" if mmap else "npy"
+        )
+        return index
+
+
+class IVFIndex:
+    """Approximate search over an inverted file of k-means clusters.
+
+    Vectors are stored grouped by cluster so each probed list is one
+    contiguous slice. ``n_probe`` trades recall for speed at query time.
+    """
+
+    def __init__(
+        self,
+        n_lists: int = 256,
+        n_probe: int = 8,
+        metric: Metric = "cosine",
+        n_iter: int = 10,
+        seed: int = 0,
+    ):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.metric = metric
+        self.n_iter = n_iter
+        self.seed = seed
+        self.centroids = np.empty((0, 0), dtype=np.float32)
+        self.vectors = np.empty((0, 0), dtype=np.float32)
+        self.ids = np.empty(0, dtype=np.int64)
+        self.offsets = np.zeros(1, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    def _prepare(self, data: Vectors | ArrayLike) -> np.ndarray:
+        matrix = as_matrix(data)
+        return normalize(matrix) if self.metric == "cosine" else matrix
+
+    def _assign(self, matrix: np.ndarray) -> np.ndarray:
+        batch = max(1, MAX_SCORE_BLOCK // max(1, len(self.centroids)))
+        return np.concatenate(
+            [
+                np.argmax(matrix[start : start + batch] @ self.centroids.T, axis=1)
+                for start in range(0, len(matrix), batch)
+            ]
+        )
+
+    def train(self, data: Vectors | ArrayLike) -> None:
+        """Fit cluster centroids with spherical k-means."""
+        matrix = self._prepare(data)
+        rng = np.random.default_rng(self.seed)
+        n_lists = min(self.n_lists, len(matrix))
+        self.centroids = matrix[rng.choice(len(matrix), n_lists, replace=False)]
+        for _ in range(self.n_iter):
+            assignments = self._assign(matrix)
+            counts = np.bincount(assignments, minlength=n_lists)
+            empty = counts == 0
+            # Sort by cluster and reduce contiguous runs; much faster than add.at.
+            order = np.argsort(assignments, kind="stable")
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.zeros_like(self.centroids)
+            sums[~empty] = np.add.reduceat(matrix[order], starts[~empty], axis=0)
+            # Reseed empty clusters with random points so no list stays unused.
+            sums[empty] = matrix[rng.choice(len(matrix), int(empty.sum()))]
+            self.centroids = normalize(sums) if self.metric == "cosine" else sums
+            if self.metric == "dot":
+                self.centroids[~empty] /= counts[~empty, None]
+
+    def add(self, data: Vectors | ArrayLike) -> None:
+        """Assign the new vectors to lists and merge them into the layout.
+
+        Existing rows keep their lists and are only moved, never reassigned.
+        """
+        if len(self.centroids) == 0:
+            self.train(data)
+        matrix = self._prepare(data)
+        n_lists = len(self.centroids)
+        assignments = self._assign(matrix)
+        new_counts = np.bincount(assignments, minlength=n_lists)
+        old_counts = np.diff(self.offsets) if len(self) else np.zeros_like(new_counts)
+        offsets = np.concatenate([[0], np.cumsum(old_counts + new_counts)])
+        vectors = np.empty((offsets[-1], matrix.shape[1]), dtype=np.float32)
+        ids = np.empty(offsets[-1], dtype=np.int64)
+        if len(self):
+            # Existing rows keep their order and move up by the rows that
+            # were added to earlier lists.
+            shift = offsets[:-1] - self.offsets[:-1]
+            old_rows = np.arange(len(self)) + np.repeat(shift, old_counts)
+            vectors[old_rows] = self.vectors
+            ids[old_rows] = self.ids
+        # New rows go after the existing ones of their list.
+        order = np.argsort(assignments, kind="stable")
+        lists = assignments[order]
+        rank = np.arange(len(matrix)) - (np.cumsum(new_counts) - new_counts)[lists]
+        new_rows = offsets[lists] + old_counts[lists] + rank
+        vectors[new_rows] = matrix[order]
+        ids[new_rows] = len(self) + order
+        self.vectors, self.ids = vectors, ids
+        self.offsets = offsets.astype(np.int64)
+
+    def search(
+        self, queries: Vectors | ArrayLike, k: int = 10, n_probe: int | None = None
+    ) -> SearchResult:
+        """Search the probed lists; rows are padded with -1 / -inf past the hits.
+
+        Queries are grouped by the lists they probe, so each list is scored
+        with one matrix multiplication against its contiguous slice.
+        """
+        matrix = self._prepare(queries)
+        if len(self) == 0:
+            return SearchResult(
+                indices=np.full((len(matrix), k), -1, dtype=np.int64),
+                scores=np.full((len(matrix), k), -np.inf, dtype=np.float32),
+            )
+        n_probe = min(n_probe or self.n_probe, len(self.centroids))
+        probes, _ = top_k(matrix @ self.centroids.T, n_probe)
+        # Slot p of a query holds the top k of its p-th probed list.
+        candidate_ids = np.full((len(matrix), n_probe * k), -1, dtype=np.int64)
+        candidate_scores = np.full(
+            (len(matrix), n_probe * k), -np.inf, dtype=np.float32
+        )
+        # Flat (query, slot) positions sorted so each list's probes are adjacent.
+        pairs = np.argsort(probes, axis=None, kind="stable")
+        pair_lists = probes.ravel()[pairs]
+        bounds = np.searchsorted(pair_lists, np.arange(len(self.centroids) + 1))
+        for lst in np.unique(pair_lists):
+            start, end = self.offsets[lst], self.offsets[lst + 1]
+            if start == end:
+                continue
+            block = self.vectors[start:end]
+            batch = max(1, MAX_SCORE_BLOCK // (end - start))
+            group = pairs[bounds[lst] : bounds[lst + 1]]
+            for first in range(0, len(group), batch):
+                query_rows, slots = np.divmod(group[first : first + batch], n_probe)
+                found_indices, found_scores = top_k(matrix[query_rows] @ block.T, k)
+                columns = slots[:, None] * k + np.arange(found_indices.shape[1])
+                candidate_ids[query_rows[:, None], columns] = self.ids[
+                    start + found_indices
+                ]
+                candidate_scores[query_rows[:, None], columns] = found_scores
+        best, scores = top_k(candidate_scores, k)
+        return SearchResult(
+            indices=np.take_along_axis(candidate_ids, best, axis=1), scores=scores
+        )
+
+    def save(self, name: str, data_handler: DataHandler | None = None) -> None:
+        data_handler = data_handler or DataHandler()
+        for field in ("centroids", "vectors", "ids", "offsets"):
+            data_handler.save(getattr(self, field), f"{name}/{field}.npy", format="npy")
+        data_handler.save(
+            {
+                "type": "ivf",
+                "n_lists": self.n_lists,
+                "n_probe": self.n_probe,
+                "metric": self.metric,
+                "n_iter": self.n_iter,
+                "seed": self.seed,
+            },
+            f"{name}/meta.json",
+            format="json",
+        )
+
+    @classmethod
+    def load(
+        cls, name: str, data_handler: DataHandler | None = None, mmap: bool = True
+    ) -> "IVFIndex":
+        data_handler = data_handler or DataHandler()
+        meta = data_handler.load(f"{name}/meta.json", format="json")
+        index = cls(
+            n_lists=meta["n_lists"],
+            n_probe=meta["n_probe"],
+            metric=meta["metric"],
+            n_iter=meta["n_iter"],
+            seed=meta["seed"],
+        )
+        for field in ("centroids", "vectors", "ids", "offsets"):
+            setattr(
+                index,
+                field,
+                data_handler.load(
+                    f"{name}/{field}.npy", format="npy_mmap" if mmap else "npy"
+                ),
+            )
+        return index
+
+
+def load_index(
+    name: str, data_handler: DataHandler | None = None, mmap: bool = True
+) -> FlatIndex | IVFIndex:
+    """Load whichever index type was saved under ``name``."""
+    data_handler = data_handler or DataHandler()
+    meta = data_handler.load(f"{name}/meta.json", format="json")
+    if meta["type"] == "ivf":
+        return IVFIndex.load(name, data_handler, mmap)
+    return FlatIndex.load(name, data_handler, mmap)
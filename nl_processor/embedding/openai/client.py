@@ -1,22 +1,38 @@
 from openai import OpenAI
-from dotenv import load_dotenv
+from utils.env import load_env
+from utils.http import get_pool
 import os
 from nl_processor.embedding.base import BaseEmbedding, EmbeddingModel, Vectors
+from nl_processor.embedding.chunking import ChunkConfig, ChunkedDispatcher
 
-load_dotenv()
+load_env()
+
+# The embeddings endpoint accepts up to 2048 inputs and 300k tokens per request.
+DEFAULT_CHUNKING = ChunkConfig(max_items=2048, max_tokens=300_000)
 
 
 class OpenAIEmbedding(BaseEmbedding):
-    def __init__(self):
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, chunking: ChunkConfig | None = None):
+        self.client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"), http_client=get_pool("openai").client()
+        )
+        self.name = "openai"
         self.default_model = "text-embedding-3-small"
+        self.dispatcher = ChunkedDispatcher(chunking or DEFAULT_CHUNKING)
+
+    def _embed_chunk(
+        self, texts: list[str], model_name: str
+    ) -> tuple[list[list[float]], int]:
+        response = self.client.embeddings.create(input=texts, model=model_name)
+        return [item.embedding for item in response.data], response.usage.prompt_tokens
 
     def embed(
         self, text: str | list[str], model: EmbeddingModel | None = None
     ) -> Vectors:
         model_name = model.name if model else self.default_model
         texts = [text] if isinstance(text, str) else text
-        response = self.client.embeddings.create(input=texts, model=model_name)
-        vectors = [item.embedding for item in response.data]
+        vectors, usage = self.dispatcher.run_with_usage(
+            texts, lambda chunk: self._embed_chunk(chunk, model_name)
+        )
 
-        return Vectors(vectors=vectors, model=model_name)
+        return Vectors(vectors=vectors, model=model_name, usage=usage)
@@ -0,0 +1,20 @@
+from nl_processor.embedding.base import BaseEmbedding, EmbeddingModel
+from utils.registry import LazyRegistry
+
+embedding_registry: LazyRegistry[BaseEmbedding] = LazyRegistry(
+    {
+        "gemini": "nl_processor.embedding.gemini.client:GeminiEmbedding",
+        "openai": "nl_processor.embedding.openai.client:OpenAIEmbedding",
+        "voyage": "nl_processor.embedding.voyage.client:VoyageEmbedding",
+    }
+)
+
+
+def get_embedding(name: str) -> BaseEmbedding:
+    return embedding_registry.get(name)
+
+
+def resolve_embedding(spec: str) -> tuple[BaseEmbedding, EmbeddingModel | None]:
+    """Resolve ``"voyage"`` or ``"openai:text-embedding-3-large"``."""
+    client, model_name = embedding_registry.resolve(spec)
+    return client, EmbeddingModel(name=model_name) if model_name else None
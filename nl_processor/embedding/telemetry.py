@@ -0,0 +1,26 @@
+from collections.abc import Sequence
+from nl_processor.embedding.base import BaseEmbedding, EmbeddingModel, Vectors
+from utils.telemetry import Instrument, track
+
+
+class InstrumentedEmbedding(BaseEmbedding):
+    """Wrap any BaseEmbedding and report every embed call to a set of instruments."""
+
+    def __init__(
+        self, client: BaseEmbedding, instruments: Sequence[Instrument]
+    ) -> None:
+        self.client = client
+        self.instruments = list(instruments)
+        self.name = client.name
+        self.default_model = client.default_model
+
+    def embed(
+        self, text: str | list[str], model: EmbeddingModel | None = None
+    ) -> Vectors:
+        model_name = model.name if model else self.default_model
+        with track(
+            self.instruments, "embedding", self.name, model_name, "embed"
+        ) as record:
+            vectors = self.client.embed(text, model)
+            record.add_usage(vectors.usage)
+            return vectors
@@ -1,15 +1,30 @@
 import voyageai
-from dotenv import load_dotenv
+from utils.env import load_env
 import os
+from typing import cast
 from nl_processor.embedding.base import BaseEmbedding, EmbeddingModel, Vectors
+from nl_processor.embedding.chunking import ChunkConfig, ChunkedDispatcher
 
-load_dotenv()
+load_env()
+
+# voyage-3.5 accepts up to 1000 texts and 320k tokens per request.
+DEFAULT_CHUNKING = ChunkConfig(max_items=1000, max_tokens=320_000)
 
 
 class VoyageEmbedding(BaseEmbedding):
-    def __init__(self):
-        self.client = voyageai.Client(api_key=os.getenv("VOYAGE_API_KEY"))
+    def __init__(self, chunking: ChunkConfig | None = None):
+        self.client = voyageai.Client(
+            api_key=os.getenv("VOYAGE_API_KEY"), base_url=os.getenv("VOYAGE_BASE_URL")
+        )
+        self.name = "voyage"
         self.default_model = "voyage-3.5"
+        self.dispatcher = ChunkedDispatcher(chunking or DEFAULT_CHUNKING)
+
+    def _embed_chunk(
+        self, texts: list[str], model_name: str
+    ) -> tuple[list[list[float]], int]:
+        result = self.client.embed(texts, model=model_name, input_type="document")
+        return cast(list[list[float]], result.embeddings), result.total_tokens
 
     def embed(
         self, text: str | list[str], model: EmbeddingModel | None = None
@@ -17,7 +32,8 @@ class VoyageEmbedding(BaseEmbedding):
         model_name = model.name if model else self.default_model
 
         texts = [text] if isinstance(text, str) else text
-        result = self.client.embed(texts, model=model_name, input_type="document")
-        vectors = result.embeddings
+        vectors, usage = self.dispatcher.run_with_usage(
+            texts, lambda chunk: self._embed_chunk(chunk, model_name)
+        )
 
-        return Vectors(vectors=vectors, model=model_name)
+        return Vectors(vectors=vectors, model=model_name, usage=usage)
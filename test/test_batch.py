@@ -0,0 +1,309 @@
+import email
+import email.policy
+import json
+import tempfile
+import threading
+from types import SimpleNamespace
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from llm.base import Message, Model
+from llm.batch import BatchRunner
+from utils.data_handler import DataHandler
+
+PROMPTS = {"contents": ["first prompt", "please fail", "third prompt"]}
+
+
+class BatchState:
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict] = {}
+        self.polls: dict[str, int] = {}
+        self.url = ""
+
+
+class FakeBatchHandler(BaseHTTPRequestHandler):
+    """Local stand-in for the OpenAI and Anthropic batch endpoints.
+
+    Jobs report in-progress on the first poll and finish on the second;
+    prompts containing "fail" produce a per-request error.
+    """
+
+    protocol_version = "HTTP/1.1"
+    state: BatchState
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, data: dict | bytes, status: int = 200) -> None:
+        body = data if isinstance(data, bytes) else json.dumps(data).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _poll(self, batch_id: str) -> bool:
+        self.state.polls[batch_id] = self.state.polls.get(batch_id, 0) + 1
+        return self.state.polls[batch_id] >= 2
+
+    def _openai_batch(self, batch_id: str, done: bool) -> dict:
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": "/v1/responses",
+            "completion_window": "24h",
+            "created_at": 0,
+            "input_file_id": "file-input",
+            "status": "completed" if done else "in_progress",
+            "output_file_id": f"{batch_id}-output" if done else None,
+        }
+
+    def _anthropic_batch(self, batch_id: str, done: bool) -> dict:
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if done else "in_progress",
+            "request_counts": {
+                "processing": 0,
+                "succeeded": 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0,
+            },
+            "created_at": "2025-01-01T00:00:00Z",
+            "expires_at": "2025-01-02T00:00:00Z",
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "ended_at": None,
+            "results_url": (
+                f"{self.state.url}/v1/messages/batches/{batch_id}/results"
+                if done
+                else None
+            ),
+        }
+
+    def do_POST(self):
+        body = self._body()
+        if self.path == "/v1/files":
+            message = email.message_from_bytes(
+                f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body,
+                policy=email.policy.HTTP,
+            )
+            for part in message.iter_parts():
+                if part.get_param("name", header="content-disposition") == "file":
+                    self.state.files["file-input"] = part.get_payload(decode=True)
+            self._send(
+                {
+                    "id": "file-input",
+                    "object": "file",
+                    "bytes": 0,
+                    "created_at": 0,
+                    "filename": "batch.jsonl",
+                    "purpose": "batch",
+                    "status": "processed",
+                }
+            )
+        elif self.path == "/v1/batches":
+            batch_id = f"batch-{len(self.state.batches)}"
+            lines = []
+            for line in self.state.files["file-input"].decode().splitlines():
+                request = json.loads(line)
+                text = request["body"]["input"][-1]["content"]
+                if "fail" in text:
+                    response = {"status_code": 400, "body": {"error": "bad prompt"}}
+                else:
+                    response = {
+                        "status_code": 200,
+                        "body": {
+                            "output": [
+                                {
+                                    "type": "message",
+                                    "content": [
+                                        {"type": "output_text", "text": f"echo: {text}"}
+                                    ],
+                                }
+                            ]
+                        },
+                    }
+                lines.append(
+                    json.dumps(
+                        {"custom_id": request["custom_id"], "response": response}
+                    )
+                )
+            self.state.files[f"{batch_id}-output"] = "\n".join(lines).encode()
+            self.state.batches[batch_id] = json.loads(body)
+            self._send(self._openai_batch(batch_id, False))
+        elif self.path == "/v1/messages/batches":
+            batch_id = f"msgbatch-{len(self.state.batches)}"
+            self.state.batches[batch_id] = json.loads(body)
+            self._send(self._anthropic_batch(batch_id, False))
+        else:
+            self._send({"error": "not found"}, 404)
+
+    def do_GET(self):
+        parts = self.path.strip("/").split("/")
+        if parts[:2] == ["v1", "batches"]:
+            self._send(self._openai_batch(parts[2], self._poll(parts[2])))
+        elif parts[:2] == ["v1", "files"] and parts[-1] == "content":
+            self._send(self.state.files[parts[2]])
+        elif parts[:3] == ["v1", "messages", "batches"] and parts[-1] == "results":
+            lines = []
+            for request in self.state.batches[parts[3]]["requests"]:
+                text = request["params"]["messages"][-1]["content"]
+                if "fail" in text:
+                    result = {
+                        "type": "errored",
+                        "error": {
+                            "type": "error",
+                            "error": {
+                                "type": "invalid_request_error",
+                                "message": "bad prompt",
+                            },
+                        },
+                    }
+                else:
+                    result = {
+                        "type": "succeeded",
+                        "message": {
+                            "id": "msg",
+                            "type": "message",
+                            "role": "assistant",
+                            "model": request["params"]["model"],
+                            "content": [{"type": "text", "text": f"echo: {text}"}],
+                            "stop_reason": "end_turn",
+                            "stop_sequence": None,
+                            "usage": {"input_tokens": 1, "output_tokens": 1},
+                        },
+                    }
+                lines.append(
+                    json.dumps({"custom_id": request["custom_id"], "result": result})
+                )
+            self._send("\n".join(lines).encode())
+        elif parts[:3] == ["v1", "messages", "batches"]:
+            self._send(self._anthropic_batch(parts[3], self._poll(parts[3])))
+        else:
+            self._send({"error": "not found"}, 404)
+
+
+@pytest.fixture
+def server(monkeypatch):
+    state = BatchState()
+    handler = type("Handler", (FakeBatchHandler,), {"state": state})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    state.url = url
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{url}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", url)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def check_results(results):
+    assert [result.prompt_id for result in results] == ["0", "1", "2"]
+    assert results[0].content == "echo: first prompt"
+    assert results[1].content is None and "bad prompt" in (results[1].error or "")
+    assert results[2].content == "echo: third prompt"
+
+
+class TestOpenAIBatch:
+    """OpenAI Batch APIのテスト"""
+
+    def test_round_trip(self, server):
+        """投入・ポーリング・結果の対応付けができること"""
+        from llm.openai.client import OpenAILLM
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            runner = BatchRunner(OpenAILLM(), DataHandler(temp_dir))
+            results = runner.run("lang", PROMPTS, Model("gpt-5-mini"), interval=0)
+            check_results(results)
+            assert all(result.model == "gpt-5-mini" for result in results)
+            submitted = server.files["file-input"].decode().splitlines()
+            assert json.loads(submitted[0])["body"]["model"] == "gpt-5-mini"
+
+
+class TestAnthropicBatch:
+    """Anthropic Message Batchesのテスト"""
+
+    def test_round_trip(self, server):
+        """投入・ポーリング・結果の対応付けができること"""
+        from llm.anthropic.client import AnthropicLLM
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            runner = BatchRunner(AnthropicLLM(), DataHandler(temp_dir))
+            check_results(runner.run("lang", PROMPTS, interval=0))
+
+
+class TestGeminiBatch:
+    """Gemini Batch Modeのテスト"""
+
+    def test_system_prompt_serialized(self, monkeypatch):
+        """システムプロンプトがsystem_instructionとして各リクエストに載ること"""
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        from llm.gemini.batch import GeminiBatch
+        from llm.gemini.client import GeminiLLM
+
+        messages = [
+            Message(role="system", content="Answer briefly."),
+            Message(role="user", content="first prompt"),
+        ]
+        plain = [Message(role="user", content="second prompt")]
+        payload = GeminiBatch(GeminiLLM()).serialize(
+            [("0", messages), ("1", plain)], None
+        )
+        assert payload[0]["config"] == {"system_instruction": "Answer briefly."}
+        assert payload[0]["contents"] == [
+            {"role": "user", "parts": [{"text": "first prompt"}]}
+        ]
+        assert "config" not in payload[1]
+
+
+class TestBatchState:
+    """ジョブ状態の永続化のテスト"""
+
+    def test_resume_from_saved_state(self, server):
+        """別のランナーから保存済みジョブを再開できること"""
+        from llm.anthropic.client import AnthropicLLM
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            data_handler = DataHandler(temp_dir)
+            job = BatchRunner(AnthropicLLM(), data_handler).submit("lang", PROMPTS)
+            assert job.status == "running"
+            assert (data_handler.folder_path / "batches" / "lang.json").exists()
+
+            runner = BatchRunner(AnthropicLLM(), data_handler)
+            assert runner.submit("lang", PROMPTS).job_id == job.job_id
+            assert len(server.batches) == 1
+            assert runner.poll("lang").status == "running"
+            assert runner.poll("lang").status == "completed"
+            check_results(runner.collect("lang"))
+
+    def test_collect_before_completion(self, server):
+        """完了前の回収はエラーになること"""
+        from llm.anthropic.client import AnthropicLLM
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            runner = BatchRunner(AnthropicLLM(), DataHandler(temp_dir))
+            runner.submit("lang", PROMPTS)
+            with pytest.raises(ValueError):
+                runner.collect("lang")
+
+    def test_unsupported_provider(self):
+        """バッチAPIのないプロバイダはValueError"""
+        from llm.batch import get_batch_backend
+
+        with pytest.raises(ValueError):
+            get_batch_backend(SimpleNamespace(name="grok"))
@@ -0,0 +1,68 @@
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from dev.benchmark.fake_servers import FakeConfig, FakeProviderServer
+from dev.benchmark.suite import BenchmarkAnswer, SuiteConfig, compare, run_suite
+from llm.base import Message
+
+
+def report(**values: tuple[float, bool]) -> dict:
+    return {
+        "results": {
+            name: {"value": value, "unit": "ms", "higher_is_better": higher}
+            for name, (value, higher) in values.items()
+        }
+    }
+
+
+class TestFakeProviderServer:
+    """ローカルの疑似プロバイダサーバのテスト"""
+
+    def test_sdks_talk_to_fake_server(self):
+        """各SDKが疑似サーバと通信できること"""
+        with FakeProviderServer(FakeConfig(payload_chars=64)) as server:
+            from llm.anthropic.client import AnthropicLLM
+            from llm.openai.client import OpenAILLM
+
+            messages = [Message(role="user", content="hi")]
+            assert len(OpenAILLM().single_response(messages).content) == 64
+            answer = AnthropicLLM().structured_response(messages, BenchmarkAnswer)
+            assert answer.title == "benchmark"
+            assert server.stats.requests == {
+                "openai.responses": 1,
+                "anthropic.messages": 1,
+            }
+        assert os.environ.get("OPENAI_BASE_URL") != server.environ()["OPENAI_BASE_URL"]
+
+
+class TestSuite:
+    """ベンチマークスイートのテスト"""
+
+    def test_run_suite(self):
+        """指定したベンチマークの結果がJSON形式で返ること"""
+        config = SuiteConfig(repeat=2, embedding_texts=20, data_records=50)
+        result = run_suite(config, only=["convert", "embedding", "data_handler"])
+        results = result["results"]
+        assert results["convert.grok_us"]["unit"] == "us"
+        assert results["embedding.voyage.texts_per_s"]["higher_is_better"]
+        assert "data_handler.load_json_ms" in results
+        assert not any(name.startswith("client.") for name in results)
+        assert result["config"]["repeat"] == 2
+
+    def test_compare_detects_regressions(self):
+        """許容範囲を超えて悪化した項目だけが報告されること"""
+        baseline = report(latency=(10.0, False), throughput=(100.0, True))
+        current = report(latency=(12.0, False), throughput=(70.0, True))
+        regressions = compare(current, baseline, tolerance=0.25)
+        assert len(regressions) == 1
+        assert regressions[0].startswith("throughput")
+        assert compare(current, baseline, tolerance=0.5) == []
+
+    def test_compare_ignores_new_and_missing(self):
+        """片方にしかない項目は比較しないこと"""
+        baseline = report(old=(1.0, False))
+        current = report(new=(5.0, False))
+        assert compare(current, baseline, tolerance=0.1) == []
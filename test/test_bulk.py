@@ -0,0 +1,119 @@
+import asyncio
+import json
+import tempfile
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from llm.base import BaseLLM, LLMResponse, Message, Model, T
+from llm.bulk import BulkRunner, ProviderLimits, TokenBucket, load_prompts
+from utils.data_handler import DataHandler
+
+
+class EchoLLM(BaseLLM):
+    def __init__(self, name: str = "echo", delay: float = 0.0, fail_on: str = ""):
+        self.name = name
+        self.default_model = "echo-1"
+        self.delay = delay
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        self.calls += 1
+        time.sleep(self.delay)
+        if messages[-1].content == self.fail_on:
+            raise RuntimeError("failed")
+        return LLMResponse(content=messages[-1].content.upper())
+
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        raise NotImplementedError
+
+
+class TestLoadPrompts:
+    """プロンプトJSONの読み込みテスト"""
+
+    def test_contents_format(self):
+        """{"contents": [...]}形式を受け付けること"""
+        assert load_prompts({"contents": ["a", "b"]}) == [("0", "a"), ("1", "b")]
+
+
+class TestTokenBucket:
+    """トークンバケットのテスト"""
+
+    def test_rate_limit_delays_requests(self):
+        """容量を超えるリクエストが待たされること"""
+        bucket = TokenBucket(rate_per_minute=600, capacity=1)
+
+        async def take_three():
+            for _ in range(3):
+                await bucket.acquire()
+
+        start = time.perf_counter()
+        asyncio.run(take_three())
+        assert time.perf_counter() - start >= 0.15
+
+
+class TestBulkRunner:
+    """BulkRunnerのテスト"""
+
+    def test_runs_all_prompts_concurrently(self):
+        """全プロンプトが並列で実行されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = EchoLLM(delay=0.1)
+            runner = BulkRunner(
+                [client],
+                limits={"echo": ProviderLimits(concurrency=8)},
+                data_handler=DataHandler(temp_dir),
+                on_progress=None,
+            )
+            start = time.perf_counter()
+            results = runner.run({"contents": [f"p{i}" for i in range(8)]})
+            assert time.perf_counter() - start < 0.5
+            assert sorted(r.content for r in results) == [f"P{i}" for i in range(8)]
+
+    def test_default_model_recorded(self):
+        """モデル未指定の結果にもクライアントの既定モデルが記録されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            runner = BulkRunner(
+                [EchoLLM(name="a"), EchoLLM(name="b")],
+                models={"b": Model(name="echo-2")},
+                data_handler=DataHandler(temp_dir),
+                on_progress=None,
+            )
+            results = runner.run({"contents": ["x"]})
+            assert {(r.provider, r.model) for r in results} == {
+                ("a", "echo-1"),
+                ("b", "echo-2"),
+            }
+
+    def test_resume_from_checkpoint(self):
+        """チェックポイントから再開し、完了済みをスキップすること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            prompts = {"contents": ["a", "b", "c"]}
+
+            first = EchoLLM(fail_on="b")
+            runner = BulkRunner(
+                [first], checkpoint="run.jsonl", data_handler=handler, on_progress=None
+            )
+            results = runner.run(prompts)
+            assert sum(r.error is not None for r in results) == 1
+
+            second = EchoLLM()
+            runner = BulkRunner(
+                [second], checkpoint="run.jsonl", data_handler=handler, on_progress=None
+            )
+            results = runner.run(prompts)
+            assert second.calls == 1
+            assert [r.prompt_id for r in results] == ["1"]
+
+            with open(os.path.join(temp_dir, "run.jsonl")) as f:
+                records = [json.loads(line) for line in f]
+            assert sorted(r["prompt_id"] for r in records) == ["0", "1", "2"]
@@ -0,0 +1,200 @@
+import asyncio
+import tempfile
+import threading
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydantic import BaseModel
+from llm.base import BaseLLM, LLMResponse, Message, Model, T
+from llm.cache import CachedLLM, ResponseStore, cache_key
+
+
+class Answer(BaseModel):
+    value: int
+
+
+class CountingLLM(BaseLLM):
+    def __init__(self):
+        self.name = "counting"
+        self.default_model = "count-1"
+        self.tools = []
+        self.calls = 0
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        self.calls += 1
+        return LLMResponse(content=f"reply {self.calls}")
+
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        self.calls += 1
+        return schema.model_validate({"value": self.calls})
+
+
+MESSAGES = [Message(role="user", content="hello")]
+
+
+class TestCacheKey:
+    """キャッシュキーのテスト"""
+
+    def test_key_depends_on_inputs(self):
+        """モデル・メッセージ・スキーマでキーが変わること"""
+        base = cache_key("p", "m", MESSAGES, [])
+        assert base == cache_key("p", "m", MESSAGES, [])
+        assert base != cache_key("p", "m2", MESSAGES, [])
+        assert base != cache_key("p", "m", [Message(role="user", content="x")], [])
+        assert base != cache_key("p", "m", MESSAGES, [{"type": "web_search"}])
+        assert base != cache_key("p", "m", MESSAGES, [], schema=Answer)
+
+
+class TestResponseStore:
+    """ResponseStoreのテスト"""
+
+    def test_lru_size_eviction(self):
+        """サイズ上限を超えると最も古くアクセスされたものから削除されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ResponseStore(os.path.join(temp_dir, "c.sqlite"), max_bytes=20)
+            store.put("a", "x" * 10)
+            store.put("b", "y" * 10)
+            time.sleep(0.01)
+            assert store.get("a") is not None
+            store.put("c", "z" * 10)
+            assert store.get("b") is None
+            assert store.get("a") == "x" * 10
+            assert len(store) == 2
+
+    def test_age_eviction(self):
+        """有効期限切れのエントリが返されないこと"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ResponseStore(os.path.join(temp_dir, "c.sqlite"), max_age=0.01)
+            store.put("a", "value")
+            time.sleep(0.02)
+            assert store.get("a") is None
+
+    def test_persistence(self):
+        """再オープン後もエントリが残ること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "c.sqlite")
+            ResponseStore(path).put("a", "value")
+            assert ResponseStore(path).get("a") == "value"
+
+    def test_hits_do_not_commit(self):
+        """ヒットごとにコミットせず、アクセス時刻は次の書き込みで保存されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "c.sqlite")
+            store = ResponseStore(path)
+            store.put("a", "value")
+            changes = store._conn.total_changes
+            for _ in range(10):
+                assert store.get("a") == "value"
+            assert store._conn.total_changes == changes
+            accessed = store._touched["a"]
+            store.close()
+            reopened = ResponseStore(path)
+            row = reopened._conn.execute("SELECT accessed FROM entries").fetchone()
+            assert row[0] == accessed
+            reopened.close()
+
+    def test_wal_and_indexes(self):
+        """WALモードで開き、削除に使う列に索引があること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ResponseStore(os.path.join(temp_dir, "c.sqlite"), max_age=60)
+            conn = store._conn
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+            plan = conn.execute(
+                "EXPLAIN QUERY PLAN DELETE FROM entries WHERE created < ?", (0,)
+            ).fetchall()
+            assert "entries_created" in str(plan)
+            store.close()
+
+
+class TestCachedLLM:
+    """CachedLLMのテスト"""
+
+    def test_read_through(self):
+        """2回目の呼び出しがキャッシュから返されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = CountingLLM()
+            cached = CachedLLM(client, ResponseStore(os.path.join(temp_dir, "c")))
+            first = cached.single_response(MESSAGES)
+            second = cached.single_response(MESSAGES)
+            assert first == second
+            assert client.calls == 1
+            assert (cached.stats.hits, cached.stats.misses) == (1, 1)
+
+    def test_structured_rehydration(self):
+        """構造化レスポンスがスキーマに復元されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = CountingLLM()
+            cached = CachedLLM(client, ResponseStore(os.path.join(temp_dir, "c")))
+            cached.structured_response(MESSAGES, Answer)
+            result = asyncio.run(cached.astructured_response(MESSAGES, Answer))
+            assert isinstance(result, Answer)
+            assert result.value == 1
+            assert client.calls == 1
+
+    def test_async_store_off_event_loop(self):
+        """非同期呼び出しではストアの読み書きがイベントループ外で行われること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ResponseStore(os.path.join(temp_dir, "c"))
+            threads = []
+
+            def record(method):
+                def wrapper(*args):
+                    threads.append(threading.get_ident())
+                    return method(*args)
+
+                return wrapper
+
+            store.get = record(store.get)  # type: ignore[method-assign]
+            store.put = record(store.put)  # type: ignore[method-assign]
+            cached = CachedLLM(CountingLLM(), store)
+
+            async def run():
+                await cached.asingle_response(MESSAGES)
+                await cached.astructured_response(MESSAGES, Answer)
+                return threading.get_ident()
+
+            loop_thread = asyncio.run(run())
+            assert len(threads) == 4
+            assert loop_thread not in threads
+
+    def test_stats_from_threads(self):
+        """複数スレッドからのヒットが欠けずに数えられること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            cached = CachedLLM(
+                CountingLLM(), ResponseStore(os.path.join(temp_dir, "c"))
+            )
+            cached.single_response(MESSAGES)
+
+            def hit():
+                for _ in range(200):
+                    cached.single_response(MESSAGES)
+
+            threads = [threading.Thread(target=hit) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert (cached.stats.hits, cached.stats.misses) == (1600, 1)
+
+    def test_write_through_and_bypass(self):
+        """write_throughは常に更新し、bypassはストアに触れないこと"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = ResponseStore(os.path.join(temp_dir, "c"))
+            client = CountingLLM()
+            CachedLLM(client, store, mode="write_through").single_response(MESSAGES)
+            CachedLLM(client, store, mode="write_through").single_response(MESSAGES)
+            reader = CachedLLM(client, store)
+            assert reader.single_response(MESSAGES).content == "reply 2"
+
+            bypass = CachedLLM(client, store, mode="bypass")
+            assert bypass.single_response(MESSAGES).content == "reply 3"
+            assert reader.single_response(MESSAGES).content == "reply 2"
@@ -0,0 +1,190 @@
+import json
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from typer.testing import CliRunner
+from cli.main import cli
+from llm.base import BaseLLM, LLMResponse, Message, Model, T
+from llm.registry import llm_registry
+from llm.results import ResultStore
+from utils.data_handler import DataHandler
+
+runner = CliRunner()
+
+
+class UpperLLM(BaseLLM):
+    def __init__(self):
+        self.name = "upper"
+        self.default_model = "upper-1"
+        self.calls = 0
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        self.calls += 1
+        if messages[-1].content == "fail":
+            raise RuntimeError("failed")
+        return LLMResponse(content=messages[-1].content.upper())
+
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        raise NotImplementedError
+
+
+@pytest.fixture
+def folder():
+    with tempfile.TemporaryDirectory() as temp_dir:
+        yield temp_dir
+
+
+@pytest.fixture
+def upper():
+    client = UpperLLM()
+    llm_registry.register("upper", lambda: client)  # type: ignore[arg-type,return-value]
+    yield client
+    llm_registry._targets.pop("upper")
+
+
+class TestDataCommands:
+    """dataコマンドのテスト"""
+
+    def test_write_and_read_jsonl(self, folder):
+        """標準入力のJSONLを1行ずつ保存し、1行ずつ出力すること"""
+        lines = "".join(json.dumps({"id": i}) + "\n" for i in range(100))
+        result = runner.invoke(
+            cli,
+            ["data", "write", "r.jsonl", "--format", "jsonl", "--folder", folder],
+            input=lines,
+        )
+        assert result.exit_code == 0, result.output
+        assert len(DataHandler(folder).load("r.jsonl", format="jsonl")) == 100
+        result = runner.invoke(
+            cli,
+            ["data", "read", "r.jsonl", "--format", "jsonl", "--folder", folder]
+            + ["--limit", "3"],
+        )
+        assert [json.loads(line) for line in result.output.splitlines()] == [
+            {"id": 0},
+            {"id": 1},
+            {"id": 2},
+        ]
+
+    def test_write_stdin_text_in_chunks(self, folder):
+        """標準入力のテキストがそのまま保存されること"""
+        text = "line\n" * 300_000
+        result = runner.invoke(
+            cli, ["data", "write", "big.txt", "--folder", folder], input=text
+        )
+        assert result.exit_code == 0, result.output
+        assert DataHandler(folder).load("big.txt") == text
+        result = runner.invoke(cli, ["data", "read", "big.txt", "--folder", folder])
+        assert result.output == text
+
+    def test_read_json(self, folder):
+        """JSONがJSONとして出力されること"""
+        runner.invoke(
+            cli,
+            ["data", "write", "d.json", "--data", '{"key": "value"}']
+            + ["--format", "json", "--folder", folder],
+        )
+        result = runner.invoke(
+            cli, ["data", "read", "d.json", "--format", "json", "--folder", folder]
+        )
+        assert json.loads(result.output) == {"key": "value"}
+
+    def test_invalid_jsonl_leaves_no_file(self, folder):
+        """不正な行があればファイルを残さないこと"""
+        result = runner.invoke(
+            cli,
+            ["data", "write", "bad.jsonl", "--format", "jsonl", "--folder", folder],
+            input='{"ok": 1}\nnot json\n',
+        )
+        assert result.exit_code != 0
+        assert os.listdir(folder) == []
+
+
+class TestRunCommand:
+    """runコマンドのテスト"""
+
+    def invoke(self, folder, *args):
+        return runner.invoke(
+            cli, ["run", "prompts.json", "-p", "upper", "--folder", folder, *args]
+        )
+
+    def test_streams_results(self, folder, upper):
+        """結果がJSONLで標準出力に流れること"""
+        DataHandler(folder).save({"contents": ["a", "b", "c"]}, "prompts.json", "json")
+        result = self.invoke(folder, "--concurrency", "2", "--rate-limit", "600")
+        assert result.exit_code == 0, result.output
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        assert sorted(record["content"] for record in records) == ["A", "B", "C"]
+        assert {record["provider"] for record in records} == {"upper"}
+
+    def test_resume_and_output_file(self, folder, upper):
+        """再開時は完了済みを飛ばし、出力ファイルに追記すること"""
+        handler = DataHandler(folder)
+        handler.save({"contents": ["a", "fail"]}, "prompts.json", "json")
+        result = self.invoke(folder, "-o", "out.jsonl")
+        assert result.exit_code == 1
+        handler.save({"contents": ["a", "b"]}, "prompts.json", "json")
+        result = self.invoke(folder, "-o", "out.jsonl", "--resume", "--store")
+        assert result.exit_code == 0, result.output
+        assert upper.calls == 3
+        records = handler.load("out.jsonl", format="jsonl")
+        assert sorted((r["prompt_id"], r["error"] is None) for r in records) == [
+            ("0", True),
+            ("1", False),
+            ("1", True),
+        ]
+        store = ResultStore(data_handler=handler)
+        assert [r.content for r in store.query()] == ["B"]
+        store.close()
+
+    def test_resume_keeps_run_id(self, folder, upper):
+        """再開した実行は同じrun idで記録され、compactで再試行がまとまること"""
+        handler = DataHandler(folder)
+        handler.save({"contents": ["a", "fail"]}, "prompts.json", "json")
+        assert self.invoke(folder, "--store").exit_code == 1
+        handler.save({"contents": ["a", "b"]}, "prompts.json", "json")
+        assert self.invoke(folder, "--store", "--resume").exit_code == 0
+        assert self.invoke(folder, "--store").exit_code == 0
+        store = ResultStore(data_handler=handler)
+        first, second = store.runs()
+        assert len(store.query(run_id=first)) == 3
+        assert {r.model for r in store.query()} == {"upper-1"}
+        assert store.compact() == 1
+        assert [r.content for r in store.query(run_id=first)] == ["A", "B"]
+        assert len(store.query(run_id=second)) == 2
+        store.close()
+
+    def test_jsonl_prompts(self, folder, upper):
+        """JSONLの文字列とpromptフィールドを読み、不正な行は拒否すること"""
+        handler = DataHandler(folder)
+        handler.save(["a", {"prompt": "b", "tag": "x"}], "prompts.jsonl", "jsonl")
+        args = ["run", "prompts.jsonl", "-p", "upper", "--folder", folder]
+        result = runner.invoke(cli, args)
+        assert result.exit_code == 0, result.output
+        records = [json.loads(line) for line in result.stdout.splitlines()]
+        assert sorted((r["prompt_id"], r["content"]) for r in records) == [
+            ("0", "A"),
+            ("1", "B"),
+        ]
+
+        handler.save(["a", {"text": "b"}], "prompts.jsonl", "jsonl")
+        result = runner.invoke(cli, args)
+        assert result.exit_code == 2
+        assert "record 2" in result.output
+        assert upper.calls == 2
+
+    def test_fresh_run_ignores_checkpoint(self, folder, upper):
+        """--resumeなしでは最初から実行すること"""
+        DataHandler(folder).save({"contents": ["a"]}, "prompts.json", "json")
+        self.invoke(folder)
+        self.invoke(folder)
+        assert upper.calls == 2
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 import tempfile
 from pathlib import Path
@@ -7,6 +8,7 @@ import os
 # Add the parent directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from utils import data_handler
 from utils.data_handler import DataHandler
 
 
@@ -113,6 +115,160 @@ class TestDataHandlerLoadSaveJSON:
                 assert "\n" in content
 
 
+class TestDataHandlerLoadSaveNpy:
+    """NumPy配列の読み書きテスト"""
+
+    def test_save_and_load_npy(self):
+        """.npyファイルの保存と読み込み"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            test_data = np.arange(12, dtype=np.float32).reshape(3, 4)
+
+            handler.save(test_data, "data.npy", format="npy")
+            loaded_data = handler.load("data.npy", format="npy")
+
+            assert np.array_equal(loaded_data, test_data)
+
+    def test_load_npy_mmap(self):
+        """メモリマップで読み込めること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            test_data = np.ones((5, 3), dtype=np.float32)
+
+            handler.save(test_data, "data.npy", format="npy")
+            loaded_data = handler.load("data.npy", format="npy_mmap")
+
+            assert isinstance(loaded_data, np.memmap)
+            assert np.array_equal(loaded_data, test_data)
+
+
+class TestDataHandlerJsonl:
+    """JSONLのストリーミング読み書きテスト"""
+
+    def test_append_and_iter(self):
+        """追記したレコードが順に読み出されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            assert (
+                handler.append_jsonl([{"id": 1}, {"id": 2}], "out/records.jsonl") == 2
+            )
+            handler.append_jsonl(({"id": i} for i in range(3, 5)), "out/records.jsonl")
+
+            records = handler.iter_jsonl("out/records.jsonl")
+            assert not isinstance(records, list)
+            assert [record["id"] for record in records] == [1, 2, 3, 4]
+
+    def test_save_and_load_jsonl(self):
+        """jsonl形式で保存・読み込みできること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            records = [{"text": "日本語"}, {"values": [1.5, None]}]
+            handler.save(records, "records.jsonl", format="jsonl")
+            assert handler.load("records.jsonl", format="jsonl") == records
+
+    def test_blank_lines_skipped(self):
+        """空行は読み飛ばされること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            handler.save('{"a": 1}\n\n{"a": 2}\n', "records.jsonl")
+            assert handler.load("records.jsonl", format="jsonl") == [{"a": 1}, {"a": 2}]
+
+    def test_invalid_line(self):
+        """壊れた行は行番号付きでValueErrorになること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            handler.save('{"a": 1}\n{broken\n', "records.jsonl")
+            with pytest.raises(ValueError, match="records.jsonl:2"):
+                list(handler.iter_jsonl("records.jsonl"))
+
+
+class TestDataHandlerAtomicSave:
+    """アトミックな保存のテスト"""
+
+    def test_failed_save_keeps_original(self):
+        """保存に失敗しても元のファイルが残り、一時ファイルも残らないこと"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            handler.save({"version": 1}, "state.json", format="json")
+
+            def records():
+                yield {"ok": True}
+                raise RuntimeError("interrupted")
+
+            with pytest.raises(IOError):
+                handler.save(records(), "state.json", format="jsonl")
+            assert handler.load("state.json", format="json") == {"version": 1}
+            assert os.listdir(temp_dir) == ["state.json"]
+
+    def test_bytes_roundtrip(self):
+        """バイト列を保存・読み込みできること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            handler.save(b"\x00\x01binary", "blob.bin", format="bytes")
+            assert handler.load("blob.bin", format="bytes") == b"\x00\x01binary"
+
+
+class TestDataHandlerMmap:
+    """メモリマップ読み込みのテスト"""
+
+    def test_load_mmap(self):
+        """ファイル全体を読み込まずに参照できること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            handler.save("line 1\nline 2\n", "large.txt")
+            with handler.load("large.txt", format="mmap") as mapped:
+                assert mapped[:6] == b"line 1"
+                assert mapped.find(b"line 2") == 7
+
+    def test_load_empty_mmap(self):
+        """空ファイルは空のバイト列になること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            handler.save("", "empty.txt")
+            assert handler.load("empty.txt", format="mmap") == b""
+
+
+class TestFastJson:
+    """高速JSONエンコードのテスト"""
+
+    @pytest.mark.parametrize("fast", [True, False])
+    def test_same_result_with_and_without_orjson(self, fast):
+        """orjsonの有無で結果が変わらないこと"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir, fast_json=fast)
+            data = {"text": "日本語", "nested": {"list": [1, 2.5, None, True]}}
+            handler.save(data, "data.json", format="json")
+            assert handler.load("data.json", format="json") == data
+
+    @pytest.mark.parametrize("indent", [True, False])
+    def test_same_bytes_with_and_without_orjson(self, indent):
+        """orjsonの有無で書き出されるバイト列が同じこと"""
+        data = {"text": "日本語", "nested": {"list": [1, 2.5, None, True]}}
+        assert data_handler.dumps(data, indent, fast=True) == data_handler.dumps(
+            data, indent, fast=False
+        )
+
+    def test_non_finite_floats_kept(self):
+        """NaNや無限大がnullに置き換わらないこと"""
+        data = {"scores": [1.0, float("nan"), float("inf")]}
+        encoded = data_handler.dumps(data)
+        assert encoded == b'{"scores":[1.0,NaN,Infinity]}'
+        assert data_handler.dumps(np.array([np.nan])) == b"[NaN]"
+        assert data_handler.dumps({"value": None}) == b'{"value":null}'
+
+    def test_fallback_for_unsupported_values(self):
+        """orjsonが扱えない値は標準のjsonで処理されること"""
+        big = {"id": 2**70}
+        assert data_handler.loads(data_handler.dumps(big)) == big
+        assert data_handler.loads("[NaN]")[0] != 0
+
+    def test_numpy_values(self):
+        """NumPyの配列をJSONにできること"""
+        if data_handler.orjson is None:
+            pytest.skip("orjson is not installed")
+        assert data_handler.loads(data_handler.dumps(np.arange(3))) == [0, 1, 2]
+
+
 class TestDataHandlerErrors:
     """エラーハンドリングテスト"""
 
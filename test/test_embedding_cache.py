@@ -0,0 +1,67 @@
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from nl_processor.embedding.base import BaseEmbedding, EmbeddingModel, Vectors
+from nl_processor.embedding.cache import CachedEmbedding, EmbeddingStore
+
+
+class FakeEmbedding(BaseEmbedding):
+    def __init__(self) -> None:
+        self.name = "fake"
+        self.default_model = "fake-embed"
+        self.requests: list[list[str]] = []
+
+    def embed(
+        self, text: str | list[str], model: EmbeddingModel | None = None
+    ) -> Vectors:
+        texts = [text] if isinstance(text, str) else text
+        self.requests.append(texts)
+        vectors = [[float(len(t)), float(ord(t[0])), 0.5] for t in texts]
+        return Vectors.from_list(vectors, model=model.name if model else "fake-embed")
+
+
+class TestCachedEmbedding:
+    """CachedEmbeddingのテスト"""
+
+    def test_dedup_within_batch(self):
+        """バッチ内の重複テキストが一度だけ送信され、順序が保たれること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = FakeEmbedding()
+            cached = CachedEmbedding(client, EmbeddingStore(temp_dir))
+            result = cached.embed(["aa", "b", "aa", "ccc"])
+            assert client.requests == [["aa", "b", "ccc"]]
+            assert [v[0] for v in result.vectors] == [2.0, 1.0, 2.0, 3.0]
+            assert cached.stats.deduplicated == 1
+
+    def test_only_misses_sent_upstream(self):
+        """キャッシュ済みテキストは再送信されないこと"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = FakeEmbedding()
+            cached = CachedEmbedding(client, EmbeddingStore(temp_dir))
+            cached.embed(["aa", "b"])
+            result = cached.embed(["b", "new", "aa"])
+            assert client.requests[-1] == ["new"]
+            assert [v[0] for v in result.vectors] == [1.0, 3.0, 2.0]
+            assert cached.stats.hits == 2
+
+    def test_persistence_across_instances(self):
+        """別インスタンスでもディスクから読み出せること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            CachedEmbedding(FakeEmbedding(), EmbeddingStore(temp_dir)).embed(["x"])
+            client = FakeEmbedding()
+            result = CachedEmbedding(client, EmbeddingStore(temp_dir)).embed("x")
+            assert client.requests == []
+            assert result.tolist() == [[1.0, 120.0, 0.5]]
+
+    def test_models_are_separate(self):
+        """モデルごとにキャッシュが分かれること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            client = FakeEmbedding()
+            cached = CachedEmbedding(client, EmbeddingStore(temp_dir))
+            cached.embed("x")
+            cached.embed("x", model=EmbeddingModel("other/model"))
+            assert len(client.requests) == 2
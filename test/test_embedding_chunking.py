@@ -0,0 +1,99 @@
+import threading
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from nl_processor.embedding.chunking import ChunkConfig, ChunkedDispatcher
+
+
+def fake_embed(chunk: list[str]) -> list[list[float]]:
+    return [[float(len(text))] for text in chunk]
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+class TestChunkedDispatcher:
+    """ChunkedDispatcherのテスト"""
+
+    def test_split_by_items(self):
+        """件数上限で分割されること"""
+        dispatcher = ChunkedDispatcher(ChunkConfig(max_items=2, max_tokens=10_000))
+        chunks = list(dispatcher.split(["a", "b", "c", "d", "e"]))
+        assert chunks == [["a", "b"], ["c", "d"], ["e"]]
+
+    def test_split_by_tokens(self):
+        """推定トークン数の上限で分割されること"""
+        dispatcher = ChunkedDispatcher(ChunkConfig(max_items=100, max_tokens=10))
+        chunks = list(dispatcher.split(["x" * 15, "x" * 15, "x" * 60]))
+        assert [len(chunk) for chunk in chunks] == [2, 1]
+
+    def test_results_keep_input_order(self):
+        """並列実行後も入力順に結合されること"""
+        dispatcher = ChunkedDispatcher(ChunkConfig(max_items=3, concurrency=4))
+        texts = ["x" * i for i in range(1, 20)]
+        assert dispatcher.run(texts, fake_embed).tolist() == [
+            [float(i)] for i in range(1, 20)
+        ]
+        assert len(dispatcher.last_stats) == 7
+        assert all(stats.latency >= 0 for stats in dispatcher.last_stats)
+
+    def test_chunks_run_concurrently(self):
+        """チャンクが並列に送信されること"""
+        dispatcher = ChunkedDispatcher(ChunkConfig(max_items=1, concurrency=4))
+
+        def slow_embed(chunk: list[str]) -> list[list[float]]:
+            time.sleep(0.1)
+            return fake_embed(chunk)
+
+        start = time.perf_counter()
+        dispatcher.run(["a", "b", "c", "d"], slow_embed)
+        assert time.perf_counter() - start < 0.3
+
+    def test_retry_failed_chunk(self):
+        """失敗したチャンクが再試行されること"""
+        dispatcher = ChunkedDispatcher(ChunkConfig(max_items=1, backoff=0.0))
+        failures = {"b": 2}
+        lock = threading.Lock()
+
+        def flaky_embed(chunk: list[str]) -> list[list[float]]:
+            with lock:
+                if failures.get(chunk[0], 0) > 0:
+                    failures[chunk[0]] -= 1
+                    raise RuntimeError("transient")
+            return fake_embed(chunk)
+
+        assert dispatcher.run(["a", "b"], flaky_embed).tolist() == [[1.0], [1.0]]
+        assert [stats.attempts for stats in dispatcher.last_stats] == [1, 3]
+
+    def test_give_up_after_max_retries(self):
+        """再試行上限を超えると例外が送出されること"""
+        dispatcher = ChunkedDispatcher(ChunkConfig(max_retries=1, backoff=0.0))
+
+        def broken_embed(chunk: list[str]) -> list[list[float]]:
+            raise RuntimeError("down")
+
+        with pytest.raises(RuntimeError):
+            dispatcher.run(["a"], broken_embed)
+
+    def test_client_errors_not_retried(self):
+        """認証や入力の誤りは再試行せず、レート制限は再試行すること"""
+        dispatcher = ChunkedDispatcher(ChunkConfig(max_retries=3, backoff=0.0))
+        calls = []
+
+        def rejected_embed(chunk: list[str]) -> list[list[float]]:
+            calls.append(chunk)
+            raise StatusError(status_code)
+
+        for status_code, attempts in ((401, 1), (400, 1), (429, 4)):
+            calls.clear()
+            with pytest.raises(StatusError):
+                dispatcher.run(["a"], rejected_embed)
+            assert len(calls) == attempts
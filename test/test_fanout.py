@@ -0,0 +1,82 @@
+import asyncio
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from pydantic import BaseModel
+from llm.base import BaseLLM, LLMResponse, Message, Model, T
+from llm.fanout import fan_out, fan_out_structured
+
+
+class Answer(BaseModel):
+    value: str
+
+
+class SleepyLLM(BaseLLM):
+    def __init__(self, name: str, delay: float, fail: bool = False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("boom")
+        return LLMResponse(content=f"{self.name}:{messages[-1].content}")
+
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        time.sleep(self.delay)
+        return schema.model_validate({"value": self.name})
+
+
+async def collect(iterator):
+    return [item async for item in iterator]
+
+
+class TestFanOut:
+    """fan_outの並列実行テスト"""
+
+    def test_results_in_completion_order(self):
+        """完了した順に結果が返ること"""
+        clients = [SleepyLLM("slow", 0.2), SleepyLLM("fast", 0.01)]
+        results = asyncio.run(
+            collect(fan_out(clients, [Message(role="user", content="hi")]))
+        )
+        assert [r.name for r in results] == ["fast", "slow"]
+        assert results[0].response == LLMResponse(content="fast:hi")
+
+    def test_latency_is_max_not_sum(self):
+        """レイテンシが合計ではなく最大値に近いこと"""
+        clients = [SleepyLLM(f"llm{i}", 0.2) for i in range(4)]
+        start = time.perf_counter()
+        asyncio.run(collect(fan_out(clients, [Message(role="user", content="hi")])))
+        assert time.perf_counter() - start < 0.6
+
+    def test_error_does_not_cancel_others(self):
+        """一つのプロバイダの失敗が他に影響しないこと"""
+        clients = [SleepyLLM("bad", 0.0, fail=True), SleepyLLM("good", 0.05)]
+        results = asyncio.run(
+            collect(fan_out(clients, [Message(role="user", content="hi")]))
+        )
+        by_name = {r.name: r for r in results}
+        assert isinstance(by_name["bad"].error, RuntimeError)
+        assert by_name["good"].response is not None
+
+    def test_structured(self):
+        """構造化出力の並列実行"""
+        clients = [SleepyLLM("a", 0.0), SleepyLLM("b", 0.0)]
+        results = asyncio.run(
+            collect(
+                fan_out_structured(
+                    clients, [Message(role="user", content="hi")], schema=Answer
+                )
+            )
+        )
+        assert sorted(r.response.value for r in results if r.response) == ["a", "b"]
@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from utils import http
+from utils.http import ConnectionPool, PoolConfig, configure_pool, get_pool
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"ok"
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server_url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+class TestConnectionPool:
+    """ConnectionPoolのテスト"""
+
+    def test_sync_requests_reuse_connection(self, server_url):
+        """同期リクエストが接続を再利用すること"""
+        pool = ConnectionPool()
+        client = pool.client()
+        for _ in range(5):
+            assert client.get(server_url).text == "ok"
+        stats = pool.stats()
+        assert stats.requests == 5
+        assert stats.connections_opened == 1
+        assert stats.reuse_rate == pytest.approx(0.8)
+        assert stats.open_connections == 1
+        assert stats.idle_connections == 1
+        pool.close()
+
+    def test_async_requests_reuse_connection(self, server_url):
+        """非同期リクエストが接続を再利用すること"""
+        pool = ConnectionPool()
+
+        async def run():
+            client = pool.async_client()
+            for _ in range(3):
+                response = await client.get(server_url)
+                assert response.text == "ok"
+
+        asyncio.run(run())
+        stats = pool.stats()
+        assert stats.requests == 3
+        assert stats.connections_opened == 1
+
+    def test_async_client_across_loops(self, server_url):
+        """同じ非同期クライアントを別のイベントループでも使えること"""
+        pool = ConnectionPool()
+        client = pool.async_client()
+
+        async def get():
+            response = await client.get(server_url)
+            return response.text
+
+        assert [asyncio.run(get()) for _ in range(3)] == ["ok"] * 3
+        assert pool.stats().requests == 3
+        assert len(pool._loop_clients) == 1
+
+    def test_clients_are_shared(self):
+        """同じプールからは同じクライアントが返ること"""
+        pool = ConnectionPool(PoolConfig(max_connections=4))
+        assert pool.client() is pool.client()
+        assert pool.async_client() is pool.async_client()
+        assert pool.client()._transport._pool._max_connections == 4  # type: ignore[attr-defined]
+        pool.close()
+
+    def test_sdk_close_keeps_pool_open(self, server_url):
+        """SDK側がクライアントを閉じてもプールは使い続けられること"""
+        pool = ConnectionPool()
+        pool.client().close()
+        assert pool.client().get(server_url).text == "ok"
+        pool.close()
+        assert pool.client() is not None
+
+
+class TestPoolRegistry:
+    """プロバイダ単位のプール管理のテスト"""
+
+    def test_configure_before_use(self, monkeypatch):
+        """使用前なら設定を変更できること"""
+        monkeypatch.setattr(http, "_pools", {})
+        configure_pool("fake", PoolConfig(keepalive_expiry=5.0))
+        assert get_pool("fake").config.keepalive_expiry == 5.0
+        assert get_pool("fake") is get_pool("fake")
+
+    def test_configure_after_use(self, monkeypatch):
+        """使用後の設定変更はエラーになること"""
+        monkeypatch.setattr(http, "_pools", {})
+        get_pool("fake").client()
+        with pytest.raises(RuntimeError):
+            configure_pool("fake", PoolConfig())
+        get_pool("fake").close()
+
+    def test_providers_share_pool(self, monkeypatch):
+        """LLMと埋め込みのクライアントが同じプールを使うこと"""
+        monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+        from llm.openai.client import OpenAILLM
+        from nl_processor.embedding.openai.client import OpenAIEmbedding
+
+        assert OpenAILLM().client._client is OpenAIEmbedding().client._client
@@ -0,0 +1,173 @@
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import spacy
+from spacy.language import Language
+from spacy.tokens import Doc
+import numpy as np
+import pytest
+from nl_processor.analyzer.depth import compute_depths
+from nl_processor.analyzer.info_density import InfoDensityAnalyzer
+from nl_processor.analyzer.text_chunks import iter_text_chunks
+from utils.data_handler import DataHandler
+
+
+@Language.component("chain_parser")
+def chain_parser(doc: Doc) -> Doc:
+    """各トークンの親を直前のトークンにする簡易パーサ(深さ = インデックス)"""
+    for token in doc:
+        if token.i == 0:
+            token.head = token
+            token.dep_ = "ROOT"
+        else:
+            token.head = doc[token.i - 1]
+            token.dep_ = "dep"
+    return doc
+
+
+def make_analyzer(normalize: bool = True) -> InfoDensityAnalyzer:
+    analyzer = InfoDensityAnalyzer(normalize=normalize)
+    nlp = spacy.blank("en")
+    nlp.add_pipe("chain_parser")
+    analyzer._nlp = nlp
+    return analyzer
+
+
+class TestComputeDepths:
+    """ポインタジャンプによる深さ計算のテスト"""
+
+    def test_tree(self):
+        """分岐のある木で正しい深さを返すこと"""
+        #     1
+        #   / | \
+        #  0  2  4
+        #     |
+        #     3
+        heads = np.array([1, 1, 1, 2, 1])
+        assert compute_depths(heads).tolist() == [1, 0, 1, 2, 1]
+
+    def test_multiple_roots(self):
+        """複数の文(根)を含む場合"""
+        heads = np.array([0, 0, 1, 3, 3])
+        assert compute_depths(heads).tolist() == [0, 1, 2, 0, 1]
+
+    def test_deep_chain_without_recursion(self):
+        """再帰上限を超える深さでも計算できること"""
+        n = sys.getrecursionlimit() * 3
+        heads = np.maximum(np.arange(n) - 1, 0)
+        assert compute_depths(heads).tolist() == list(range(n))
+
+    def test_empty(self):
+        """空配列"""
+        assert compute_depths(np.array([], dtype=np.int64)).tolist() == []
+
+
+class TestInfoDensityAnalyzer:
+    """InfoDensityAnalyzerのテスト"""
+
+    def test_analyze(self):
+        """深さが正規化されて返ること"""
+        results = make_analyzer().analyze("a b c d e")
+        assert [r.depth for r in results] == [0.0, 0.25, 0.5, 0.75, 1.0]
+
+    def test_analyze_without_normalize(self):
+        """正規化なしでは生の深さが返ること"""
+        results = make_analyzer(normalize=False).analyze("a b c")
+        assert [r.depth for r in results] == [0, 1, 2]
+
+    def test_analyze_depths_arrays(self):
+        """配列形式で位置と深さが返ること"""
+        depths = make_analyzer().analyze_depths("ab c def")
+        assert depths.offsets.tolist() == [0, 3, 5]
+        assert depths.depths.tolist() == [0, 1, 2]
+        assert depths.normalized.tolist() == [0.0, 0.5, 1.0]
+        assert depths.token_texts() == ["ab", "c", "def"]
+
+    def test_analyze_empty(self):
+        """空文字列では空リストが返ること"""
+        assert make_analyzer().analyze("") == []
+
+    def test_batch_matches_single(self):
+        """バッチ処理の結果が個別処理と一致すること"""
+        analyzer = make_analyzer()
+        texts = ["a b c", "", "one two three four"]
+        assert analyzer.analyze_batch(texts, batch_size=2) == [
+            analyzer.analyze(text) for text in texts
+        ]
+
+    def test_iter_batch_is_lazy(self):
+        """iter_batchがジェネレータとして逐次処理すること"""
+        analyzer = make_analyzer()
+        consumed = []
+
+        def texts():
+            for text in ["a b", "c d e"]:
+                consumed.append(text)
+                yield text
+
+        iterator = analyzer.iter_batch(texts(), batch_size=1)
+        assert consumed == []
+        assert [r.text for r in next(iterator)] == ["a", "b"]
+
+    def test_batch_multiprocess(self):
+        """複数プロセスでも入力順が保たれること"""
+        analyzer = make_analyzer()
+        texts = [" ".join(["w"] * n) for n in range(1, 9)]
+        results = analyzer.analyze_batch(texts, batch_size=2, n_process=2)
+        assert [len(r) for r in results] == list(range(1, 9))
+
+
+class TestTextChunks:
+    """テキスト分割のテスト"""
+
+    def test_paragraphs(self):
+        """空行で段落に分割され、オフセットが元テキストを指すこと"""
+        text = "a b\nc\n\nd e\n\n\nf\n"
+        chunks = list(iter_text_chunks(text.splitlines(keepends=True)))
+        assert [chunk for chunk, _ in chunks] == ["a b\nc\n", "d e\n", "f\n"]
+        for chunk, offset in chunks:
+            assert text[offset : offset + len(chunk)] == chunk
+
+    def test_long_paragraph_cut_at_sentence(self):
+        """長い段落は文の境界で分割されること"""
+        text = "One two. Three four. Five six seven eight nine."
+        chunks = list(iter_text_chunks([text], max_chars=25))
+        assert chunks[0] == ("One two. Three four. ", 0)
+        assert "".join(chunk for chunk, _ in chunks) == text
+        assert all(len(chunk) <= 25 for chunk, _ in chunks)
+
+    def test_japanese_sentence_boundary(self):
+        """日本語の句点で分割されること"""
+        chunks = list(iter_text_chunks(["これは文です。次の文です。"], max_chars=10))
+        assert chunks[0][0] == "これは文です。"
+
+
+class TestStreamingAnalysis:
+    """ストリーミング解析のテスト"""
+
+    def test_iter_file(self):
+        """ファイルを逐次読み込み、文ごとの結果を返すこと"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            handler.save("a b c\n\nd e\n", "book.txt")
+            sentences = list(make_analyzer().iter_file("book.txt", handler))
+            assert [s.token_texts()[:2] for s in sentences] == [["a", "b"], ["d", "e"]]
+            assert sentences[1].start == 7
+            assert sentences[1].normalized.max() == 1.0
+
+    def test_document_normalization(self):
+        """文書全体の最大深さで正規化されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            handler.save("a b c d e\n\nf g\n", "book.txt")
+            sentences = list(
+                make_analyzer().iter_file(
+                    "book.txt", handler, normalize_scope="document"
+                )
+            )
+            # 1文目は改行トークンを含めて最大深さ5
+            assert sentences[1].normalized.tolist()[:2] == pytest.approx([0.0, 0.2])
@@ -0,0 +1,245 @@
+import json
+import threading
+from types import SimpleNamespace
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from llm.base import Message, TokenUsage, prefix_key, split_system
+
+SYSTEM = Message(role="system", content="You are a terse assistant. " * 50)
+CONVERSATION = [
+    SYSTEM,
+    Message(role="user", content="first question"),
+    Message(role="assistant", content="first answer"),
+    Message(role="user", content="follow-up"),
+]
+
+
+class RecordingHandler(BaseHTTPRequestHandler):
+    """Stand-in for the Messages and Responses endpoints that records requests."""
+
+    protocol_version = "HTTP/1.1"
+    requests: list
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.requests.append(request)
+        if self.path.endswith("/messages"):
+            reply = {
+                "id": "msg",
+                "type": "message",
+                "role": "assistant",
+                "model": request["model"],
+                "content": [{"type": "text", "text": "ok"}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {
+                    "input_tokens": 10,
+                    "output_tokens": 2,
+                    "cache_read_input_tokens": 300,
+                    "cache_creation_input_tokens": 0,
+                },
+            }
+        else:
+            reply = {
+                "id": "resp",
+                "object": "response",
+                "created_at": 0,
+                "model": request["model"],
+                "status": "completed",
+                "output": [
+                    {
+                        "type": "message",
+                        "id": "out",
+                        "role": "assistant",
+                        "status": "completed",
+                        "content": [
+                            {"type": "output_text", "text": "ok", "annotations": []}
+                        ],
+                    }
+                ],
+                "usage": {
+                    "input_tokens": 1200,
+                    "input_tokens_details": {"cached_tokens": 1024},
+                    "output_tokens": 3,
+                    "output_tokens_details": {"reasoning_tokens": 0},
+                    "total_tokens": 1203,
+                },
+            }
+        body = json.dumps(reply).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def recorded(monkeypatch):
+    requests: list = []
+    handler = type("Handler", (RecordingHandler,), {"requests": requests})
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", url)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{url}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    yield requests
+    server.shutdown()
+    server.server_close()
+
+
+class TestPrefixHelpers:
+    """プレフィックス関連の共通処理のテスト"""
+
+    def test_split_system(self):
+        """システムメッセージと会話を分離できること"""
+        system, rest = split_system(CONVERSATION)
+        assert system == [SYSTEM.content]
+        assert [message.role for message in rest] == ["user", "assistant", "user"]
+
+    def test_prefix_key(self):
+        """同じプレフィックスとモデルなら同じキーになること"""
+        assert prefix_key(["a"], "m") == prefix_key(["a"], "m")
+        assert prefix_key(["a"], "m") != prefix_key(["a"], "n")
+
+    def test_cache_hit_rate(self):
+        """キャッシュヒット率の計算"""
+        assert (
+            TokenUsage(input_tokens=400, cache_read_tokens=300).cache_hit_rate == 0.75
+        )
+        assert TokenUsage().cache_hit_rate == 0.0
+
+
+class TestAnthropicPromptCache:
+    """Anthropicのプロンプトキャッシュのテスト"""
+
+    def test_system_parameter_and_breakpoints(self, recorded):
+        """システムメッセージがsystemパラメータに移り、ブレークポイントが付くこと"""
+        from llm.anthropic.client import AnthropicLLM
+
+        response = AnthropicLLM().single_response(CONVERSATION)
+        request = recorded[0]
+        assert request["system"] == [
+            {
+                "type": "text",
+                "text": SYSTEM.content,
+                "cache_control": {"type": "ephemeral"},
+            }
+        ]
+        assert [message["role"] for message in request["messages"]] == [
+            "user",
+            "assistant",
+            "user",
+        ]
+        assert request["messages"][1]["content"][0]["cache_control"] == {
+            "type": "ephemeral"
+        }
+        assert request["messages"][2]["content"] == "follow-up"
+        assert response.usage == TokenUsage(
+            input_tokens=310, output_tokens=2, cache_read_tokens=300
+        )
+
+    def test_cache_disabled(self, recorded):
+        """prompt_cache=Falseならcache_controlを付けないこと"""
+        from llm.anthropic.client import AnthropicLLM
+
+        AnthropicLLM(prompt_cache=False).single_response(CONVERSATION)
+        assert "cache_control" not in json.dumps(recorded[0])
+        assert recorded[0]["system"][0]["text"] == SYSTEM.content
+
+    def test_no_system(self, recorded):
+        """システムメッセージがなければsystemを送らないこと"""
+        from llm.anthropic.client import AnthropicLLM
+
+        AnthropicLLM().single_response([Message(role="user", content="hi")])
+        assert "system" not in recorded[0]
+
+
+class TestOpenAIPromptCache:
+    """OpenAIのプロンプトキャッシュのテスト"""
+
+    def test_prompt_cache_key_and_usage(self, recorded):
+        """prompt_cache_keyを送り、キャッシュ済みトークンを返すこと"""
+        from llm.openai.client import OpenAILLM
+
+        llm = OpenAILLM()
+        response = llm.single_response(CONVERSATION)
+        assert recorded[0]["prompt_cache_key"] == prefix_key(
+            [SYSTEM.content], llm.default_model
+        )
+        assert response.content == "ok"
+        assert response.usage is not None
+        assert response.usage.cache_read_tokens == 1024
+
+    def test_no_key_without_system(self, recorded):
+        """システムメッセージがなければキーを送らないこと"""
+        from llm.openai.client import OpenAILLM
+
+        OpenAILLM().single_response([Message(role="user", content="hi")])
+        assert "prompt_cache_key" not in recorded[0]
+
+
+class TestGeminiContextCache:
+    """Geminiのコンテキストキャッシュのテスト"""
+
+    @pytest.fixture
+    def llm(self, monkeypatch):
+        monkeypatch.setenv("GEMINI_API_KEY", "test-key")
+        from llm.gemini.client import GeminiLLM
+
+        llm = GeminiLLM(context_cache_min_tokens=100)
+        created: list = []
+
+        def create(model, config):
+            created.append((model, config))
+            return SimpleNamespace(name=f"cachedContents/{len(created)}")
+
+        monkeypatch.setattr(llm.client.caches, "create", create)
+        llm.created = created
+        return llm
+
+    def test_cache_created_once(self, llm):
+        """同じプレフィックスではキャッシュを一度だけ作ること"""
+        first = llm._context_cache(CONVERSATION, "gemini-2.5-flash")
+        second = llm._context_cache(CONVERSATION, "gemini-2.5-flash")
+        assert first == second == "cachedContents/1"
+        assert len(llm.created) == 1
+        config = llm._config(CONVERSATION, first)
+        assert config.cached_content == first
+        assert config.system_instruction is None
+
+    def test_short_prefix_uses_system_instruction(self, llm):
+        """短いプレフィックスはsystem_instructionで送ること"""
+        messages = [Message(role="system", content="short"), CONVERSATION[1]]
+        cached = llm._context_cache(messages, "gemini-2.5-flash")
+        assert cached is None and llm.created == []
+        assert llm._config(messages, cached).system_instruction == "short"
+        assert [content["role"] for content in llm._convert_messages(messages)] == [
+            "user"
+        ]
+
+    def test_failed_creation_remembered(self, llm, monkeypatch):
+        """作成に失敗したプレフィックスは再試行しないこと"""
+        from google import genai
+
+        calls = []
+
+        def fail(model, config):
+            calls.append(model)
+            raise genai.errors.ClientError(400, {"error": {"message": "too small"}})
+
+        monkeypatch.setattr(llm.client.caches, "create", fail)
+        assert llm._context_cache(CONVERSATION, "gemini-2.5-flash") is None
+        assert llm._context_cache(CONVERSATION, "gemini-2.5-flash") is None
+        assert len(calls) == 1
@@ -0,0 +1,83 @@
+import subprocess
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from llm.registry import llm_registry, resolve_llm
+from utils.registry import LazyRegistry
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+class Counter:
+    created = 0
+
+    def __init__(self) -> None:
+        Counter.created += 1
+
+
+class TestLazyRegistry:
+    """LazyRegistryのテスト"""
+
+    def test_constructs_once_on_first_use(self):
+        """初回使用時に一度だけ生成されること"""
+        Counter.created = 0
+        registry: LazyRegistry[Counter] = LazyRegistry({"counter": Counter})
+        assert Counter.created == 0
+        first = registry.get("counter")
+        assert registry.get("counter") is first
+        assert Counter.created == 1
+
+    def test_import_target(self):
+        """ "module:Class"形式のターゲットを読み込めること"""
+        registry: LazyRegistry[object] = LazyRegistry(
+            {"ordered": "collections:OrderedDict"}
+        )
+        assert type(registry.get("ordered")).__name__ == "OrderedDict"
+
+    def test_resolve_spec(self):
+        """ "provider:model"形式を分解できること"""
+        registry: LazyRegistry[Counter] = LazyRegistry({"counter": Counter})
+        assert registry.resolve("counter:big-model")[1] == "big-model"
+        assert registry.resolve("counter")[1] is None
+
+    def test_unknown_provider(self):
+        """未登録のプロバイダはValueError"""
+        with pytest.raises(ValueError):
+            LazyRegistry({}).get("missing")
+
+
+class TestLLMRegistry:
+    """LLMレジストリのテスト"""
+
+    def test_known_providers(self):
+        """4つのプロバイダが登録されていること"""
+        assert sorted(llm_registry.names()) == ["anthropic", "gemini", "grok", "openai"]
+
+    def test_resolve_model(self):
+        """モデル指定がModelとして返ること"""
+        llm_registry.register("fake", Counter)  # type: ignore[arg-type]
+        try:
+            _, model = resolve_llm("fake:gpt-5")
+            assert model is not None and model.name == "gpt-5"
+        finally:
+            llm_registry._targets.pop("fake")
+
+    def test_import_does_not_load_sdks(self):
+        """レジストリのimportだけではSDKが読み込まれないこと"""
+        code = (
+            "import sys, llm.registry, nl_processor.embedding.registry, tts.registry; "
+            "print([m for m in ('anthropic', 'openai', 'google.genai', 'xai_sdk', "
+            "'voyageai') if m in sys.modules])"
+        )
+        output = subprocess.run(
+            [sys.executable, "-c", code],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=ROOT,
+        )
+        assert output.stdout.strip() == "[]"
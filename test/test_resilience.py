@@ -0,0 +1,323 @@
+import asyncio
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from llm.base import BaseLLM, LLMResponse, Message, Model, T, call_timeout
+from llm.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HedgePolicy,
+    LatencyTracker,
+    ResilientLLM,
+    RetryPolicy,
+    is_retryable,
+)
+
+MESSAGES = [Message(role="user", content="hi")]
+FAST_RETRY = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.002)
+NO_HEDGE = HedgePolicy(initial_delay=60)
+
+
+class StatusError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+
+
+class FakeLLM(BaseLLM):
+    """Provider stand-in with a fixed latency and scripted failures."""
+
+    def __init__(
+        self,
+        name: str,
+        delay: float = 0.0,
+        failures: list | None = None,
+        model_delays: dict[str, float] | None = None,
+    ):
+        self.name = name
+        self.default_model = f"{name}-1"
+        self.tools = []
+        self.delay = delay
+        self.failures = list(failures or [])
+        self.model_delays = model_delays or {}
+        self.calls = 0
+
+    def _delay(self, model: Model | None) -> float:
+        return self.model_delays.get(model.name, self.delay) if model else self.delay
+
+    def _next(self, model: Model | None) -> LLMResponse:
+        self.calls += 1
+        if self.failures:
+            raise self.failures.pop(0)
+        return LLMResponse(content=f"{self.name}:{model.name if model else ''}")
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        # Like the SDKs, give up once the caller's timeout has passed.
+        delay, timeout = self._delay(model), call_timeout()
+        if timeout is not None and timeout < delay:
+            time.sleep(timeout)
+            raise TimeoutError("request timed out")
+        time.sleep(delay)
+        return self._next(model)
+
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        raise NotImplementedError
+
+    async def asingle_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        await asyncio.sleep(self._delay(model))
+        return self._next(model)
+
+
+class TestRetry:
+    """リトライのテスト"""
+
+    def test_retries_transient_errors(self):
+        """一時的なエラーはリトライされること"""
+        client = FakeLLM("a", failures=[StatusError(503), StatusError(429)])
+        llm = ResilientLLM(client, retry=FAST_RETRY)
+        assert llm.single_response(MESSAGES).content == "a:"
+        assert client.calls == 3
+        assert llm.stats.retries == 2
+
+    def test_client_errors_not_retried(self):
+        """4xxエラーはリトライされないこと"""
+        client = FakeLLM("a", failures=[StatusError(400)])
+        llm = ResilientLLM(client, retry=FAST_RETRY)
+        with pytest.raises(StatusError):
+            llm.single_response(MESSAGES)
+        assert client.calls == 1
+
+    def test_is_retryable(self):
+        """ステータスコードごとの判定"""
+        assert is_retryable(StatusError(500))
+        assert is_retryable(ConnectionError())
+        assert not is_retryable(StatusError(401))
+
+    def test_async_deadline(self):
+        """期限を過ぎたら打ち切られること"""
+        llm = ResilientLLM(
+            FakeLLM("slow", delay=1.0),
+            retry=RetryPolicy(max_attempts=5, base_delay=0.001, deadline=0.1),
+        )
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            asyncio.run(llm.asingle_response(MESSAGES))
+        assert time.monotonic() - start < 0.5
+
+    def test_sync_deadline(self):
+        """同期呼び出しでも期限で打ち切られること"""
+        llm = ResilientLLM(
+            FakeLLM("slow", delay=0.5),
+            retry=RetryPolicy(max_attempts=5, base_delay=0.001, deadline=0.1),
+        )
+        start = time.monotonic()
+        with pytest.raises(TimeoutError):
+            llm.single_response(MESSAGES)
+        assert time.monotonic() - start < 0.4
+
+
+class TestTimeouts:
+    """期限切れの扱いのテスト"""
+
+    def test_async_timeouts_trip_breaker(self):
+        """非同期で期限切れになった呼び出しが失敗として記録されること"""
+        llm = ResilientLLM(
+            FakeLLM("slow", delay=10.0),
+            retry=RetryPolicy(max_attempts=1, deadline=0.05),
+            breakers={"slow": CircuitBreaker(slow_call_latency=0.01)},
+        )
+        for _ in range(5):
+            with pytest.raises(TimeoutError):
+                asyncio.run(llm.asingle_response(MESSAGES))
+        assert llm.breakers["slow"].state == "open"
+
+    def test_sync_timeouts_free_workers(self):
+        """期限切れの呼び出しがワーカーを占有し続けないこと"""
+        client = FakeLLM("a", delay=10.0)
+        llm = ResilientLLM(
+            client, retry=RetryPolicy(max_attempts=1, deadline=0.1), max_workers=2
+        )
+        for _ in range(2):
+            with pytest.raises(TimeoutError):
+                llm.single_response(MESSAGES)
+        assert [success for success, _ in llm.breakers["a"].calls] == [False, False]
+        client.delay = 0.0
+        for _ in range(2):
+            assert llm.single_response(MESSAGES).content == "a:"
+
+
+class TestFixedTimeout:
+    """固定タイムアウトのクライアントのテスト"""
+
+    def test_timeout_longer_than_deadline_rejected(self):
+        """期限より長い固定タイムアウトのクライアントは拒否されること"""
+        client = FakeLLM("grok")
+        client.timeout = 600  # type: ignore[attr-defined]
+        with pytest.raises(ValueError, match="deadline"):
+            ResilientLLM(client, retry=RetryPolicy(deadline=30))
+        ResilientLLM(client, retry=RetryPolicy(deadline=None))
+        client.timeout = 30  # type: ignore[attr-defined]
+        ResilientLLM(client, retry=RetryPolicy(deadline=30))
+
+
+class TestCircuitBreaker:
+    """サーキットブレーカーのテスト"""
+
+    def test_trips_on_error_rate(self):
+        """エラー率が閾値を超えると開くこと"""
+        breaker = CircuitBreaker(min_calls=4, error_rate=0.5)
+        for success in (True, False, True, False):
+            breaker.record(success, 0.1)
+        assert breaker.state == "open"
+        assert not breaker.allow()
+
+    def test_trips_on_latency(self):
+        """遅い呼び出しが多いと開くこと"""
+        breaker = CircuitBreaker(min_calls=3, slow_call_latency=1.0)
+        for _ in range(3):
+            breaker.record(True, 2.0)
+        assert breaker.state == "open"
+
+    def test_half_open_recovers(self):
+        """リセット時間後の成功で閉じること"""
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.01)
+        breaker.record(False, 0.1)
+        assert breaker.state == "open"
+        time.sleep(0.02)
+        assert breaker.state == "half_open"
+        breaker.record(True, 0.1)
+        assert breaker.state == "closed"
+
+    def test_half_open_single_probe(self):
+        """半開状態では試行を1つだけ通し、結果が出るまで他を拒否すること"""
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.05)
+        breaker.record(False, 0.1)
+        time.sleep(0.06)
+        assert breaker.allow()
+        assert not breaker.allow()
+        assert breaker.state == "half_open"
+        breaker.record(False, 0.1)
+        assert breaker.state == "open" and not breaker.allow()
+        time.sleep(0.06)
+        assert breaker.allow()
+        breaker.record(True, 0.1)
+        assert breaker.allow() and breaker.allow()
+
+    def test_unrecorded_probe_expires(self):
+        """結果が記録されない試行はリセット時間後に次の試行に譲ること"""
+        breaker = CircuitBreaker(min_calls=1, reset_timeout=0.02)
+        breaker.record(False, 0.1)
+        time.sleep(0.03)
+        assert breaker.allow()
+        assert not breaker.allow()
+        time.sleep(0.03)
+        assert breaker.allow()
+
+    def test_half_open_primary_gets_one_call(self):
+        """半開のプライマリには1件だけ送り、残りはバックアップへ回すこと"""
+        primary, backup = FakeLLM("a", delay=0.05), FakeLLM("b")
+        llm = ResilientLLM(
+            primary,
+            backup=backup,
+            hedge=NO_HEDGE,
+            breakers={"a": CircuitBreaker(min_calls=1, reset_timeout=0.01)},
+        )
+        llm.breakers["a"].record(False, 0.1)
+        time.sleep(0.02)
+
+        async def burst():
+            return await asyncio.gather(
+                *(llm.asingle_response(MESSAGES) for _ in range(5))
+            )
+
+        contents = sorted(response.content for response in asyncio.run(burst()))
+        assert contents == ["a:"] + ["b:"] * 4
+        assert primary.calls == 1
+        assert llm.breakers["a"].state == "closed"
+
+    def test_fails_over_to_backup(self):
+        """プライマリの回路が開いていればバックアップを使うこと"""
+        primary, backup = FakeLLM("a"), FakeLLM("b")
+        llm = ResilientLLM(
+            primary,
+            backup=backup,
+            hedge=NO_HEDGE,
+            breakers={"a": CircuitBreaker(min_calls=1)},
+        )
+        llm.breakers["a"].record(False, 0.1)
+        assert llm.single_response(MESSAGES).content == "b:"
+        assert primary.calls == 0
+        assert llm.stats.failovers == 1
+
+    def test_all_circuits_open(self):
+        """全ての回路が開いていればCircuitOpenError"""
+        llm = ResilientLLM(FakeLLM("a"), breakers={"a": CircuitBreaker(min_calls=1)})
+        llm.breakers["a"].record(False, 0.1)
+        with pytest.raises(CircuitOpenError):
+            llm.single_response(MESSAGES)
+
+
+class TestHedging:
+    """ヘッジリクエストのテスト"""
+
+    def test_sync_backup_wins(self):
+        """遅いプライマリに対してバックアップが勝つこと"""
+        llm = ResilientLLM(
+            FakeLLM("a", delay=0.5),
+            backup=FakeLLM("b"),
+            hedge=HedgePolicy(initial_delay=0.02),
+        )
+        start = time.monotonic()
+        assert llm.single_response(MESSAGES).content == "b:"
+        assert time.monotonic() - start < 0.3
+        assert llm.stats.hedged == 1
+        assert llm.stats.hedge_win_rate == 1.0
+
+    def test_async_backup_model(self):
+        """同じプロバイダの別モデルへヘッジできること"""
+        client = FakeLLM("a", delay=0.5, model_delays={"mini": 0.0})
+        llm = ResilientLLM(
+            client, backup_model=Model("mini"), hedge=HedgePolicy(initial_delay=0.02)
+        )
+        start = time.monotonic()
+        response = asyncio.run(llm.asingle_response(MESSAGES))
+        assert response.content == "a:mini"
+        assert time.monotonic() - start < 0.3
+        assert llm.stats.hedge_wins == 1
+
+    def test_fast_primary_not_hedged(self):
+        """速いプライマリはヘッジされないこと"""
+        backup = FakeLLM("b")
+        llm = ResilientLLM(
+            FakeLLM("a"), backup=backup, hedge=HedgePolicy(initial_delay=0.5)
+        )
+        assert asyncio.run(llm.asingle_response(MESSAGES)).content == "a:"
+        assert backup.calls == 0
+        assert llm.stats.hedged == 0
+
+    def test_delay_follows_percentile(self):
+        """サンプルが揃うとパーセンタイルを遅延に使うこと"""
+        llm = ResilientLLM(
+            FakeLLM("a"), hedge=HedgePolicy(percentile=0.9, min_samples=10)
+        )
+        for latency in range(1, 11):
+            llm.latency.add(latency / 10)
+        assert llm.hedge_delay() == pytest.approx(1.0)
+
+    def test_latency_tracker_window(self):
+        """古いサンプルは捨てられること"""
+        tracker = LatencyTracker(window=3)
+        for latency in (10.0, 1.0, 2.0, 3.0):
+            tracker.add(latency)
+        assert tracker.percentile(1.0) == 3.0
@@ -0,0 +1,131 @@
+import tempfile
+import threading
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from llm.bulk import BulkResult
+from llm.results import ResultRecord, ResultStore, new_run_id
+from utils.data_handler import DataHandler
+
+
+def record(run_id="run-1", prompt_id="0", provider="openai", **kwargs) -> ResultRecord:
+    return ResultRecord(run_id=run_id, prompt_id=prompt_id, provider=provider, **kwargs)
+
+
+class TestResultStore:
+    """結果ストアのテスト"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.handler = DataHandler(self.temp_dir.name)
+        self.store = ResultStore(data_handler=self.handler)
+
+    def teardown_method(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_add_and_reopen(self):
+        """追加した結果が再オープン後も読めること"""
+        first = self.store.add(record(content="a", metadata={"tokens": 3}))
+        second = self.store.add(record(prompt_id="1", content="b"))
+        assert second > first
+        self.store.close()
+        self.store = ResultStore(data_handler=self.handler)
+        records = self.store.query()
+        assert [r.content for r in records] == ["a", "b"]
+        assert records[0].metadata == {"tokens": 3}
+        assert records[0].id == first
+
+    def test_add_many_and_filters(self):
+        """一括追加した結果を各条件で絞り込めること"""
+        records = [
+            record(
+                run_id=run, prompt_id=str(i), provider=provider, model=f"{provider}-m"
+            )
+            for run in ("run-1", "run-2")
+            for provider in ("openai", "anthropic")
+            for i in range(5)
+        ]
+        records.append(record(run_id="run-2", prompt_id="9", error="timeout"))
+        assert self.store.add_many(records) == 21
+        assert len(self.store) == 21
+        assert len(self.store.query(run_id="run-2")) == 11
+        assert len(self.store.query(provider="anthropic", run_id="run-1")) == 5
+        assert len(self.store.query(model="openai-m", prompt_id="3")) == 2
+        assert [r.error for r in self.store.query(failed=True)] == ["timeout"]
+        assert len(self.store.query(failed=False)) == 20
+        assert len(self.store.query(limit=4)) == 4
+        assert self.store.runs() == ["run-1", "run-2"]
+
+    def test_from_bulk(self):
+        """BulkResultから変換できること"""
+        result = BulkResult(
+            prompt_id="4", provider="gemini", model=None, prompt="hi", content="hello"
+        )
+        self.store.add(ResultRecord.from_bulk(result, "run-1", prompts="lang.json"))
+        (stored,) = self.store.query(provider="gemini")
+        assert (stored.prompt_id, stored.prompt, stored.content) == ("4", "hi", "hello")
+        assert stored.metadata == {"prompts": "lang.json"}
+
+    def test_concurrent_writers(self):
+        """複数スレッド・複数接続から同時に書き込めること"""
+        other = ResultStore(data_handler=self.handler)
+
+        def write(store, worker):
+            for i in range(50):
+                store.add(record(run_id=f"run-{worker}", prompt_id=str(i)))
+
+        threads = [
+            threading.Thread(target=write, args=(self.store if i % 2 else other, i))
+            for i in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        other.close()
+        assert len(self.store) == 200
+        assert len(self.store.query(run_id="run-3")) == 50
+
+    def test_compact_keeps_latest_success(self):
+        """再実行で重複した結果は最新の成功のみ残ること"""
+        self.store.add_many(
+            [
+                record(prompt_id="0", content="old"),
+                record(prompt_id="0", content="new"),
+                record(prompt_id="0", error="late failure"),
+                record(prompt_id="1", error="first"),
+                record(prompt_id="1", error="second"),
+                record(run_id="run-2", prompt_id="0", content="other run"),
+            ]
+        )
+        assert self.store.compact() == 3
+        remaining = {(r.run_id, r.prompt_id): r for r in self.store.query()}
+        assert remaining[("run-1", "0")].content == "new"
+        assert remaining[("run-1", "1")].error == "second"
+        assert remaining[("run-2", "0")].content == "other run"
+        assert self.store.compact(drop_failed=True) == 1
+        assert len(self.store) == 2
+
+    def test_compact_before(self):
+        """指定時刻より古い結果を削除できること"""
+        self.store.add(record(run_id="old", created=100.0))
+        self.store.add(record(run_id="new", created=200.0))
+        assert self.store.compact(before=150.0) == 1
+        assert self.store.runs() == ["new"]
+        assert self.store.query(since=150.0)[0].run_id == "new"
+
+    def test_export_jsonl(self):
+        """絞り込んだ結果をJSONLに書き出せること"""
+        self.store.add_many([record(provider="openai"), record(provider="grok")])
+        assert self.store.export_jsonl("export.jsonl", provider="grok") == 1
+        (exported,) = self.handler.load("export.jsonl", format="jsonl")
+        assert exported["provider"] == "grok"
+
+    def test_run_ids_unique(self):
+        """同じ秒に作られた実行IDも重複しないこと"""
+        ids = {new_run_id() for _ in range(100)}
+        assert len(ids) == 100
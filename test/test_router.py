@@ -0,0 +1,223 @@
+import asyncio
+import random
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from pydantic import BaseModel
+from dev.benchmark.fake_servers import FakeConfig, FakeProviderServer
+from llm.base import BaseLLM, LLMResponse, Message, Model, T
+from llm.resilience import CircuitOpenError
+from llm.router import AdaptiveRouter, RoutingPolicy
+from utils.tokens import TokenUsage
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+class Answer(BaseModel):
+    value: int
+
+
+class FakeLLM(BaseLLM):
+    """Provider stand-in whose latency and failures can change mid-test."""
+
+    def __init__(self, name: str, model: str, delay: float = 0.0):
+        self.name = name
+        self.default_model = model
+        self.tools = []
+        self.delay = delay
+        self.failing = False
+        self.calls = 0
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.failing:
+            raise RuntimeError(f"{self.name} is down")
+        return LLMResponse(
+            content=self.name, usage=TokenUsage(input_tokens=1000, output_tokens=1000)
+        )
+
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        self.single_response(messages, model)
+        return schema.model_validate({"value": 1})
+
+
+def router(*clients: FakeLLM, **policy) -> AdaptiveRouter:
+    policy.setdefault("explore", 0.0)
+    return AdaptiveRouter(
+        [(client, None) for client in clients],
+        RoutingPolicy(**policy),
+        rng=random.Random(0),
+    )
+
+
+def serve(llm: AdaptiveRouter, count: int) -> list[str]:
+    return [llm.single_response(MESSAGES).content for _ in range(count)]
+
+
+class TestRanking:
+    """振り分けのテスト"""
+
+    def test_every_route_warmed_up(self):
+        """全ての候補が最低限のサンプルを得ること"""
+        fast = FakeLLM("fast", "gpt-5-mini")
+        slow = FakeLLM("slow", "gpt-5", delay=0.02)
+        serve(router(fast, slow, min_samples=2), 4)
+        assert (fast.calls, slow.calls) == (2, 2)
+
+    def test_fastest(self):
+        """最も速い候補に送られること"""
+        fast = FakeLLM("fast", "gpt-5-mini", delay=0.001)
+        slow = FakeLLM("slow", "gpt-5", delay=0.02)
+        llm = router(slow, fast)
+        answers = serve(llm, 12)
+        assert answers[4:] == ["fast"] * 8
+        assert [state.name for state in llm.state()] == [
+            "fast:gpt-5-mini",
+            "slow:gpt-5",
+        ]
+
+    def test_traffic_moves_away_from_degraded_provider(self):
+        """遅くなった候補から自動的に離れること"""
+        first = FakeLLM("first", "gpt-5", delay=0.001)
+        second = FakeLLM("second", "gpt-5", delay=0.01)
+        llm = router(first, second, alpha=0.5)
+        assert serve(llm, 6)[-1] == "first"
+        first.delay = 0.03
+        answers = serve(llm, 6)
+        assert answers[-1] == "second"
+        assert llm.state()[0].provider == "second"
+
+    def test_cheapest_within_slo(self):
+        """SLOを満たす中で最も安い候補に送られること"""
+        cheap = FakeLLM("cheap", "gpt-5-nano", delay=0.01)
+        pricey = FakeLLM("pricey", "gpt-5", delay=0.0)
+        assert serve(router(cheap, pricey, strategy="cheapest"), 8)[4:] == ["cheap"] * 4
+        strict = router(cheap, pricey, strategy="cheapest", max_latency=0.005)
+        assert serve(strict, 8)[4:] == ["pricey"] * 4
+
+    def test_weighted(self):
+        """重み付きでは遅延とコストの両方が考慮されること"""
+        cheap = FakeLLM("cheap", "gpt-5-nano", delay=0.005)
+        pricey = FakeLLM("pricey", "gpt-5", delay=0.0)
+        llm = router(cheap, pricey, strategy="weighted", latency_weight=0.0)
+        assert serve(llm, 8)[4:] == ["cheap"] * 4
+        llm = router(cheap, pricey, strategy="weighted", cost_weight=0.0)
+        assert serve(llm, 8)[4:] == ["pricey"] * 4
+
+    def test_exploration(self):
+        """探索率に応じて他の候補にも送られること"""
+        fast = FakeLLM("fast", "gpt-5-mini", delay=0.0)
+        slow = FakeLLM("slow", "gpt-5", delay=0.005)
+        llm = router(fast, slow, explore=0.3)
+        serve(llm, 40)
+        assert llm.stats.explored > 0
+        assert slow.calls > 2
+
+
+class TestFailures:
+    """障害時の振る舞いのテスト"""
+
+    def test_failover_and_error_rate(self):
+        """失敗した候補の次に切り替わり、エラー率が上がること"""
+        flaky = FakeLLM("flaky", "gpt-5-mini", delay=0.0)
+        steady = FakeLLM("steady", "gpt-5", delay=0.005)
+        llm = router(flaky, steady)
+        serve(llm, 4)
+        flaky.failing = True
+        assert serve(llm, 4) == ["steady"] * 4
+        assert llm.stats.failovers >= 1
+        state = {state.provider: state for state in llm.state()}
+        assert state["flaky"].errors >= 1
+        assert state["flaky"].error_rate > llm.policy.max_error_rate
+        assert llm.state()[0].provider == "steady"
+
+    def test_all_failing_raises(self):
+        """全候補が失敗すれば最後のエラーが伝わること"""
+        down = FakeLLM("down", "gpt-5")
+        down.failing = True
+        llm = router(down)
+        with pytest.raises(RuntimeError, match="down is down"):
+            llm.single_response(MESSAGES)
+
+    def test_open_circuits_rejected(self):
+        """全ての回路が開いていればCircuitOpenErrorになること"""
+        down = FakeLLM("down", "gpt-5")
+        down.failing = True
+        llm = router(down)
+        for _ in range(5):
+            with pytest.raises(RuntimeError):
+                llm.single_response(MESSAGES)
+        with pytest.raises(CircuitOpenError):
+            llm.single_response(MESSAGES)
+        assert llm.state()[0].circuit == "open"
+
+    def test_unused_route_keeps_probe(self):
+        """使われなかった半開の候補は試行枠を消費しないこと"""
+        fast = FakeLLM("fast", "gpt-5-mini")
+        recovering = FakeLLM("recovering", "gpt-5", delay=0.01)
+        llm = router(fast, recovering)
+        serve(llm, 4)
+        breaker = llm.routes[1].breaker
+        breaker.reset_timeout = 0.01
+        for _ in range(5):
+            breaker.record(False, 0.1)
+        time.sleep(0.02)
+        assert llm.state()[1].circuit == "half_open"
+        assert serve(llm, 3) == ["fast"] * 3
+        assert recovering.calls == 2
+        assert breaker.allow()
+
+
+class TestInterface:
+    """BaseLLMとしてのテスト"""
+
+    def test_model_filter(self):
+        """モデル指定でその候補だけに送られること"""
+        a = FakeLLM("a", "gpt-5-mini")
+        b = FakeLLM("b", "gpt-5")
+        llm = router(a, b)
+        assert serve(llm, 1) == ["a"]
+        assert llm.single_response(MESSAGES, Model(name="gpt-5")).content == "b"
+        with pytest.raises(ValueError):
+            llm.single_response(MESSAGES, Model(name="unknown"))
+
+    def test_structured_async_and_stream(self):
+        """構造化・非同期・ストリーミングも振り分けられること"""
+        llm = router(FakeLLM("a", "gpt-5-mini"), FakeLLM("b", "gpt-5"))
+        assert llm.structured_response(MESSAGES, Answer) == Answer(value=1)
+        response = asyncio.run(llm.asingle_response(MESSAGES))
+        assert response.content == "b"
+        items = list(llm.stream_response(MESSAGES))
+        assert isinstance(items[-1], LLMResponse)
+        assert sum(state.calls for state in llm.state()) == 3
+        assert all(state.cost for state in llm.state())
+
+    def test_fake_provider_backends(self):
+        """ローカルの偽サーバー上の実クライアントを振り分けられること"""
+        with FakeProviderServer(FakeConfig(payload_chars=32)):
+            from llm.anthropic.client import AnthropicLLM
+            from llm.openai.client import OpenAILLM
+
+            llm = AdaptiveRouter(
+                [(OpenAILLM(), None), (AnthropicLLM(), Model("claude-haiku-4-5"))],
+                RoutingPolicy(explore=0.0),
+            )
+            for _ in range(6):
+                assert llm.single_response(MESSAGES).content
+            states = llm.state()
+            assert {state.name for state in states} == {
+                "openai:gpt-5",
+                "anthropic:claude-haiku-4-5",
+            }
+            assert all(state.calls >= 2 and state.latency > 0 for state in states)
+            assert '"error_rate"' in llm.state_json()
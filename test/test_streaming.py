@@ -0,0 +1,71 @@
+import asyncio
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from llm.base import BaseLLM, LLMResponse, Message, Model, StreamMetrics, T
+
+
+class BlockingLLM(BaseLLM):
+    def __init__(self) -> None:
+        self.name = "blocking"
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        time.sleep(0.05)
+        return LLMResponse(content="full answer")
+
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        raise NotImplementedError
+
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+class TestStreamFallback:
+    """ネイティブストリーミングのないプロバイダのフォールバックテスト"""
+
+    def test_sync_stream(self):
+        """テキスト差分の後に最終レスポンスが返ること"""
+        items = list(BlockingLLM().stream_response(MESSAGES))
+        assert items[0] == "full answer"
+        final = items[-1]
+        assert isinstance(final, LLMResponse)
+        assert final.content == "full answer"
+        assert final.metrics is not None
+        assert final.metrics.time_to_first_token >= 0.05
+
+    def test_async_stream(self):
+        """非同期版も同じ形式で返ること"""
+
+        async def collect():
+            return [item async for item in BlockingLLM().astream_response(MESSAGES)]
+
+        items = asyncio.run(collect())
+        assert items[0] == "full answer"
+        assert isinstance(items[-1], LLMResponse)
+
+
+class TestStreamMetrics:
+    """StreamMetricsのテスト"""
+
+    def test_tokens_per_second(self):
+        """最初のトークン以降の生成速度が計算されること"""
+        metrics = StreamMetrics(
+            time_to_first_token=1.0, total_time=3.0, output_tokens=100
+        )
+        assert metrics.tokens_per_second == pytest.approx(50.0)
+
+    def test_zero_generation_time(self):
+        """生成時間がゼロでも例外にならないこと"""
+        metrics = StreamMetrics(
+            time_to_first_token=1.0, total_time=1.0, output_tokens=5
+        )
+        assert metrics.tokens_per_second == 0.0
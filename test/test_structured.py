@@ -0,0 +1,320 @@
+import asyncio
+import gc
+import json
+import threading
+import sys
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from pydantic import BaseModel, Field, ValidationError
+from dev.benchmark.fake_servers import FakeConfig, FakeProviderServer
+from llm.base import BaseLLM, LLMResponse, Message, Model, T
+from llm.structured import PartialJSONParser, compile_schema, strict_json_schema
+
+MESSAGES = [Message(role="user", content="classify this")]
+ANSWER = {"title": "benchmark", "points": ["a", 'b "quoted"'], "score": 0.5}
+
+
+class Answer(BaseModel):
+    title: str
+    points: list[str]
+    score: float
+
+
+class Point(BaseModel):
+    x: int
+    label: str | None = None
+
+
+class Shape(BaseModel):
+    origin: Point = Field(description="start")
+    points: list[Point]
+
+
+def feed_all(text: str, step: int = 1) -> list:
+    parser = PartialJSONParser()
+    partials = []
+    for i in range(0, len(text), step):
+        partial = parser.feed(text[i : i + step])
+        if partial is not None:
+            partials.append(partial)
+    return partials
+
+
+class TestCompileSchema:
+    """スキーマのコンパイルキャッシュのテスト"""
+
+    def test_compiled_once(self):
+        """同じスキーマは同じコンパイル結果を返すこと"""
+        assert compile_schema(Answer) is compile_schema(Answer)
+        assert compile_schema(Answer).json_schema == Answer.model_json_schema()
+
+    def test_payload_built_once(self):
+        """プロバイダごとのペイロードは一度だけ生成されること"""
+        compiled = compile_schema(Answer)
+        calls = []
+        for _ in range(3):
+            compiled.payload("test", lambda: calls.append(1) or {"built": True})
+        assert len(calls) == 1
+
+    def test_dynamic_schema_released(self):
+        """動的に作られたスキーマはキャッシュに保持され続けないこと"""
+        from llm import structured
+
+        schema = type("Dynamic", (BaseModel,), {"__annotations__": {"x": int}})
+        compile_schema(schema)
+        size = len(structured._compiled)
+        del schema
+        gc.collect()
+        assert len(structured._compiled) == size - 1
+
+    def test_parse_raw_json(self):
+        """生のJSONから直接検証されること"""
+        compiled = compile_schema(Answer)
+        assert compiled.parse(json.dumps(ANSWER).encode()) == Answer(**ANSWER)
+        with pytest.raises(ValidationError):
+            compiled.parse('{"title": "missing fields"}')
+
+    def test_strict_json_schema(self):
+        """OpenAIのstrictモード向けのスキーマが元のスキーマを変えずに作られること"""
+        original = Shape.model_json_schema()
+        strict = strict_json_schema(compile_schema(Shape).json_schema)
+        assert compile_schema(Shape).json_schema == original
+        assert strict["additionalProperties"] is False
+        assert strict["required"] == ["origin", "points"]
+        point = strict["$defs"]["Point"]
+        assert point["additionalProperties"] is False
+        assert point["required"] == ["x", "label"]
+        assert "default" not in point["properties"]["label"]
+        # A $ref with a description is inlined as a strict object.
+        origin = strict["properties"]["origin"]
+        assert "$ref" not in origin
+        assert origin["description"] == "start"
+        assert origin["additionalProperties"] is False
+        assert strict["properties"]["points"]["items"] == {"$ref": "#/$defs/Point"}
+
+
+class TestPartialJSONParser:
+    """ストリーミング中のJSONの部分解析のテスト"""
+
+    def test_final_value_matches(self):
+        """最後の部分結果が完全なJSONと一致すること"""
+        text = json.dumps(ANSWER)
+        for step in (1, 3, 7):
+            assert feed_all(text, step)[-1] == ANSWER
+
+    def test_partials_grow(self):
+        """文字列の途中も含めて部分結果が返ること"""
+        partials = feed_all('{"title": "hello", "points": ["x"')
+        assert {"title": "hel"} in partials
+        assert partials[-1] == {"title": "hello", "points": ["x"]}
+
+    def test_incomplete_tokens_left_out(self):
+        """途中のキーや数値は含まれないこと"""
+        parser = PartialJSONParser()
+        assert parser.feed('{"score": 0.5, "ti') == {"score": 0.5}
+        assert parser.feed("tle") is None
+        assert parser.feed('": 12') is None
+        assert parser.feed("3}") == {"score": 0.5, "title": 123}
+
+    def test_escapes(self):
+        """途中のエスケープシーケンスで壊れないこと"""
+        text = json.dumps({"text": 'a "b" \\ é \n'}, ensure_ascii=True)
+        partials = feed_all(text)
+        assert partials[-1] == json.loads(text)
+        assert all(isinstance(partial["text"], str) for partial in partials[1:])
+
+
+class TestStructuredClients:
+    """各プロバイダの構造化出力のテスト"""
+
+    def test_providers_parse_into_schema(self):
+        """各クライアントが構造化出力をスキーマに変換すること"""
+        with FakeProviderServer(FakeConfig(payload_chars=128)):
+            from llm.anthropic.client import AnthropicLLM
+            from llm.gemini.client import GeminiLLM
+            from llm.openai.client import OpenAILLM
+
+            for client in (OpenAILLM(), AnthropicLLM(), GeminiLLM()):
+                for _ in range(2):
+                    answer = client.structured_response(MESSAGES, Answer)
+                    assert isinstance(answer, Answer)
+                    assert answer.title == "benchmark"
+                answer = asyncio.run(client.astructured_response(MESSAGES, Answer))
+                assert isinstance(answer, Answer)
+
+
+def sse(events: list[tuple[str, dict]]) -> bytes:
+    return "".join(
+        f"event: {name}\ndata: {json.dumps(data)}\n\n" for name, data in events
+    ).encode()
+
+
+def openai_stream(text: str) -> bytes:
+    return sse(
+        [
+            (
+                "response.output_text.delta",
+                {
+                    "type": "response.output_text.delta",
+                    "delta": text[i : i + 5],
+                    "item_id": "msg",
+                    "output_index": 0,
+                    "content_index": 0,
+                    "sequence_number": i,
+                    "logprobs": [],
+                },
+            )
+            for i in range(0, len(text), 5)
+        ]
+    )
+
+
+def anthropic_stream(text: str) -> bytes:
+    message: dict = {
+        "id": "msg",
+        "type": "message",
+        "role": "assistant",
+        "model": "claude",
+        "content": [],
+        "stop_reason": None,
+        "stop_sequence": None,
+        "usage": {"input_tokens": 1, "output_tokens": 0},
+    }
+    deltas = [
+        (
+            "content_block_delta",
+            {
+                "type": "content_block_delta",
+                "index": 0,
+                "delta": {"type": "input_json_delta", "partial_json": text[i : i + 5]},
+            },
+        )
+        for i in range(0, len(text), 5)
+    ]
+    return sse(
+        [
+            ("message_start", {"type": "message_start", "message": message}),
+            (
+                "content_block_start",
+                {
+                    "type": "content_block_start",
+                    "index": 0,
+                    "content_block": {
+                        "type": "tool_use",
+                        "id": "tool",
+                        "name": "output_formatter",
+                        "input": {},
+                    },
+                },
+            ),
+            *deltas,
+            ("content_block_stop", {"type": "content_block_stop", "index": 0}),
+            (
+                "message_delta",
+                {
+                    "type": "message_delta",
+                    "delta": {"stop_reason": "tool_use", "stop_sequence": None},
+                    "usage": {"output_tokens": 10},
+                },
+            ),
+            ("message_stop", {"type": "message_stop"}),
+        ]
+    )
+
+
+class StreamHandler(BaseHTTPRequestHandler):
+    """Stand-in for the streaming Responses and Messages endpoints."""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        text = json.dumps(ANSWER)
+        if self.path.endswith("/messages"):
+            body = anthropic_stream(text)
+        else:
+            body = openai_stream(text)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def stream_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StreamHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    monkeypatch.setenv("OPENAI_BASE_URL", f"{url}/v1")
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", url)
+    monkeypatch.setenv("ANTHROPIC_API_KEY", "test")
+    yield
+    server.shutdown()
+    server.server_close()
+
+
+class FixedLLM(BaseLLM):
+    def __init__(self):
+        self.name = "fixed"
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        return LLMResponse(content=json.dumps(ANSWER))
+
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        return schema.model_validate_json(self.single_response(messages).content)
+
+
+class TestStreamStructured:
+    """構造化出力のストリーミングのテスト"""
+
+    def test_fallback_yields_final_only(self):
+        """ネイティブ実装のないプロバイダは最終結果のみ返すこと"""
+        items = list(FixedLLM().stream_structured_response(MESSAGES, Answer))
+        assert items == [Answer(**ANSWER)]
+
+    @pytest.mark.parametrize("provider", ["openai", "anthropic"])
+    def test_native_stream(self, stream_server, provider):
+        """部分結果の後に検証済みの結果が返ること"""
+        from llm.anthropic.client import AnthropicLLM
+        from llm.openai.client import OpenAILLM
+
+        client = OpenAILLM() if provider == "openai" else AnthropicLLM()
+        items = list(client.stream_structured_response(MESSAGES, Answer))
+        partials, final = items[:-1], items[-1]
+        assert final == Answer(**ANSWER)
+        assert all(isinstance(item, dict) for item in partials)
+        assert len(partials) > 3
+        assert partials[-1] == ANSWER
+
+    @pytest.mark.parametrize("provider", ["openai", "anthropic"])
+    def test_native_async_stream(self, stream_server, provider):
+        """非同期版も同じ結果を返すこと"""
+        from llm.anthropic.client import AnthropicLLM
+        from llm.openai.client import OpenAILLM
+
+        client = OpenAILLM() if provider == "openai" else AnthropicLLM()
+
+        async def collect():
+            return [
+                item
+                async for item in client.astream_structured_response(MESSAGES, Answer)
+            ]
+
+        items = asyncio.run(collect())
+        assert items[-1] == Answer(**ANSWER)
+        assert len(items) > 2
@@ -0,0 +1,291 @@
+import asyncio
+import json
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from pydantic import BaseModel
+from dev.benchmark.fake_servers import FakeConfig, FakeProviderServer
+from dev.benchmark.suite import BenchmarkAnswer
+from llm.base import BaseLLM, LLMResponse, Message, Model, T, TokenUsage
+from llm.resilience import ResilientLLM, RetryPolicy
+from llm.telemetry import InstrumentedLLM
+from nl_processor.embedding.base import BaseEmbedding, EmbeddingModel, Vectors
+from nl_processor.embedding.chunking import ChunkConfig, ChunkedDispatcher
+from nl_processor.embedding.telemetry import InstrumentedEmbedding
+from utils.data_handler import DataHandler
+from utils.pricing import estimate_cost
+from utils.telemetry import CallRecord, Instrument, JsonlExporter, TelemetryAggregator
+
+MESSAGES = [Message(role="user", content="hi")]
+
+
+class UsageLLM(BaseLLM):
+    def __init__(self, failures: int = 0):
+        self.name = "openai"
+        self.default_model = "gpt-5"
+        self.tools = []
+        self.failures = failures
+
+    def single_response(
+        self, messages: list[Message], model: Model | None = None
+    ) -> LLMResponse:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("reset")
+        return LLMResponse(
+            content="ok",
+            usage=TokenUsage(
+                input_tokens=1000, output_tokens=100, cache_read_tokens=400
+            ),
+            request_id="resp_1",
+        )
+
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        raise ValueError("no schema support")
+
+
+class Answer(BaseModel):
+    value: int
+
+
+class StructuredUsageLLM(UsageLLM):
+    def structured_response(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> T:
+        return self._structured_call(messages, schema, model)[0]
+
+    def _structured_call(
+        self, messages: list[Message], schema: type[T], model: Model | None = None
+    ) -> tuple[T, LLMResponse]:
+        response = self.single_response(messages, model)
+        return schema.model_validate({"value": 1}), response
+
+
+class ListSink(Instrument):
+    def __init__(self):
+        self.records: list[CallRecord] = []
+
+    def record(self, record: CallRecord) -> None:
+        self.records.append(record)
+
+
+class ChunkedFakeEmbedding(BaseEmbedding):
+    def __init__(self, failures: int = 0):
+        self.name = "fake"
+        self.default_model = "text-embedding-3-small"
+        self.failures = failures
+        self.dispatcher = ChunkedDispatcher(
+            ChunkConfig(max_items=2, concurrency=2, backoff=0.001)
+        )
+
+    def _embed_chunk(self, texts: list[str]) -> tuple[list[list[float]], int]:
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("reset")
+        return [[float(len(text))] for text in texts], 10 * len(texts)
+
+    def embed(
+        self, text: str | list[str], model: EmbeddingModel | None = None
+    ) -> Vectors:
+        texts = [text] if isinstance(text, str) else text
+        vectors, usage = self.dispatcher.run_with_usage(texts, self._embed_chunk)
+        return Vectors(vectors=vectors, model=self.default_model, usage=usage)
+
+
+class NoUsageEmbedding(BaseEmbedding):
+    """Like GeminiEmbedding, reports no token usage."""
+
+    def __init__(self):
+        self.name = "gemini"
+        self.default_model = "gemini-embedding-001"
+
+    def embed(
+        self, text: str | list[str], model: EmbeddingModel | None = None
+    ) -> Vectors:
+        texts = [text] if isinstance(text, str) else text
+        return Vectors.from_list([[0.0] for _ in texts], self.default_model)
+
+
+class TestPricing:
+    """コスト見積もりのテスト"""
+
+    def test_cached_tokens_discounted(self):
+        """キャッシュ読み込みは割引価格で計算されること"""
+        usage = TokenUsage(input_tokens=1000, output_tokens=100, cache_read_tokens=400)
+        expected = (600 * 1.25 + 400 * 0.125 + 100 * 10.0) / 1_000_000
+        assert estimate_cost("gpt-5", usage) == pytest.approx(expected)
+
+    def test_unknown_model(self):
+        """価格不明のモデルはNone"""
+        assert estimate_cost("unknown-model", TokenUsage(input_tokens=1)) is None
+
+    def test_unknown_usage(self):
+        """使用量が不明な呼び出しは0ではなくNone"""
+        assert estimate_cost("gpt-5", None) is None
+
+
+class TestInstrumentedLLM:
+    """InstrumentedLLMのテスト"""
+
+    def test_records_usage(self):
+        """トークン数・コスト・リクエストIDが記録されること"""
+        aggregator = TelemetryAggregator()
+        sink = ListSink()
+        llm = InstrumentedLLM(UsageLLM(), [aggregator, sink])
+        llm.single_response(MESSAGES)
+        record = sink.records[0]
+        assert record.provider == "openai" and record.model == "gpt-5"
+        assert record.input_tokens == 1000 and record.cache_read_tokens == 400
+        assert record.request_id == "resp_1"
+        assert record.cost is not None and record.cost > 0
+        assert record.wall_time >= 0
+        summary = aggregator.summary()[0]
+        assert summary.calls == 1 and summary.output_tokens == 100
+
+    def test_structured_usage(self):
+        """構造化出力でもトークン数とリクエストIDが記録されること"""
+        sink = ListSink()
+        llm = InstrumentedLLM(StructuredUsageLLM(), [sink])
+        assert llm.structured_response(MESSAGES, Answer) == Answer(value=1)
+        assert asyncio.run(llm.astructured_response(MESSAGES, Answer)).value == 1
+        items = list(llm.stream_structured_response(MESSAGES, Answer))
+        assert items == [Answer(value=1)]
+        assert len(sink.records) == 3
+        for record in sink.records:
+            assert record.input_tokens == 1000 and record.request_id == "resp_1"
+            assert record.cost is not None and record.cost > 0
+
+    def test_structured_usage_from_providers(self):
+        """各プロバイダの構造化出力の使用量が記録されること"""
+        with FakeProviderServer(FakeConfig(payload_chars=32)):
+            from llm.anthropic.client import AnthropicLLM
+            from llm.gemini.client import GeminiLLM
+            from llm.openai.client import OpenAILLM
+
+            for client in (OpenAILLM(), AnthropicLLM(), GeminiLLM()):
+                sink = ListSink()
+                llm = InstrumentedLLM(client, [sink])
+                llm.structured_response(MESSAGES, BenchmarkAnswer)
+                asyncio.run(llm.astructured_response(MESSAGES, BenchmarkAnswer))
+                assert len(sink.records) == 2
+                for record in sink.records:
+                    assert record.usage_reported and record.output_tokens > 0
+                    assert record.request_id is not None
+                    assert record.cost is not None
+
+    def test_records_errors(self):
+        """例外は記録した上で再送出されること"""
+        aggregator = TelemetryAggregator()
+        llm = InstrumentedLLM(UsageLLM(), [aggregator])
+        with pytest.raises(ValueError):
+            llm.structured_response(MESSAGES, BaseModelStub)
+        assert aggregator.summary()[0].errors == 1
+
+    def test_counts_retries(self):
+        """内側のリトライ回数が記録されること"""
+        aggregator = TelemetryAggregator()
+        resilient = ResilientLLM(
+            UsageLLM(failures=2), retry=RetryPolicy(base_delay=0.001, max_delay=0.001)
+        )
+        llm = InstrumentedLLM(resilient, [aggregator])
+        llm.single_response(MESSAGES)
+        resilient.client = UsageLLM(failures=1)
+        asyncio.run(llm.asingle_response(MESSAGES))
+        assert aggregator.summary()[0].retries == 3
+
+    def test_stream_time_to_first_byte(self):
+        """ストリームの最初のバイトまでの時間が記録されること"""
+        aggregator = TelemetryAggregator()
+        llm = InstrumentedLLM(UsageLLM(), [aggregator])
+        items = list(llm.stream_response(MESSAGES))
+        assert items[0] == "ok"
+        summary = aggregator.summary()[0]
+        assert summary.ttfb_p50 is not None
+        assert summary.input_tokens == 1000
+
+
+class BaseModelStub:
+    pass
+
+
+class TestInstrumentedEmbedding:
+    """InstrumentedEmbeddingのテスト"""
+
+    def test_usage_and_retries(self):
+        """チャンクごとのトークン数とリトライが集計されること"""
+        aggregator = TelemetryAggregator()
+        embedding = InstrumentedEmbedding(
+            ChunkedFakeEmbedding(failures=1), [aggregator]
+        )
+        vectors = embedding.embed(["a", "bb", "ccc", "dddd", "eeeee"])
+        assert len(vectors) == 5
+        assert vectors.usage == TokenUsage(input_tokens=50)
+        summary = aggregator.summary()[0]
+        assert summary.kind == "embedding" and summary.provider == "fake"
+        assert summary.input_tokens == 50
+        assert summary.retries == 1
+        assert summary.cost == pytest.approx(50 * 0.02 / 1_000_000)
+
+    def test_unreported_usage_not_free(self):
+        """使用量を返さない呼び出しはコスト0として集計されないこと"""
+        aggregator = TelemetryAggregator()
+        sink = ListSink()
+        embedding = InstrumentedEmbedding(NoUsageEmbedding(), [aggregator, sink])
+        embedding.embed(["a", "b"])
+        assert sink.records[0].cost is None
+        summary = aggregator.summary()[0]
+        assert (summary.cost, summary.unpriced) == (0.0, 1)
+
+
+class TestAggregator:
+    """TelemetryAggregatorのテスト"""
+
+    def test_percentiles_per_model(self):
+        """モデルごとにパーセンタイルを計算すること"""
+        aggregator = TelemetryAggregator()
+        for i in range(1, 101):
+            aggregator.record(
+                CallRecord("llm", "openai", "gpt-5", "single", wall_time=i / 100)
+            )
+        aggregator.record(
+            CallRecord("llm", "openai", "gpt-5-mini", "single", wall_time=5.0)
+        )
+        summaries = {summary.model: summary for summary in aggregator.summary()}
+        assert summaries["gpt-5"].calls == 100
+        assert summaries["gpt-5"].p50 == pytest.approx(0.51)
+        assert summaries["gpt-5"].p99 == pytest.approx(1.0)
+        assert summaries["gpt-5-mini"].p95 == 5.0
+
+    def test_window_bounds_memory(self):
+        """ウィンドウを超えた古い値は捨てられること"""
+        aggregator = TelemetryAggregator(window=10)
+        for i in range(100):
+            aggregator.record(CallRecord("llm", "p", "m", "single", wall_time=float(i)))
+        summary = aggregator.summary()[0]
+        assert summary.calls == 100
+        assert summary.p50 is not None and summary.p50 >= 90
+
+
+class TestJsonlExporter:
+    """JsonlExporterのテスト"""
+
+    def test_writes_records(self):
+        """1行に1レコードが書き出されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            exporter = JsonlExporter(
+                "telemetry/calls.jsonl", DataHandler(temp_dir), flush_every=100
+            )
+            llm = InstrumentedLLM(UsageLLM(), [exporter])
+            llm.single_response(MESSAGES)
+            llm.single_response(MESSAGES)
+            exporter.close()
+            lines = exporter.path.read_text().splitlines()
+            assert len(lines) == 2
+            assert json.loads(lines[0])["request_id"] == "resp_1"
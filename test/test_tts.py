@@ -0,0 +1,157 @@
+import threading
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from dev.benchmark.fake_servers import FakeConfig, FakeProviderServer, fake_audio
+from tts.base import BaseTTS, Model, SegmentConfig, TTSResponse, split_sentences
+
+LONG_TEXT = " ".join(
+    f"Sentence {i} is long enough to be a segment of its own." for i in range(6)
+)
+
+
+class SleepyTTS(BaseTTS):
+    """Returns the segment text as audio, in two chunks, after a delay."""
+
+    def __init__(self, delay: float = 0.05, format: str = "mp3", fail_on: str = ""):
+        self.name = "sleepy"
+        self.default_model = "sleepy-1"
+        self.default_voice = "calm"
+        self.format = format
+        self.segmenting = SegmentConfig(min_chars=10, concurrency=3)
+        self.delay = delay
+        self.fail_on = fail_on
+        self.active = 0
+        self.max_active = 0
+        self.started: list[str] = []
+        self._lock = threading.Lock()
+
+    def stream_segment(self, text, model=None):
+        with self._lock:
+            self.started.append(text)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if text == self.fail_on:
+                raise RuntimeError("synthesis failed")
+            yield f"<{text[: len(text) // 2]}".encode()
+            yield f"{text[len(text) // 2 :]}>".encode()
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def expected_audio(segments: list[str]) -> bytes:
+    return b"".join(f"<{segment}>".encode() for segment in segments)
+
+
+class TestSplitSentences:
+    """文分割のテスト"""
+
+    def test_first_sentence_alone(self):
+        """最初の文は単独のセグメントになること"""
+        segments = split_sentences("Hi. Short one. Another short. A third.")
+        assert segments == ["Hi.", "Short one. Another short. A third."]
+
+    def test_long_sentence_split(self):
+        """max_charsを超える文は単語の境界で分割されること"""
+        config = SegmentConfig(max_chars=20, min_chars=0)
+        segments = split_sentences("word " * 20, config)
+        assert all(len(segment) <= 20 for segment in segments)
+        assert " ".join(segments).split() == ["word"] * 20
+
+    def test_japanese(self):
+        """全角の句読点で分割されること"""
+        config = SegmentConfig(min_chars=0)
+        segments = split_sentences("こんにちは。今日は晴れです！散歩しますか？", config)
+        assert segments == ["こんにちは。", "今日は晴れです！", "散歩しますか？"]
+
+
+class TestPipeline:
+    """並列合成と順序保証のテスト"""
+
+    def test_order_and_concurrency(self):
+        """並列に合成しても元の順序で出力されること"""
+        tts = SleepyTTS()
+        segments = tts.segments(LONG_TEXT)
+        assert len(segments) == 6
+        start = time.perf_counter()
+        response = tts.generate_audio(LONG_TEXT)
+        elapsed = time.perf_counter() - start
+        assert response.audio == expected_audio(segments)
+        assert tts.max_active == 3
+        # Six 50ms segments three at a time take about two rounds.
+        assert elapsed < 6 * tts.delay
+        assert response.metrics is not None
+        assert response.metrics.segments == 6
+        assert response.metrics.time_to_first_audio < response.metrics.total_time
+
+    def test_stream_yields_chunks_then_response(self):
+        """チャンクの後に最終レスポンスが返ること"""
+        tts = SleepyTTS(delay=0.0)
+        items = list(tts.stream_audio(LONG_TEXT))
+        chunks, final = items[:-1], items[-1]
+        assert all(isinstance(chunk, bytes) for chunk in chunks)
+        assert isinstance(final, TTSResponse)
+        assert b"".join(chunks) == final.audio  # type: ignore[arg-type]
+
+    def test_error_propagates(self):
+        """セグメントの失敗が呼び出し元に伝わること"""
+        tts = SleepyTTS(delay=0.0)
+        tts.fail_on = tts.segments(LONG_TEXT)[2]
+        with pytest.raises(RuntimeError, match="synthesis failed"):
+            tts.generate_audio(LONG_TEXT)
+
+    def test_early_close_stops_submitting(self):
+        """途中で読むのをやめると残りのセグメントは合成されないこと"""
+        tts = SleepyTTS(delay=0.01)
+        tts.segmenting.concurrency = 2
+        stream = tts.stream_audio(LONG_TEXT)
+        next(stream)
+        stream.close()
+        time.sleep(0.05)
+        assert len(tts.started) <= 3
+
+    def test_wav_not_split(self):
+        """連結できない形式は分割しないこと"""
+        tts = SleepyTTS(delay=0.0, format="wav")
+        assert tts.generate_audio(LONG_TEXT).audio == expected_audio([LONG_TEXT])
+
+    def test_model_and_voice(self):
+        """Modelのnameとvoiceが既定値より優先されること"""
+        tts = SleepyTTS()
+        assert tts._resolve(None) == ("sleepy-1", "calm")
+        assert tts._resolve(Model(name="other")) == ("other", "calm")
+        assert tts._resolve(Model(name="other", voice="loud")) == ("other", "loud")
+
+
+class TestProviders:
+    """各プロバイダのクライアントのテスト"""
+
+    def test_providers_stream_audio(self):
+        """各クライアントがセグメントの音声を順に返すこと"""
+        with FakeProviderServer(FakeConfig(audio_chunks=3)):
+            from tts.elevenlabs.client import ElevenLabsTTS
+            from tts.google.client import GoogleTTS
+            from tts.openai.client import OpenAITTS
+
+            for client in (OpenAITTS(), ElevenLabsTTS(), GoogleTTS()):
+                segments = client.segments(LONG_TEXT)
+                response = client.generate_audio(LONG_TEXT)
+                assert response.audio == b"".join(map(fake_audio, segments))
+                assert response.format == client.format
+                assert response.metrics is not None
+                assert response.metrics.time_to_first_audio > 0
+
+    def test_unsupported_format(self):
+        """ElevenLabsが対応しない形式はエラーになること"""
+        from tts.elevenlabs.client import ElevenLabsTTS
+
+        with pytest.raises(ValueError, match="Unsupported format"):
+            ElevenLabsTTS(format="wav")
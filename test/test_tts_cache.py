@@ -0,0 +1,152 @@
+import tempfile
+import threading
+import time
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import pytest
+from tts.base import BaseTTS, Model, SegmentConfig
+from tts.cache import AudioStore, CachedTTS, normalize_text, segment_key
+
+GREETING = "Thank you for calling, this is the automated assistant speaking."
+DISCLAIMER = "This call may be recorded for quality and training purposes."
+
+
+class CountingTTS(BaseTTS):
+    def __init__(self, format: str = "mp3", delay: float = 0.0):
+        self.name = "counting"
+        self.default_model = "count-1"
+        self.default_voice = "calm"
+        self.format = format
+        self.segmenting = SegmentConfig(min_chars=0, concurrency=3)
+        self.delay = delay
+        self.calls: list[tuple[str, str | None]] = []
+        self.fail = False
+        self._lock = threading.Lock()
+
+    def stream_segment(self, text, model=None):
+        with self._lock:
+            self.calls.append((text, model.voice if model else None))
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("synthesis failed")
+        yield b"<"
+        yield text.encode() + b">"
+
+
+class TestSegmentKey:
+    """キャッシュキーのテスト"""
+
+    def test_normalized_text(self):
+        """空白と全角・半角の違いは同じキーになること"""
+        assert normalize_text("  Hello\n  ｗｏｒｌｄ ") == "Hello world"
+        assert segment_key("p", "m", "v", "Hello  world", "mp3") == segment_key(
+            "p", "m", "v", "Hello world", "mp3"
+        )
+
+    def test_distinct_fields(self):
+        """プロバイダ・モデル・声・形式が違えば別のキーになること"""
+        base = ("p", "m", "v", "text", "mp3")
+        keys = {segment_key(*base)}
+        for i, value in enumerate(["q", "n", "w", "other", "pcm"]):
+            changed = list(base)
+            changed[i] = value
+            keys.add(segment_key(*changed))
+        assert len(keys) == 6
+
+
+class TestAudioStore:
+    """音声ストアのテスト"""
+
+    def test_lru_eviction(self):
+        """上限を超えると最も古く使われた音声が削除されること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = AudioStore(temp_dir, max_bytes=250)
+            store.put("aa1", b"x" * 100)
+            store.put("bb2", b"y" * 100)
+            assert store.get("aa1") is not None
+            assert store.put("cc3", b"z" * 100) == 1
+            assert store.get("bb2") is None
+            assert store.get("aa1") == b"x" * 100
+            assert store.total_bytes == 200
+
+    def test_reopen_keeps_order(self):
+        """再オープン後も内容と使用順が保たれること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            store = AudioStore(temp_dir, max_bytes=250)
+            store.put("aa1", b"x" * 100)
+            store.put("bb2", b"y" * 100)
+            os.utime(store._path("aa1"), (0, 0))
+            reopened = AudioStore(temp_dir, max_bytes=250)
+            assert len(reopened) == 2
+            reopened.put("cc3", b"z" * 100)
+            assert reopened.get("aa1") is None
+            assert reopened.get("bb2") == b"y" * 100
+
+
+class TestCachedTTS:
+    """セグメント単位のキャッシュのテスト"""
+
+    def setup_method(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = AudioStore(self.temp_dir.name)
+
+    def teardown_method(self):
+        self.temp_dir.cleanup()
+
+    def test_repeated_sentences_synthesized_once(self):
+        """定型文は一度だけ合成され、新しい文と順に連結されること"""
+        client = CountingTTS()
+        tts = CachedTTS(client, self.store)
+        first = tts.generate_audio(f"{GREETING} Your order has shipped. {DISCLAIMER}")
+        second = tts.generate_audio(f"{GREETING} Your order is delayed. {DISCLAIMER}")
+        assert len(client.calls) == 4
+        assert second.audio == (
+            f"<{GREETING}><Your order is delayed.><{DISCLAIMER}>".encode()
+        )
+        assert first.audio.startswith(f"<{GREETING}>".encode())
+        assert (tts.stats.hits, tts.stats.misses) == (2, 4)
+        assert tts.stats.hit_rate == pytest.approx(1 / 3)
+
+    def test_voice_is_part_of_key(self):
+        """声が違えば別に合成されること"""
+        client = CountingTTS()
+        tts = CachedTTS(client, self.store)
+        tts.generate_audio(GREETING)
+        tts.generate_audio(GREETING, Model(name="count-1", voice="bright"))
+        assert [voice for _, voice in client.calls] == ["calm", "bright"]
+
+    def test_concurrent_duplicates_deduplicated(self):
+        """同じ文書内で重複する文は並列でも一度だけ合成されること"""
+        client = CountingTTS(delay=0.05)
+        tts = CachedTTS(client, self.store)
+        text = f"Hello. {DISCLAIMER} {DISCLAIMER} {DISCLAIMER}"
+        response = tts.generate_audio(text)
+        assert [call for call, _ in client.calls].count(DISCLAIMER) == 1
+        # Later copies either waited for the first or found it already stored.
+        assert tts.stats.deduplicated >= 1
+        assert tts.stats.misses == 2
+        assert response.audio == b"<Hello.>" + f"<{DISCLAIMER}>".encode() * 3
+
+    def test_failed_segment_not_cached(self):
+        """失敗したセグメントは保存されないこと"""
+        client = CountingTTS()
+        client.fail = True
+        tts = CachedTTS(client, self.store)
+        with pytest.raises(RuntimeError):
+            tts.generate_audio(GREETING)
+        assert len(self.store) == 0
+        client.fail = False
+        assert tts.generate_audio(GREETING).audio == f"<{GREETING}>".encode()
+
+    def test_unsplittable_format_cached_whole(self):
+        """連結できない形式は全文単位でキャッシュされること"""
+        client = CountingTTS(format="wav")
+        tts = CachedTTS(client, self.store)
+        text = f"{GREETING} {DISCLAIMER}"
+        tts.generate_audio(text)
+        tts.generate_audio(text)
+        assert client.calls == [(text, "calm")]
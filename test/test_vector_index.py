@@ -0,0 +1,121 @@
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from nl_processor.embedding.base import Vectors
+from nl_processor.embedding.index import FlatIndex, IVFIndex, load_index
+from utils.data_handler import DataHandler
+
+
+def random_vectors(n: int, dim: int = 16, seed: int = 0) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal((n, dim)).astype(np.float32)
+
+
+def brute_force(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    corpus = corpus / np.linalg.norm(corpus, axis=1, keepdims=True)
+    queries = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return np.argsort(-(queries @ corpus.T), axis=1)[:, :k]
+
+
+class TestFlatIndex:
+    """FlatIndexのテスト"""
+
+    def test_matches_brute_force(self):
+        """総当たりと同じ近傍が返ること"""
+        corpus, queries = random_vectors(500), random_vectors(20, seed=1)
+        index = FlatIndex(batch_size=7)
+        index.add(Vectors.from_list(corpus, model="m"))
+        result = index.search(queries, k=5)
+        assert np.array_equal(result.indices, brute_force(corpus, queries, 5))
+        assert np.all(np.diff(result.scores, axis=1) <= 0)
+
+    def test_single_query(self):
+        """単一ベクトルのクエリを受け付けること"""
+        corpus = random_vectors(50)
+        index = FlatIndex()
+        index.add(corpus)
+        assert index.search(corpus[3], k=1).indices.tolist() == [[3]]
+
+    def test_empty_index(self):
+        """空のインデックスを検索すると空の結果が返ること"""
+        result = FlatIndex().search(random_vectors(3), k=5)
+        assert result.indices.shape == result.scores.shape == (3, 0)
+
+
+class TestIVFIndex:
+    """IVFIndexのテスト"""
+
+    def test_full_probe_is_exact(self):
+        """全リストを探索すると厳密検索と一致すること"""
+        corpus, queries = random_vectors(400), random_vectors(10, seed=1)
+        index = IVFIndex(n_lists=8)
+        index.add(corpus)
+        result = index.search(queries, k=5, n_probe=8)
+        assert np.array_equal(result.indices, brute_force(corpus, queries, 5))
+
+    def test_incremental_add_keeps_ids(self):
+        """追加後もIDが挿入順のまま保たれること"""
+        first, second = random_vectors(100), random_vectors(50, seed=2)
+        index = IVFIndex(n_lists=4)
+        index.add(first)
+        index.add(second)
+        assert index.search(second[10], k=1, n_probe=4).indices.tolist() == [[110]]
+
+    def test_incremental_add_matches_single_add(self):
+        """追加分だけを割り当てても一括追加と同じ配置になること"""
+        first, second = random_vectors(300), random_vectors(120, seed=2)
+        incremental = IVFIndex(n_lists=8)
+        incremental.add(first)
+        incremental.add(second)
+        single = IVFIndex(n_lists=8)
+        single.train(first)
+        single.add(np.vstack([first, second]))
+        assert np.array_equal(incremental.offsets, single.offsets)
+        assert np.array_equal(incremental.ids, single.ids)
+        assert np.array_equal(incremental.vectors, single.vectors)
+
+    def test_partial_probe_matches_per_list_search(self):
+        """一部のリストのみ探索した結果が各クエリの候補内の最良と一致すること"""
+        corpus, queries = random_vectors(400), random_vectors(30, seed=1)
+        index = IVFIndex(n_lists=8)
+        index.add(corpus)
+        result = index.search(queries, k=5, n_probe=2)
+        normalized = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+        probes = np.argsort(-(normalized @ index.centroids.T), axis=1)[:, :2]
+        for query, lists, found in zip(normalized, probes, result.indices):
+            rows = np.concatenate(
+                [np.arange(index.offsets[i], index.offsets[i + 1]) for i in lists]
+            )
+            best = rows[np.argsort(-(index.vectors[rows] @ query))[:5]]
+            assert found.tolist() == index.ids[best].tolist()
+
+    def test_empty_index(self):
+        """未学習のインデックスを検索すると埋め草だけの結果が返ること"""
+        result = IVFIndex(n_lists=4).search(random_vectors(3), k=2)
+        assert result.indices.tolist() == [[-1, -1]] * 3
+        assert np.all(np.isneginf(result.scores))
+
+
+class TestIndexPersistence:
+    """インデックスの保存と読み込みテスト"""
+
+    def test_save_and_load(self):
+        """保存したインデックスをメモリマップで読み込み検索できること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            corpus, queries = random_vectors(200), random_vectors(5, seed=1)
+            for index in (FlatIndex(), IVFIndex(n_lists=4)):
+                index.add(corpus)
+                expected = index.search(queries, k=3)
+                name = type(index).__name__
+                index.save(name, data_handler=handler)
+
+                loaded = load_index(name, data_handler=handler)
+                assert type(loaded) is type(index)
+                assert np.array_equal(
+                    loaded.search(queries, k=3).indices, expected.indices
+                )
@@ -0,0 +1,43 @@
+import tempfile
+import sys
+import os
+
+# Add the parent directory to the path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from nl_processor.embedding.base import Vectors
+from utils.data_handler import DataHandler
+
+
+class TestVectors:
+    """Vectorsのテスト"""
+
+    def test_list_input_is_converted(self):
+        """リスト入力がfloat32の連続配列に変換されること"""
+        vectors = Vectors(vectors=[[1.0, 2.0], [3.0, 4.0]], model="m")  # type: ignore[arg-type]
+        assert isinstance(vectors.vectors, np.ndarray)
+        assert vectors.vectors.dtype == np.float32
+        assert vectors.vectors.flags["C_CONTIGUOUS"]
+
+    def test_list_style_access(self):
+        """リストと同様にアクセスできること"""
+        vectors = Vectors.from_list([[1.0, 2.0], [3.0, 4.0]], model="m")
+        assert len(vectors) == 2
+        assert len(vectors.vectors[0]) == 2
+        assert list(vectors[1]) == [3.0, 4.0]
+        assert vectors.tolist() == [[1.0, 2.0], [3.0, 4.0]]
+        assert vectors.dim == 2
+
+    def test_save_and_load_mmap(self):
+        """保存した配列がメモリマップで読み込まれること"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            handler = DataHandler(temp_dir)
+            original = Vectors.from_list(np.random.rand(10, 4), model="m")
+            original.save("embeddings", data_handler=handler)
+
+            loaded = Vectors.load("embeddings", data_handler=handler)
+            assert loaded == original
+            assert isinstance(loaded.vectors.base, np.memmap) or isinstance(
+                loaded.vectors, np.memmap
+            )
@@ -1,18 +1,206 @@
+import queue
+import re
+import threading
+import time
 from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
+# Formats whose segments can be joined byte-for-byte into one playable stream.
+# Containers with a single header (wav, flac) are synthesized in one piece.
+CONCATENABLE_FORMATS = {"mp3", "pcm", "opus", "aac"}
+
+# Split after sentence punctuation followed by whitespace, or directly after
+# full-width punctuation, which is not followed by a space.
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|(?<=[。！？])\s*")
+
 
 @dataclass
 class Model:
     name: str
+    voice: str | None = None
+
+
+@dataclass
+class TTSMetrics:
+    time_to_first_audio: float
+    total_time: float
+    segments: int
+    audio_bytes: int
 
 
 @dataclass
 class TTSResponse:
     audio: bytes
+    format: str = "mp3"
+    metrics: TTSMetrics | None = None
+
+
+@dataclass
+class SegmentConfig:
+    # Segments are cut at sentence boundaries and kept under max_chars;
+    # sentences after the first are merged until they reach min_chars so
+    # short sentences do not each cost a request.
+    max_chars: int = 1000
+    min_chars: int = 200
+    concurrency: int = 3
+
+
+def _split_long(sentence: str, max_chars: int) -> list[str]:
+    parts = []
+    while len(sentence) > max_chars:
+        cut = max(sentence.rfind(mark, 0, max_chars) for mark in (" ", ",", "、"))
+        cut = cut + 1 if cut > 0 else max_chars
+        parts.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    if sentence:
+        parts.append(sentence)
+    return parts
+
+
+def split_sentences(text: str, config: SegmentConfig | None = None) -> list[str]:
+    """Cut text into synthesis segments at sentence boundaries.
+
+    The first sentence is always its own segment so audio can start as
+    soon as it is synthesized.
+    """
+    config = config if config is not None else SegmentConfig()
+    sentences = [
+        part
+        for sentence in _SENTENCE_END.split(text)
+        if sentence.strip()
+        for part in _split_long(sentence.strip(), config.max_chars)
+    ]
+    segments = sentences[:1]
+    for sentence in sentences[1:]:
+        last = segments[-1]
+        if (
+            len(segments) > 1
+            and len(last) < config.min_chars
+            and len(last) + len(sentence) + 1 <= config.max_chars
+        ):
+            segments[-1] = f"{last} {sentence}"
+        else:
+            segments.append(sentence)
+    return segments
+
+
+_DONE = object()
 
 
 class BaseTTS(ABC):
+    name: str
+    default_model: str
+    default_voice: str
+    # Audio encoding requested from the provider, e.g. "mp3" or "pcm".
+    format: str
+    segmenting: SegmentConfig
+
     @abstractmethod
-    def generate_audio(self, text: str, model: Model | None = None) -> TTSResponse:
+    def stream_segment(self, text: str, model: Model | None = None) -> Iterator[bytes]:
+        """Yield the audio of one segment as the provider produces it."""
         pass
+
+    def _resolve(self, model: Model | None) -> tuple[str, str]:
+        model_name = model.name if model else self.default_model
+        voice = model.voice if model and model.voice else self.default_voice
+        return model_name, voice
+
+    def segments(self, text: str) -> list[str]:
+        if self.format not in CONCATENABLE_FORMATS:
+            return [text]
+        return split_sentences(text, self.segmenting) or [text]
+
+    def _fill(
+        self,
+        chunks: queue.Queue,
+        text: str,
+        model: Model | None,
+        stop: threading.Event,
+    ) -> None:
+        try:
+            for chunk in self.stream_segment(text, model):
+                if stop.is_set():
+                    break
+                chunks.put(chunk)
+            chunks.put(_DONE)
+        except BaseException as e:
+            chunks.put(e)
+
+    def _pipeline(self, segments: list[str], model: Model | None) -> Iterator[bytes]:
+        """Synthesize segments concurrently and yield their audio in order.
+
+        At most ``segmenting.concurrency`` segments are in flight or
+        buffered at once. The segment being played streams straight
+        through; later ones are buffered until their turn.
+        """
+        if len(segments) == 1 or self.segmenting.concurrency <= 1:
+            for segment in segments:
+                yield from self.stream_segment(segment, model)
+            return
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(
+            max_workers=min(self.segmenting.concurrency, len(segments))
+        )
+        pending: deque[queue.Queue] = deque()
+        remaining = iter(segments)
+
+        def submit() -> None:
+            segment = next(remaining, None)
+            if segment is not None:
+                chunks: queue.Queue = queue.Queue()
+                executor.submit(self._fill, chunks, segment, model, stop)
+                pending.append(chunks)
+
+        try:
+            for _ in range(self.segmenting.concurrency):
+                submit()
+            while pending:
+                chunks = pending.popleft()
+                while (item := chunks.get()) is not _DONE:
+                    if isinstance(item, BaseException):
+                        raise item
+                    yield item
+                submit()
+        finally:
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stream_audio(
+        self, text: str, model: Model | None = None
+    ) -> Iterator[bytes | TTSResponse]:
+        """Yield audio chunks in playback order, then the final TTSResponse.
+
+        Long text is split at sentence boundaries and the segments are
+        synthesized in parallel, so the first audio arrives after the first
+        sentence rather than after the whole text.
+        """
+        start = time.perf_counter()
+        first_audio: float | None = None
+        segments = self.segments(text)
+        audio = []
+        for chunk in self._pipeline(segments, model):
+            if first_audio is None:
+                first_audio = time.perf_counter()
+            audio.append(chunk)
+            yield chunk
+        end = time.perf_counter()
+        data = b"".join(audio)
+        yield TTSResponse(
+            audio=data,
+            format=self.format,
+            metrics=TTSMetrics(
+                time_to_first_audio=(first_audio or end) - start,
+                total_time=end - start,
+                segments=len(segments),
+                audio_bytes=len(data),
+            ),
+        )
+
+    def generate_audio(self, text: str, model: Model | None = None) -> TTSResponse:
+        for item in self.stream_audio(text, model):
+            if isinstance(item, TTSResponse):
+                return item
+        raise RuntimeError("stream_audio ended without a response")
@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from tts.base import BaseTTS, Model
+from utils.data_handler import DataHandler
+
+
+def normalize_text(text: str) -> str:
+    """Fold width variants and whitespace so equivalent sentences share audio."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def segment_key(
+    provider: str, model_name: str, voice: str, text: str, format: str
+) -> str:
+    payload = [provider, model_name, voice, normalize_text(text), format]
+    encoded = json.dumps(payload, ensure_ascii=False).encode()
+    return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+
+@dataclass
+class AudioCacheStats:
+    hits: int = 0
+    misses: int = 0
+    # Segments that waited for an identical one already being synthesized.
+    deduplicated: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class AudioStore:
+    """Audio blobs stored one file per key, evicted least recently used first.
+
+    A blob's modification time is its last use, so the LRU order survives
+    restarts. Writes go to a temporary file that is renamed into place, so a
+    reader never sees a partial blob.
+    """
+
+    def __init__(
+        self, folder: str | Path | None = None, max_bytes: int = 256 * 1024 * 1024
+    ):
+        if folder is None:
+            folder = DataHandler().folder_path / "cache" / "tts"
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> size, least recently used first
+        self._entries: OrderedDict[str, int] = OrderedDict()
+        files = [
+            (path.stat(), path.name)
+            for path in self.folder.glob("*/*")
+            if not path.name.startswith(".")
+        ]
+        for stat, key in sorted(files, key=lambda item: item[0].st_mtime):
+            self._entries[key] = stat.st_size
+        self.total_bytes = sum(self._entries.values())
+
+    def _path(self, key: str) -> Path:
+        return self.folder / key[:2] / key
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            if key not in self._entries:
+                return None
+            path = self._path(key)
+            try:
+                audio = path.read_bytes()
+                os.utime(path)
+            except FileNotFoundError:
+                # Removed by another process sharing the folder.
+                self.total_bytes -= self._entries.pop(key)
+                return None
+            self._entries.move_to_end(key)
+            return audio
+
+    def put(self, key: str, audio: bytes) -> int:
+        """Store audio and return the number of blobs evicted to make room."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        temp_path = path.with_name(f".{key}.{os.getpid()}.{threading.get_ident()}")
+        temp_path.write_bytes(audio)
+        os.replace(temp_path, path)
+        with self._lock:
+            self.total_bytes += len(audio) - self._entries.pop(key, 0)
+            self._entries[key] = len(audio)
+            evicted = 0
+            while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, size = self._entries.popitem(last=False)
+                self._path(old_key).unlink(missing_ok=True)
+                self.total_bytes -= size
+                evicted += 1
+            return evicted
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class CachedTTS(BaseTTS):
+    """Wrap any BaseTTS with a persistent per-segment audio cache.
+
+    Text goes through the wrapped client's sentence segmentation; each
+    segment is looked up by (provider, model, voice, normalized text,
+    format), and only missing segments are synthesized. Cached and fresh
+    segments are joined byte-for-byte, which is why caching is per segment
+    only for formats that concatenate; others are cached whole.
+    """
+
+    def __init__(self, client: BaseTTS, store: AudioStore | None = None):
+        self.client = client
+        self.store = store if store is not None else AudioStore()
+        self.name = client.name
+        self.default_model = client.default_model
+        self.default_voice = client.default_voice
+        self.format = client.format
+        self.segmenting = client.segmenting
+        self.stats = AudioCacheStats()
+        self._lock = threading.Lock()
+        self._inflight: dict[str, threading.Event] = {}
+
+    def _count(self, field: str, amount: int = 1) -> None:
+        with self._lock:
+            setattr(self.stats, field, getattr(self.stats, field) + amount)
+
+    def stream_segment(self, text: str, model: Model | None = None) -> Iterator[bytes]:
+        model_name, voice = self._resolve(model)
+        key = segment_key(self.name, model_name, voice, text, self.format)
+        while True:
+            audio = self.store.get(key)
+            if audio is not None:
+                self._count("hits")
+                yield audio
+                return
+            with self._lock:
+                pending = self._inflight.get(key)
+                if pending is None:
+                    done = self._inflight[key] = threading.Event()
+            if pending is None:
+                break
+            # The same segment is being synthesized elsewhere; reuse it, or
+            # synthesize it here if that attempt failed.
+            self._count("deduplicated")
+            pending.wait()
+        self._count("misses")
+        try:
+            chunks = []
+            for chunk in self.client.stream_segment(text, Model(model_name, voice)):
+                chunks.append(chunk)
+                yield chunk
+            # Only complete segments are stored; an abandoned stream is not.
+            self._count("evictions", self.store.put(key, b"".join(chunks)))
+        finally:
+            with self._lock:
+                del self._inflight[key]
+            done.set()
@@ -0,0 +1,44 @@
+from utils.env import load_env
+from utils.http import get_pool
+import os
+from collections.abc import Iterator
+from tts.base import BaseTTS, Model, SegmentConfig
+
+load_env()
+
+# The REST API is used directly; the official SDK is a thin wrapper over it.
+BASE_URL = "https://api.elevenlabs.io"
+OUTPUT_FORMATS = {
+    "mp3": "mp3_44100_128",
+    "pcm": "pcm_24000",
+    "opus": "opus_48000_64",
+}
+
+
+class ElevenLabsTTS(BaseTTS):
+    def __init__(self, format: str = "mp3", segmenting: SegmentConfig | None = None):
+        if format not in OUTPUT_FORMATS:
+            raise ValueError(
+                f"Unsupported format: {format} (available: {', '.join(OUTPUT_FORMATS)})"
+            )
+        self.client = get_pool("elevenlabs").client()
+        self.base_url = os.getenv("ELEVENLABS_BASE_URL", BASE_URL).rstrip("/")
+        self.api_key = os.getenv("ELEVENLABS_API_KEY", "")
+        # Flash is the lowest-latency model; the voice is a stock one ("George").
+        self.default_model = "eleven_flash_v2_5"
+        self.default_voice = "JBFqnCBsd6RMkjVDRZzb"
+        self.name = "elevenlabs"
+        self.format = format
+        self.segmenting = segmenting if segmenting is not None else SegmentConfig()
+
+    def stream_segment(self, text: str, model: Model | None = None) -> Iterator[bytes]:
+        model_name, voice = self._resolve(model)
+        with self.client.stream(
+            "POST",
+            f"{self.base_url}/v1/text-to-speech/{voice}/stream",
+            params={"output_format": OUTPUT_FORMATS[self.format]},
+            headers={"xi-api-key": self.api_key},
+            json={"text": text, "model_id": model_name},
+        ) as response:
+            response.raise_for_status()
+            yield from response.iter_bytes()
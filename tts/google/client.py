@@ -0,0 +1,49 @@
+from google import genai
+from utils.env import load_env
+from utils.http import get_pool
+import os
+from collections.abc import Iterator
+from tts.base import BaseTTS, Model, SegmentConfig
+
+load_env()
+
+
+class GoogleTTS(BaseTTS):
+    """Gemini speech generation; audio is raw 24 kHz 16-bit mono PCM."""
+
+    def __init__(self, segmenting: SegmentConfig | None = None):
+        pool = get_pool("gemini")
+        self.client = genai.Client(
+            api_key=os.getenv("GEMINI_API_KEY"),
+            http_options=genai.types.HttpOptions(
+                httpx_client=pool.client(), httpx_async_client=pool.async_client()
+            ),
+        )
+        self.default_model = "gemini-2.5-flash-preview-tts"
+        self.default_voice = "Kore"
+        self.name = "google"
+        self.format = "pcm"
+        self.segmenting = segmenting if segmenting is not None else SegmentConfig()
+
+    def _config(self, voice: str) -> genai.types.GenerateContentConfig:
+        return genai.types.GenerateContentConfig(
+            response_modalities=["AUDIO"],
+            speech_config=genai.types.SpeechConfig(
+                voice_config=genai.types.VoiceConfig(
+                    prebuilt_voice_config=genai.types.PrebuiltVoiceConfig(
+                        voice_name=voice
+                    )
+                )
+            ),
+        )
+
+    def stream_segment(self, text: str, model: Model | None = None) -> Iterator[bytes]:
+        model_name, voice = self._resolve(model)
+        for chunk in self.client.models.generate_content_stream(
+            model=model_name, contents=text, config=self._config(voice)
+        ):
+            for candidate in chunk.candidates or []:
+                parts = candidate.content.parts if candidate.content else None
+                for part in parts or []:
+                    if part.inline_data is not None and part.inline_data.data:
+                        yield part.inline_data.data
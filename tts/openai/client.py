@@ -0,0 +1,32 @@
+from openai import OpenAI
+from utils.env import load_env
+from utils.http import get_pool
+import os
+from collections.abc import Iterator
+from typing import Any, cast
+from tts.base import BaseTTS, Model, SegmentConfig
+
+load_env()
+
+
+class OpenAITTS(BaseTTS):
+    def __init__(self, format: str = "mp3", segmenting: SegmentConfig | None = None):
+        pool = get_pool("openai")
+        self.client = OpenAI(
+            api_key=os.getenv("OPENAI_API_KEY"), http_client=pool.client()
+        )
+        self.default_model = "gpt-4o-mini-tts"
+        self.default_voice = "alloy"
+        self.name = "openai"
+        self.format = format
+        self.segmenting = segmenting if segmenting is not None else SegmentConfig()
+
+    def stream_segment(self, text: str, model: Model | None = None) -> Iterator[bytes]:
+        model_name, voice = self._resolve(model)
+        with self.client.audio.speech.with_streaming_response.create(
+            model=model_name,
+            voice=voice,
+            input=text,
+            response_format=cast(Any, self.format),
+        ) as response:
+            yield from response.iter_bytes()
@@ -0,0 +1,20 @@
+from tts.base import BaseTTS, Model
+from utils.registry import LazyRegistry
+
+tts_registry: LazyRegistry[BaseTTS] = LazyRegistry(
+    {
+        "elevenlabs": "tts.elevenlabs.client:ElevenLabsTTS",
+        "google": "tts.google.client:GoogleTTS",
+        "openai": "tts.openai.client:OpenAITTS",
+    }
+)
+
+
+def get_tts(name: str) -> BaseTTS:
+    return tts_registry.get(name)
+
+
+def resolve_tts(spec: str) -> tuple[BaseTTS, Model | None]:
+    """Resolve ``"openai"`` or ``"openai:gpt-4o-mini-tts"`` to a client and model."""
+    client, model_name = tts_registry.resolve(spec)
+    return client, Model(name=model_name) if model_name else None
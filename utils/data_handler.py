@@ -1,34 +1,215 @@
 import os
 import json
+import math
+import mmap
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Optional
+from collections.abc import Iterable, Iterator
+from typing import IO, Any, Optional
+import numpy as np
+
+try:
+    # Optional: several times faster than the json module for large files.
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+# Large reads/writes go through one buffer of this size instead of many
+# small syscalls.
+BUFFER_SIZE = 1 << 20
+
+
+def _non_finite(data: Any) -> bool:
+    """Whether ``data`` holds NaN or infinity, which orjson writes as null."""
+    if isinstance(data, (float, np.floating)):
+        return not math.isfinite(data)
+    if isinstance(data, dict):
+        return any(_non_finite(value) for value in data.values())
+    if isinstance(data, (list, tuple)):
+        return any(_non_finite(value) for value in data)
+    if isinstance(data, np.ndarray) and data.dtype.kind in "fc":
+        return not np.isfinite(data).all()
+    return False
+
+
+def _to_builtin(value: Any) -> Any:
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data: Any, indent: bool = False, fast: bool = True) -> bytes:
+    """Encode JSON with orjson when available, falling back to the json module.
+
+    Values orjson rejects (integers beyond 64 bits, unknown types) or would
+    change (NaN and infinity become null) go through the json module, which
+    writes the same compact, non-ASCII-escaped form, so the output never
+    depends on whether orjson is installed.
+    """
+    if fast and orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        try:
+            encoded = orjson.dumps(data, option=option)
+            # Only scan for non-finite floats when orjson wrote a null.
+            if b"null" not in encoded or not _non_finite(data):
+                return encoded
+        except TypeError:
+            pass
+    return json.dumps(
+        data,
+        indent=2 if indent else None,
+        separators=None if indent else (",", ":"),
+        ensure_ascii=False,
+        default=_to_builtin,
+    ).encode()
+
+
+def loads(data: bytes | str, fast: bool = True) -> Any:
+    if fast and orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # The json module also accepts NaN/Infinity; let it decide.
+            pass
+    return json.loads(data)
 
 
 class DataHandler:
-    def __init__(self, base_folder: Optional[str] = None):
+    def __init__(self, base_folder: Optional[str] = None, fast_json: bool = True):
         if base_folder is None:
             base_folder = os.path.join(os.path.dirname(__file__), "..", "documents")
         self.folder_path = Path(base_folder).resolve()
         self.folder_path.mkdir(parents=True, exist_ok=True)
+        self.fast_json = fast_json
+        self._append_lock = threading.Lock()
 
     def load(self, file_name: str, format: str = "str") -> Any:
+        """Read a file as ``str``, ``bytes``, ``json``, ``jsonl`` (list of
+        records), ``npy``, ``npy_mmap`` or ``mmap``.
+
+        ``mmap`` maps the file read-only and returns the ``mmap.mmap``; close
+        it (or use it in a ``with`` block) when done. Empty files give b"".
+        """
         file_path = self.folder_path / file_name
         try:
+            if format in ("npy", "npy_mmap"):
+                # npy_mmap maps the array read-only instead of reading it in.
+                return np.load(
+                    file_path, mmap_mode="r" if format == "npy_mmap" else None
+                )
+            if format == "mmap":
+                with open(file_path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size == 0:
+                        return b""
+                    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if format == "jsonl":
+                return list(self.iter_jsonl(file_name))
+            if format in ("json", "bytes"):
+                with open(file_path, "rb") as f:
+                    data = f.read()
+                return loads(data, self.fast_json) if format == "json" else data
             with open(file_path, "r") as f:
-                return json.load(f) if format == "json" else f.read()
+                return f.read()
         except FileNotFoundError:
             raise FileNotFoundError(f"File not found: {file_path}")
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON in {file_path}: {e}")
 
+    def iter_lines(self, file_name: str) -> Iterator[str]:
+        """Yield a text file line by line (newlines kept) without loading it whole."""
+        file_path = self.folder_path / file_name
+        try:
+            with open(file_path, "r") as f:
+                yield from f
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+    def iter_chunks(self, file_name: str, size: int = BUFFER_SIZE) -> Iterator[bytes]:
+        """Yield the raw bytes of a file in chunks of at most ``size``."""
+        file_path = self.folder_path / file_name
+        try:
+            with open(file_path, "rb") as f:
+                while chunk := f.read(size):
+                    yield chunk
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+    def iter_jsonl(self, file_name: str) -> Iterator[Any]:
+        """Yield one decoded record per line of a JSONL file, skipping blanks."""
+        file_path = self.folder_path / file_name
+        try:
+            with open(file_path, "rb", buffering=BUFFER_SIZE) as f:
+                for number, line in enumerate(f, 1):
+                    if not line.strip():
+                        continue
+                    try:
+                        yield loads(line, self.fast_json)
+                    except json.JSONDecodeError as e:
+                        raise ValueError(f"Invalid JSON in {file_path}:{number}: {e}")
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}")
+
+    def append_jsonl(self, records: Iterable[Any], file_name: str) -> int:
+        """Append records as JSON lines and return how many were written.
+
+        Each call writes whole lines under a lock, so concurrent appenders
+        sharing this handler never interleave within a line.
+        """
+        file_path = self.folder_path / file_name
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        count = 0
+        with self._append_lock, open(file_path, "ab", buffering=BUFFER_SIZE) as f:
+            for record in records:
+                f.write(dumps(record, fast=self.fast_json) + b"\n")
+                count += 1
+        return count
+
+    @contextmanager
+    def _atomic_writer(self, file_path: Path, binary: bool) -> Iterator[IO]:
+        """Write to a temporary sibling, then rename it over ``file_path``.
+
+        Readers see either the old file or the complete new one, never a
+        partial write, even if the process dies mid-save.
+        """
+        temp_path = file_path.with_name(
+            f".{file_path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        try:
+            with open(temp_path, "xb" if binary else "x", buffering=BUFFER_SIZE) as f:
+                yield f
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, file_path)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+
     def save(self, data: Any, file_name: str, format: str = "str") -> None:
+        """Atomically write ``str``, ``bytes``, ``json``, ``jsonl`` (an
+        iterable of records) or ``npy`` data.
+
+        ``str`` and ``bytes`` also accept an iterable of chunks, which is
+        written as it is consumed.
+        """
         file_path = self.folder_path / file_name
         try:
             file_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(file_path, "w") as f:
-                if format == "json":
-                    json.dump(data, f, indent=2)
-                else:
+            binary = format in ("bytes", "json", "jsonl", "npy")
+            with self._atomic_writer(file_path, binary) as f:
+                if format == "npy":
+                    np.save(f, np.asarray(data))
+                elif format == "json":
+                    f.write(dumps(data, indent=True, fast=self.fast_json))
+                elif format == "jsonl":
+                    for record in data:
+                        f.write(dumps(record, fast=self.fast_json) + b"\n")
+                elif isinstance(data, (str, bytes)):
                     f.write(data)
+                else:
+                    for chunk in data:
+                        f.write(chunk)
         except Exception as e:
             raise IOError(f"Failed to save {file_path}: {e}")
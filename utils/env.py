@@ -0,0 +1,8 @@
+from functools import cache
+from dotenv import load_dotenv
+
+
+@cache
+def load_env() -> None:
+    """Load .env once per process, however many provider modules ask for it."""
+    load_dotenv()
@@ -0,0 +1,197 @@
+import asyncio
+import threading
+from dataclasses import dataclass, replace
+from typing import Any
+import httpx
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 30.0
+    # Requires the optional ``h2`` package (``pip install httpx[http2]``).
+    http2: bool = False
+    connect_timeout: float = 10.0
+    read_timeout: float = 600.0
+
+
+@dataclass
+class PoolStats:
+    requests: int = 0
+    connections_opened: int = 0
+    open_connections: int = 0
+    idle_connections: int = 0
+
+    @property
+    def reuse_rate(self) -> float:
+        """Share of requests served on an already open connection."""
+        if not self.requests:
+            return 0.0
+        return max(0.0, 1 - self.connections_opened / self.requests)
+
+
+def _pool_connections(client: httpx.Client | httpx.AsyncClient | None) -> list:
+    # httpx keeps the httpcore pool on the default transport; there is no
+    # public accessor, so fall back to "unknown" rather than failing.
+    transport = getattr(client, "_transport", None)
+    return list(getattr(getattr(transport, "_pool", None), "connections", []))
+
+
+class _SharedClient(httpx.Client):
+    # Some SDKs (google-genai) close the httpx client they were given when
+    # they are garbage collected. The pool owns these clients, so such
+    # closes are ignored and ConnectionPool.close does the real one.
+    def close(self) -> None:
+        pass
+
+
+class _SharedAsyncClient(httpx.AsyncClient):
+    # Async connections belong to the event loop that opened them, while SDK
+    # clients keep the httpx client they were built with for their lifetime.
+    # This client only builds requests; each one is sent through the pool's
+    # client for the running loop, so the same SDK client works across
+    # asyncio.run calls.
+    def __init__(self, pool: "ConnectionPool") -> None:
+        super().__init__(**pool._options())
+        self._pool = pool
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        return await self._pool._loop_client().send(request, **kwargs)
+
+    async def aclose(self) -> None:
+        pass
+
+
+class ConnectionPool:
+    """One sync and one async httpx client per provider, built on first use.
+
+    Every SDK client for a provider is handed the same httpx client, so LLM
+    and embedding calls share keep-alive connections instead of each
+    opening their own pool. Async requests are pooled per event loop, and
+    the limits apply to each loop separately.
+    """
+
+    def __init__(self, config: PoolConfig | None = None) -> None:
+        self.config = config if config is not None else PoolConfig()
+        self._stats = PoolStats()
+        self._client: httpx.Client | None = None
+        self._async_client: httpx.AsyncClient | None = None
+        self._loop_clients: dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+
+    def _options(self) -> dict[str, Any]:
+        config = self.config
+        return {
+            "limits": httpx.Limits(
+                max_connections=config.max_connections,
+                max_keepalive_connections=config.max_keepalive_connections,
+                keepalive_expiry=config.keepalive_expiry,
+            ),
+            "timeout": httpx.Timeout(
+                config.read_timeout, connect=config.connect_timeout
+            ),
+            "http2": config.http2,
+            "follow_redirects": True,
+        }
+
+    def _count_request(self, request: httpx.Request) -> None:
+        with self._lock:
+            self._stats.requests += 1
+        request.extensions["trace"] = self._trace
+
+    async def _acount_request(self, request: httpx.Request) -> None:
+        with self._lock:
+            self._stats.requests += 1
+        request.extensions["trace"] = self._atrace
+
+    def _trace(self, event: str, info: dict) -> None:
+        if event == "connection.connect_tcp.complete":
+            with self._lock:
+                self._stats.connections_opened += 1
+
+    async def _atrace(self, event: str, info: dict) -> None:
+        self._trace(event, info)
+
+    @property
+    def is_open(self) -> bool:
+        return self._client is not None or self._async_client is not None
+
+    def client(self) -> httpx.Client:
+        with self._lock:
+            if self._client is None:
+                self._client = _SharedClient(
+                    event_hooks={"request": [self._count_request]}, **self._options()
+                )
+            return self._client
+
+    def async_client(self) -> httpx.AsyncClient:
+        with self._lock:
+            if self._async_client is None:
+                self._async_client = _SharedAsyncClient(self)
+            return self._async_client
+
+    def _loop_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            client = self._loop_clients.get(loop)
+            if client is None:
+                # Connections of finished loops can never be used again.
+                for closed in [key for key in self._loop_clients if key.is_closed()]:
+                    del self._loop_clients[closed]
+                client = self._loop_clients[loop] = httpx.AsyncClient(
+                    event_hooks={"request": [self._acount_request]}, **self._options()
+                )
+            return client
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            connections = [
+                connection
+                for client in [self._client, *self._loop_clients.values()]
+                for connection in _pool_connections(client)
+            ]
+            return replace(
+                self._stats,
+                open_connections=len(connections),
+                idle_connections=sum(conn.is_idle() for conn in connections),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            if self._client is not None:
+                httpx.Client.close(self._client)
+            self._client = None
+            # AsyncClient.aclose needs the loop it ran on; drop the references
+            # and let their connections be collected.
+            self._async_client = None
+            self._loop_clients.clear()
+
+
+_pools: dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(provider: str) -> ConnectionPool:
+    with _pools_lock:
+        if provider not in _pools:
+            _pools[provider] = ConnectionPool()
+        return _pools[provider]
+
+
+def configure_pool(provider: str, config: PoolConfig) -> None:
+    """Set pool limits for a provider; call before its clients are built."""
+    with _pools_lock:
+        pool = _pools.get(provider)
+        if pool is not None and pool.is_open:
+            raise RuntimeError(
+                f"Connection pool for {provider} is already in use; "
+                "configure it before creating clients"
+            )
+        _pools[provider] = ConnectionPool(config)
+
+
+def pool_stats() -> dict[str, PoolStats]:
+    with _pools_lock:
+        pools = dict(_pools)
+    return {provider: pool.stats() for provider, pool in pools.items()}
@@ -0,0 +1,53 @@
+from dataclasses import dataclass
+from utils.tokens import TokenUsage
+
+
+@dataclass(frozen=True)
+class ModelPrice:
+    """USD per million tokens; cache prices fall back to the input price."""
+
+    input: float
+    output: float = 0.0
+    cache_read: float | None = None
+    cache_write: float | None = None
+
+
+# List prices for standard (non-batch) usage; update when providers change them.
+PRICES: dict[str, ModelPrice] = {
+    "claude-sonnet-4-5": ModelPrice(3.0, 15.0, cache_read=0.30, cache_write=3.75),
+    "claude-haiku-4-5": ModelPrice(1.0, 5.0, cache_read=0.10, cache_write=1.25),
+    "claude-opus-4-1": ModelPrice(15.0, 75.0, cache_read=1.50, cache_write=18.75),
+    "gpt-5": ModelPrice(1.25, 10.0, cache_read=0.125),
+    "gpt-5-mini": ModelPrice(0.25, 2.0, cache_read=0.025),
+    "gpt-5-nano": ModelPrice(0.05, 0.40, cache_read=0.005),
+    "gemini-2.5-pro": ModelPrice(1.25, 10.0, cache_read=0.31),
+    "gemini-2.5-flash": ModelPrice(0.30, 2.50, cache_read=0.075),
+    "gemini-2.5-flash-lite": ModelPrice(0.10, 0.40, cache_read=0.025),
+    "grok-4-fast-reasoning": ModelPrice(0.20, 0.50, cache_read=0.05),
+    "grok-4": ModelPrice(3.0, 15.0, cache_read=0.75),
+    "text-embedding-3-small": ModelPrice(0.02),
+    "text-embedding-3-large": ModelPrice(0.13),
+    "gemini-embedding-001": ModelPrice(0.15),
+    "voyage-3.5": ModelPrice(0.06),
+    "voyage-3.5-lite": ModelPrice(0.02),
+}
+
+
+def estimate_cost(model_name: str, usage: TokenUsage | None) -> float | None:
+    """Estimated USD cost of one call.
+
+    None for models without a price and for calls whose usage is unknown,
+    so an unreported call is not counted as free.
+    """
+    price = PRICES.get(model_name)
+    if price is None or usage is None:
+        return None
+    cache_read = price.cache_read if price.cache_read is not None else price.input
+    cache_write = price.cache_write if price.cache_write is not None else price.input
+    uncached = usage.input_tokens - usage.cache_read_tokens - usage.cache_write_tokens
+    return (
+        max(0, uncached) * price.input
+        + usage.cache_read_tokens * cache_read
+        + usage.cache_write_tokens * cache_write
+        + usage.output_tokens * price.output
+    ) / 1_000_000
@@ -0,0 +1,49 @@
+import importlib
+import threading
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+C = TypeVar("C")
+
+
+class LazyRegistry(Generic[C]):
+    """Name -> client registry that imports and constructs on first use.
+
+    Targets are ``"package.module:ClassName"`` strings (or zero-argument
+    factories), so a provider's SDK is imported only when that provider is
+    actually requested. Instances are cached and shared.
+    """
+
+    def __init__(self, targets: dict[str, str | Callable[[], C]]):
+        self._targets = dict(targets)
+        self._instances: dict[str, C] = {}
+        self._lock = threading.Lock()
+
+    def names(self) -> list[str]:
+        return list(self._targets)
+
+    def register(self, name: str, target: str | Callable[[], C]) -> None:
+        with self._lock:
+            self._targets[name] = target
+            self._instances.pop(name, None)
+
+    def _build(self, target: str | Callable[[], C]) -> C:
+        if callable(target):
+            return target()
+        module_name, _, class_name = target.partition(":")
+        return getattr(importlib.import_module(module_name), class_name)()
+
+    def get(self, name: str) -> C:
+        if name not in self._targets:
+            raise ValueError(
+                f"Unknown provider: {name} (available: {', '.join(self._targets)})"
+            )
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = self._build(self._targets[name])
+            return self._instances[name]
+
+    def resolve(self, spec: str) -> tuple[C, str | None]:
+        """Split ``"provider"`` or ``"provider:model"`` and return (client, model)."""
+        name, _, model_name = spec.partition(":")
+        return self.get(name), model_name or None
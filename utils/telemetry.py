@@ -0,0 +1,239 @@
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Literal
+from utils.data_handler import DataHandler
+from utils.pricing import estimate_cost
+from utils.tokens import TokenUsage
+
+CallKind = Literal["llm", "embedding"]
+
+
+@dataclass
+class CallRecord:
+    kind: CallKind
+    provider: str
+    model: str
+    operation: str
+    started_at: float = field(default_factory=time.time)
+    wall_time: float = 0.0
+    time_to_first_byte: float | None = None
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+    # False when the provider reported no usage; tokens and cost are unknown.
+    usage_reported: bool = False
+    retries: int = 0
+    cost: float | None = None
+    request_id: str | None = None
+    error: str | None = None
+
+    @property
+    def usage(self) -> TokenUsage | None:
+        if not self.usage_reported:
+            return None
+        return TokenUsage(
+            input_tokens=self.input_tokens,
+            output_tokens=self.output_tokens,
+            cache_read_tokens=self.cache_read_tokens,
+            cache_write_tokens=self.cache_write_tokens,
+        )
+
+    def add_usage(self, usage: TokenUsage | None) -> None:
+        if usage is None:
+            return
+        self.usage_reported = True
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+        self.cache_read_tokens += usage.cache_read_tokens
+        self.cache_write_tokens += usage.cache_write_tokens
+
+
+class Instrument(ABC):
+    """Receives one CallRecord per finished call; must be cheap and thread-safe."""
+
+    @abstractmethod
+    def record(self, record: CallRecord) -> None:
+        pass
+
+
+_current: ContextVar[CallRecord | None] = ContextVar("current_call", default=None)
+
+
+def note_retry() -> None:
+    """Count a retry against the call being tracked in this context, if any."""
+    record = _current.get()
+    if record is not None:
+        record.retries += 1
+
+
+@contextmanager
+def track(
+    instruments: list[Instrument],
+    kind: CallKind,
+    provider: str,
+    model: str,
+    operation: str,
+    bind: bool = True,
+) -> Iterator[CallRecord]:
+    """Time a call and hand its record to every instrument when it ends.
+
+    With ``bind`` the record is the current call for note_retry; streaming
+    wrappers pass False because a generator may resume in another context.
+    """
+    record = CallRecord(kind=kind, provider=provider, model=model, operation=operation)
+    token = _current.set(record) if bind else None
+    start = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        record.wall_time = time.perf_counter() - start
+        if token is not None:
+            _current.reset(token)
+        record.cost = estimate_cost(model, record.usage)
+        for instrument in instruments:
+            instrument.record(record)
+
+
+def _percentile(values: deque[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+@dataclass
+class CallSummary:
+    kind: CallKind
+    provider: str
+    model: str
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cost: float = 0.0
+    # Calls without a cost estimate (unknown usage or price); cost omits them.
+    unpriced: int = 0
+    p50: float | None = None
+    p95: float | None = None
+    p99: float | None = None
+    ttfb_p50: float | None = None
+    ttfb_p95: float | None = None
+
+
+class _Series:
+    def __init__(self, summary: CallSummary, window: int) -> None:
+        self.summary = summary
+        self.wall_times: deque[float] = deque(maxlen=window)
+        self.ttfb: deque[float] = deque(maxlen=window)
+
+
+class TelemetryAggregator(Instrument):
+    """In-memory totals and latency percentiles per (kind, provider, model).
+
+    Recording is an O(1) append under a lock; percentiles are computed over
+    the last ``window`` calls only when a summary is requested.
+    """
+
+    def __init__(self, window: int = 2048) -> None:
+        self.window = window
+        self._series: dict[tuple[str, str, str], _Series] = {}
+        self._lock = threading.Lock()
+
+    def record(self, record: CallRecord) -> None:
+        key = (record.kind, record.provider, record.model)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = _Series(
+                    CallSummary(record.kind, record.provider, record.model),
+                    self.window,
+                )
+                self._series[key] = series
+            summary = series.summary
+            summary.calls += 1
+            summary.errors += record.error is not None
+            summary.retries += record.retries
+            summary.input_tokens += record.input_tokens
+            summary.output_tokens += record.output_tokens
+            summary.cache_read_tokens += record.cache_read_tokens
+            if record.cost is None:
+                summary.unpriced += 1
+            else:
+                summary.cost += record.cost
+            series.wall_times.append(record.wall_time)
+            if record.time_to_first_byte is not None:
+                series.ttfb.append(record.time_to_first_byte)
+
+    def summary(self) -> list[CallSummary]:
+        with self._lock:
+            snapshots = [
+                (
+                    CallSummary(**asdict(series.summary)),
+                    deque(series.wall_times),
+                    deque(series.ttfb),
+                )
+                for series in self._series.values()
+            ]
+        summaries = []
+        for summary, wall_times, ttfb in snapshots:
+            summary.p50 = _percentile(wall_times, 0.5)
+            summary.p95 = _percentile(wall_times, 0.95)
+            summary.p99 = _percentile(wall_times, 0.99)
+            summary.ttfb_p50 = _percentile(ttfb, 0.5)
+            summary.ttfb_p95 = _percentile(ttfb, 0.95)
+            summaries.append(summary)
+        return summaries
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+
+class JsonlExporter(Instrument):
+    """Append each CallRecord as one JSON line under the data folder."""
+
+    def __init__(
+        self,
+        file_name: str = "telemetry/calls.jsonl",
+        data_handler: DataHandler | None = None,
+        flush_every: int = 32,
+    ) -> None:
+        data_handler = data_handler or DataHandler()
+        self.path: Path = data_handler.folder_path / file_name
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self._file = open(self.path, "a")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def record(self, record: CallRecord) -> None:
+        line = json.dumps(asdict(record), ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self._file.flush()
+                self._pending = 0
+
+    def flush(self) -> None:
+        with self._lock:
+            self._file.flush()
+            self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+
+def estimate_tokens(text: str) -> int:
+    """Conservative token estimate without a tokenizer.
+
+    Counts UTF-8 bytes / 3, which slightly overestimates English (~4 chars per
+    token) and roughly matches Japanese (~1 token per 3-byte character).
+    """
+    return max(1, len(text.encode()) // 3)
+
+
+@dataclass
+class TokenUsage:
+    # All prompt tokens, including those read from or written to the cache.
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cache_read_tokens: int = 0
+    cache_write_tokens: int = 0
+
+    @property
+    def cache_hit_rate(self) -> float:
+        """Share of prompt tokens served from the provider's prefix cache."""
+        return self.cache_read_tokens / self.input_tokens if self.input_tokens else 0.0